@@ -0,0 +1,420 @@
+import argparse
+import json
+import math
+import platform
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from multiprocessing import get_context
+
+# The module names of the variants of the To-Do API to benchmark
+variants = (
+    'tutorial_01_no_abstraction',
+    'tutorial_02_using_basic_classes',
+    'tutorial_03_adding_deserialization',
+    'tutorial_04_using_data_access_objects',
+    'tutorial_05_using_decorators_for_response',
+    'tutorial_06_using_flask_restful',
+    'tutorial_07_using_object_relational_mapping',
+    'tutorial_08_enhancing_orm_session_management'
+)
+scenarios = ('get', 'list', 'create', 'update', 'delete', 'mixed')
+iterations = 1000  # The default number of requests timed per scenario
+warmup = 50  # The default number of untimed requests before a scenario
+list_size = 100  # The number of items fetched by the `list` scenario
+write_ratio = 0.2  # The share of writes in the `mixed` scenario
+seed = 0  # The seed of the random choices of the `mixed` scenario
+
+
+def percentile(values, fraction):
+    """
+    Get a percentile of a collection of values with the nearest rank
+    method.
+
+    Args:
+        values (List[float]): Sorted values
+        fraction (float): Fraction of the values at or below the
+            percentile, between `0` and `1`
+
+    Returns:
+        float: Value of the percentile, or `0.0` if there are no values
+    """
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+def summarize(latencies, elapsed):
+    """
+    Summarize the latencies of the requests of a scenario.
+
+    Args:
+        latencies (List[float]): Number of seconds of each request
+        elapsed (float): Number of seconds of the whole scenario
+
+    Returns:
+        dict: Number of requests, throughput in requests per second, and
+            the p50, p95, and p99 latencies in milliseconds
+    """
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000
+    }
+
+
+def timed(calls):
+    """
+    Run calls one after another and time each of them.
+
+    Args:
+        calls (Iterable[Callable function]): Calls which each send one
+            request and return its response
+
+    Returns:
+        tuple: Number of seconds of each call as `List[float]` and of
+            all the calls
+
+    Raises:
+        RuntimeError: A call returned an error response
+    """
+    latencies = []
+    started = time.perf_counter()
+    for call in calls:
+        start = time.perf_counter()
+        response = call()
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(
+                f'request failed with status {response.status_code}'
+            )
+    return latencies, time.perf_counter() - started
+
+
+def create_items(client, count):
+    """
+    Create items through the API of a variant.
+
+    Args:
+        client (flask.testing.FlaskClient): Flask test client
+        count (int): Number of items to create
+
+    Returns:
+        List[int]: Unique identifiers of the created items
+    """
+    uids = []
+    for index in range(count):
+        response = client.post('/items', json={
+            'name': f'Benchmark item {index}',
+            'description': 'Created by the benchmark suite'
+        })
+        uids.append(response.json['uid'])
+    return uids
+
+
+def run_scenario(client, scenario, count):
+    """
+    Run one scenario of requests against the API of a variant.
+
+    The items needed by the scenario are created before the timed
+    requests. The `mixed` scenario randomly fetches or updates items,
+    with `write_ratio` of the requests being updates.
+
+    Args:
+        client (flask.testing.FlaskClient): Flask test client
+        scenario (str): Name of the scenario
+        count (int): Number of requests
+
+    Returns:
+        tuple: Number of seconds of each request as `List[float]` and of
+            all the requests
+    """
+    if scenario == 'create':
+        return timed(
+            lambda index=index: client.post('/items', json={
+                'name': f'Benchmark item {index}',
+                'description': 'Created by the benchmark suite'
+            })
+            for index in range(count)
+        )
+
+    if scenario == 'delete':
+        uids = create_items(client, count)
+        return timed(
+            lambda uid=uid: client.delete(f'/items/{uid}') for uid in uids
+        )
+
+    if scenario == 'list':
+        create_items(client, list_size)
+        return timed(
+            lambda: client.get(f'/items?limit={list_size}')
+            for _ in range(count)
+        )
+
+    uids = create_items(client, list_size)
+    if scenario == 'get':
+        return timed(
+            lambda uid=uid: client.get(f'/items/{uid}')
+            for uid in (uids[index % len(uids)] for index in range(count))
+        )
+
+    if scenario == 'update':
+        return timed(
+            lambda uid=uid: client.put(
+                f'/items/{uid}',
+                json={'name': 'Updated item', 'completed': True}
+            )
+            for uid in (uids[index % len(uids)] for index in range(count))
+        )
+
+    # Randomly fetch or update the items, with a fixed seed so every
+    # variant receives the same sequence of requests
+    choices = random.Random(seed)
+    calls = []
+    for _ in range(count):
+        uid = choices.choice(uids)
+        if choices.random() < write_ratio:
+            calls.append(lambda uid=uid: client.patch(
+                f'/items/{uid}',
+                json={'completed': True}
+            ))
+        else:
+            calls.append(lambda uid=uid: client.get(f'/items/{uid}'))
+    return timed(calls)
+
+
+def cleanup(module, existing_uids):
+    """
+    Delete the rows created by the benchmark from the `item` table in
+    the database, bypassing the API of the variant.
+
+    Args:
+        module (module): Module of the variant
+        existing_uids (set): Unique identifiers of the rows which
+            existed before the benchmark
+    """
+    connection = sqlite3.connect(module.db_path)
+    try:
+        rows = connection.execute('SELECT uid FROM item').fetchall()
+        connection.executemany(
+            'DELETE FROM item WHERE uid = ?',
+            [row for row in rows if row[0] not in existing_uids]
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+    # The rows were deleted without going through the application, so
+    # clear the cache of items of the variants which have one
+    item_cache = getattr(module, 'item_cache', None)
+    if item_cache is not None:
+        item_cache.clear()
+
+
+def load_variant(name):
+    """
+    Import a variant of the To-Do API and make sure its tables are
+    created in the database.
+
+    Args:
+        name (str): Module name of the variant
+
+    Returns:
+        module: Module of the variant
+    """
+    module = import_module(name)
+    if hasattr(module, 'create_tables'):
+        module.create_tables()
+    else:
+        # The variants which use object-relational mapping create their
+        # tables from the models
+        module.db.create_all()
+    return module
+
+
+def run_variant(name, count=iterations, warmup_count=warmup):
+    """
+    Run all the scenarios against one variant of the To-Do API through
+    its Flask test client.
+
+    This is meant to run in a fresh process for each variant, so the
+    peak resident set size only accounts for that variant.
+
+    Args:
+        name (str): Module name of the variant
+        count (int): Optional. Number of timed requests per scenario.
+            The default value is `iterations`.
+        warmup_count (int): Optional. Number of untimed requests before
+            each scenario. The default value is `warmup`.
+
+    Returns:
+        dict: Results of each scenario and the peak resident set size of
+            the process in KiB
+    """
+    module = load_variant(name)
+    client = module.app.test_client()
+
+    connection = sqlite3.connect(module.db_path)
+    try:
+        rows = connection.execute('SELECT uid FROM item').fetchall()
+    finally:
+        connection.close()
+    existing_uids = {row[0] for row in rows}
+
+    results = {}
+    try:
+        for scenario in scenarios:
+            if warmup_count:
+                run_scenario(client, scenario, warmup_count)
+            latencies, elapsed = run_scenario(client, scenario, count)
+            results[scenario] = summarize(latencies, elapsed)
+            cleanup(module, existing_uids)
+    finally:
+        cleanup(module, existing_uids)
+
+    return {
+        'scenarios': results,
+        'peak_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+
+def get_commit():
+    """
+    Get the commit of the working tree, to compare results across
+    commits.
+
+    Returns:
+        str: Hash of the current commit, or `None` if it is not known
+    """
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names=variants, count=iterations, warmup_count=warmup):
+    """
+    Run the benchmark suite, each variant in a fresh process one after
+    another.
+
+    Args:
+        names (Iterable[str]): Optional. Module names of the variants.
+            The default value is `variants`.
+        count (int): Optional. Number of timed requests per scenario.
+            The default value is `iterations`.
+        warmup_count (int): Optional. Number of untimed requests before
+            each scenario. The default value is `warmup`.
+
+    Returns:
+        dict: Results of each variant, with the commit and the settings
+            they were taken with
+    """
+    results = {}
+    for name in names:
+        # A spawned process imports only the variant, so no memory of
+        # the other variants is counted in its peak resident set size
+        with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=get_context('spawn')
+        ) as executor:
+            results[name] = executor.submit(
+                run_variant,
+                name,
+                count,
+                warmup_count
+            ).result()
+
+    return {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'iterations': count,
+        'warmup': warmup_count,
+        'variants': results
+    }
+
+
+def report(results, baseline=None):
+    """
+    Format the results of the benchmark suite as a table, with the
+    change in throughput from a baseline if provided.
+
+    Args:
+        results (dict): Results of the benchmark suite
+        baseline (dict): Optional. Results of an earlier run to compare
+            against
+
+    Returns:
+        str: Table of the results
+    """
+    lines = [
+        f'{"variant":<46}{"scenario":<8}{"req/s":>10}{"p50 ms":>9}'
+        f'{"p95 ms":>9}{"p99 ms":>9}{"RSS MiB":>9}{"change":>9}'
+    ]
+    for name, result in results['variants'].items():
+        rss = result['peak_rss_kib'] / 1024
+        for scenario, summary in result['scenarios'].items():
+            change = ''
+            try:
+                before = baseline['variants'][name]['scenarios'][scenario]
+                change = f'{summary["throughput"] / before["throughput"]:.2f}x'
+            except (KeyError, TypeError, ZeroDivisionError):
+                pass
+            lines.append(
+                f'{name:<46}{scenario:<8}{summary["throughput"]:>10.0f}'
+                f'{summary["p50_ms"]:>9.2f}{summary["p95_ms"]:>9.2f}'
+                f'{summary["p99_ms"]:>9.2f}{rss:>9.1f}{change:>9}'
+            )
+    return '\n'.join(lines)
+
+
+def main(arguments=None):
+    """
+    Run the benchmark suite from the command line, print a table of the
+    results, and store them as JSON.
+
+    Args:
+        arguments (List[str]): Optional. Command line arguments. The
+            default value is the arguments of the process.
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark the variants of the To-Do API.'
+    )
+    parser.add_argument('variants', nargs='*', default=list(variants),
+                        help='module names of the variants to benchmark')
+    parser.add_argument('-n', '--iterations', type=int, default=iterations,
+                        help='number of timed requests per scenario')
+    parser.add_argument('-w', '--warmup', type=int, default=warmup,
+                        help='number of untimed requests per scenario')
+    parser.add_argument('-o', '--output', default='benchmark.json',
+                        help='path of the JSON file to store results to')
+    parser.add_argument('-c', '--compare',
+                        help='path of the JSON results to compare against')
+    args = parser.parse_args(arguments)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    results = run(args.variants, args.iterations, args.warmup)
+    print(report(results, baseline))
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import argparse
+import random
+import sqlite3
+import sys
+import time
+from benchmark import load_variant
+from faker import Faker
+from itertools import islice
+
+# The module name of the default variant which creates the tables
+default_variant = 'tutorial_08_enhancing_orm_session_management'
+items = 10000  # The default number of items to generate
+completed_ratio = 0.3  # The default share of completed items
+description_ratio = 0.7  # The share of items which have a description
+insert_chunk_size = 50000  # The number of rows inserted per transaction
+pool_size = 5000  # The number of distinct names and sentences to draw
+
+# The weights of the number of sentences of a description, from one
+# sentence upwards, so most descriptions are short and a few are long
+sentence_weights = (40, 25, 15, 8, 5, 3, 2, 1, 1)
+
+
+class ItemGenerator(object):
+    """
+    This class generates rows of the `item` table with realistic names
+    and descriptions.
+
+    Faker is only used to fill pools of names and sentences up front,
+    and rows are drawn from the pools, as calling Faker for every row is
+    too slow for millions of rows. Generation is reproducible for a seed.
+
+    Attributes:
+        completed_ratio (float): Share of completed items
+        description_ratio (float): Share of items which have a
+            description
+    """
+
+    def __init__(self, seed=0, completed_ratio=completed_ratio,
+                 description_ratio=description_ratio, size=pool_size):
+        """
+        Initialize an `ItemGenerator` object.
+
+        Args:
+            seed (int): Optional. Seed of the random choices. The default
+                value is `0`.
+            completed_ratio (float): Optional. Share of completed items.
+                The default value is `completed_ratio`.
+            description_ratio (float): Optional. Share of items which
+                have a description. The default value is
+                `description_ratio`.
+            size (int): Optional. Number of distinct names and sentences
+                to draw from. The default value is `pool_size`.
+        """
+        self.completed_ratio = completed_ratio
+        self.description_ratio = description_ratio
+        self._random = random.Random(seed)  # Random choices of the rows
+
+        fake = Faker()
+        fake.seed_instance(seed)
+
+        # Names of To-Do items read like short tasks or phrases, and are
+        # cut to the maximum length of the `name` column
+        self._names = [
+            (fake.bs() if index % 2 else fake.catch_phrase())[:100]
+            .capitalize()
+            for index in range(size)
+        ]
+        self._sentences = [fake.sentence() for _ in range(size)]
+
+    def row(self):
+        """
+        Generate one row of the `item` table.
+
+        Returns:
+            tuple: Name, description, and status of an item
+        """
+        choice = self._random.choice
+        name = choice(self._names)
+
+        description = None
+        if self._random.random() < self.description_ratio:
+            count = self._random.choices(
+                range(1, len(sentence_weights) + 1),
+                weights=sentence_weights
+            )[0]
+            description = ' '.join(choice(self._sentences)
+                                   for _ in range(count))
+
+        completed = self._random.random() < self.completed_ratio
+
+        return name, description, completed
+
+    def rows(self, count):
+        """
+        Generate rows of the `item` table.
+
+        Args:
+            count (int): Number of rows
+
+        Yields:
+            tuple: Name, description, and status of an item
+        """
+        for _ in range(count):
+            yield self.row()
+
+
+def seed(path, count, generator=None, chunk_size=insert_chunk_size):
+    """
+    Insert generated items into the `item` table of a database.
+
+    The rows are inserted with one statement per chunk, each chunk in
+    its own transaction, and the connection does not wait for the
+    database file to be synced, so millions of rows are inserted in
+    minutes rather than hours.
+
+    Args:
+        path (str): The path to the SQLite3 database file
+        count (int): Number of items to insert
+        generator (ItemGenerator): Optional. Generator of the rows. The
+            default value is a generator with the default settings.
+        chunk_size (int): Optional. Number of rows inserted per
+            transaction. The default value is `insert_chunk_size`.
+
+    Returns:
+        tuple: The first and last unique identifiers of the inserted
+            items, or `None` if no item was inserted
+    """
+    generator = generator or ItemGenerator()
+    rows = generator.rows(count)
+    first_uid = None  # Unique identifier of the first inserted item
+    last_uid = None  # Unique identifier of the last inserted item
+
+    connection = sqlite3.connect(path)
+    try:
+        # Only this connection skips syncing, the journal mode of the
+        # database file is left unchanged
+        connection.execute('PRAGMA synchronous = OFF')
+        connection.execute('PRAGMA temp_store = MEMORY')
+
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            connection.executemany(
+                """
+                INSERT INTO item (name, description, completed)
+                VALUES (?, ?, ?)
+                """,
+                chunk
+            )
+            last_uid = connection.execute(
+                'SELECT last_insert_rowid()'
+            ).fetchone()[0]
+            connection.commit()
+
+            # The unique identifiers are assigned in sequence within the
+            # transaction, so the first one is derived from the last one
+            if first_uid is None:
+                first_uid = last_uid - len(chunk) + 1
+
+    except Exception:
+        # If any error occurred, rollback the database connection and
+        # re-raise the exception.
+        connection.rollback()
+        raise
+
+    finally:
+        connection.close()
+
+    if first_uid is None:
+        return None
+    return first_uid, last_uid
+
+
+def main(arguments=None):
+    """
+    Seed the database of the To-Do API from the command line.
+
+    Args:
+        arguments (List[str]): Optional. Command line arguments. The
+            default value is the arguments of the process.
+    """
+    parser = argparse.ArgumentParser(
+        description='Seed the database of the To-Do API with generated '
+                    'items.'
+    )
+    parser.add_argument('-n', '--items', type=int, default=items,
+                        help='number of items to generate')
+    parser.add_argument('--completed-ratio', type=float,
+                        default=completed_ratio,
+                        help='share of completed items')
+    parser.add_argument('--description-ratio', type=float,
+                        default=description_ratio,
+                        help='share of items which have a description')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the random choices')
+    parser.add_argument('--variant', default=default_variant,
+                        help='module name of the variant which creates '
+                             'the tables')
+    args = parser.parse_args(arguments)
+
+    # Create the tables of the variant, including the tables and
+    # triggers which track changes to the `item` table if it has them
+    module = load_variant(args.variant)
+
+    generator = ItemGenerator(
+        seed=args.seed,
+        completed_ratio=args.completed_ratio,
+        description_ratio=args.description_ratio
+    )
+    start = time.perf_counter()
+    seed(module.db_path, args.items, generator)
+    elapsed = time.perf_counter() - start
+    print(f'inserted {args.items} items into {module.db_path} '
+          f'in {elapsed:.1f} seconds')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,7 @@
 import sqlite3
 import unittest
 from deepdiff import DeepDiff
+from unittest.mock import patch
 import tutorial_03_adding_deserialization as todo_app
 
 
@@ -118,8 +119,12 @@ class TestToDoApp(unittest.TestCase):
         self.assertIsInstance(data, dict)
         self.assertFalse(DeepDiff(data, expected, ignore_order=True))
 
-        # Fetch all items - make sure the item is in the returned list
-        response = self.app.get('/items')
+        # Fetch all items, starting before the created item so the
+        # existing rows do not push it off the first page - make
+        # sure the item is in the returned list
+        response = self.app.get('/items', query_string={
+            'cursor': todo_app.encode_cursor(item_uid - 1)
+        })
         expected = {
             'uid': item_uid,
             'name': 'Create API',
@@ -203,6 +208,205 @@ class TestToDoApp(unittest.TestCase):
         response = self.app.get(f'/items/{item_uid}')
         self.assertEqual(response.status_code, 404)
 
+    def test_items_pagination(self):
+        """
+        Unit test for paginating the collection of items.
+            - Create three items
+            - Fetch all items two at a time by following the cursor of
+              each page and make sure the items are in order of their
+              unique identifiers
+            - Fetch items with a limit above the maximum page size and
+              make sure the page is capped
+            - Fetch items with an invalid limit or cursor and make sure
+              the request is rejected
+        """
+        # Create three items
+        created_uids = []
+        for name in ('First item', 'Second item', 'Third item'):
+            response = self.app.post('/items', json={'name': name})
+            self.assertEqual(response.status_code, 200)
+            created_uids.append(response.json['uid'])
+
+        # Fetch all items two at a time by following the cursors
+        fetched_uids = []
+        query_string = {'limit': 2}
+        while True:
+            response = self.app.get('/items', query_string=query_string)
+            self.assertEqual(response.status_code, 200)
+            data = response.json
+            self.assertIsInstance(data, list)
+            self.assertLessEqual(len(data), 2)
+            fetched_uids.extend([item['uid'] for item in data])
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor is None:
+                break
+            query_string['cursor'] = cursor
+        self.assertEqual(fetched_uids, sorted(fetched_uids))
+        for uid in created_uids:
+            self.assertIn(uid, fetched_uids)
+
+        # Fetch items with a limit above the maximum page size
+        with patch.object(todo_app, 'max_page_size', 1):
+            response = self.app.get('/items', query_string={'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 1)
+        self.assertIn('X-Next-Cursor', response.headers)
+
+        # Fetch items with an invalid limit or cursor
+        for query_string in ({'limit': 0}, {'limit': 'all'}, {'cursor': '*'}):
+            response = self.app.get('/items', query_string=query_string)
+            self.assertEqual(response.status_code, 400)
+
+    def test_items_completed_filter(self):
+        """
+        Unit test for filtering the collection of items by status.
+            - Create a completed item and an item which is not completed
+            - Fetch the items of each status and make sure only the item
+              of that status is fetched
+            - Fetch items with an invalid status and make sure the
+              request is rejected
+            - Make sure the index on the status of the items is used to
+              find the items of a status
+        """
+        # Create a completed item and an item which is not completed
+        response = self.app.post(
+            '/items',
+            json={'name': 'Completed item', 'completed': True}
+        )
+        self.assertEqual(response.status_code, 200)
+        completed_uid = response.json['uid']
+        response = self.app.post('/items', json={'name': 'Open item'})
+        self.assertEqual(response.status_code, 200)
+        open_uid = response.json['uid']
+
+        # Fetch the items of each status, starting before the created
+        # items
+        cursor = todo_app.encode_cursor(completed_uid - 1)
+        for completed, uid in (('true', completed_uid), ('false', open_uid)):
+            response = self.app.get('/items', query_string={
+                'completed': completed,
+                'cursor': cursor
+            })
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([item['uid'] for item in response.json], [uid])
+            self.assertEqual(
+                response.json[0]['completed'],
+                completed == 'true'
+            )
+
+        # Fetch items with an invalid status
+        response = self.app.get('/items', query_string={'completed': 'yes'})
+        self.assertEqual(response.status_code, 400)
+
+        # Make sure the index is used to find the items of a status
+        connection = sqlite3.connect(todo_app.db_path)
+        try:
+            plan = connection.execute(
+                """
+                EXPLAIN QUERY PLAN
+                SELECT uid, name, description, completed FROM item
+                WHERE completed = ? AND uid > ? ORDER BY uid LIMIT ?
+                """,
+                (True, 0, todo_app.page_size + 1)
+            ).fetchall()
+        finally:
+            connection.close()
+        self.assertIn('ix_item_completed', ' '.join(row[-1] for row in plan))
+
+    def test_items_fields(self):
+        """
+        Unit test for selecting the fields of the items in a page.
+            - Create two items
+            - Fetch the items with some of their fields and make sure
+              only those fields are in the payload
+            - Fetch the items without their unique identifiers a page of
+              one item at a time by following the cursors, and make sure
+              both items are fetched
+            - Fetch items with invalid fields and make sure the request
+              is rejected
+        """
+        # Create two items
+        uids = []
+        for name in ('First item', 'Second item'):
+            response = self.app.post('/items', json={
+                'name': name,
+                'description': 'Long description of the item',
+                'completed': True
+            })
+            self.assertEqual(response.status_code, 200)
+            uids.append(response.json['uid'])
+        cursor = todo_app.encode_cursor(uids[0] - 1)
+
+        # Fetch the items with some of their fields
+        response = self.app.get('/items', query_string={
+            'fields': 'uid,name,completed',
+            'cursor': cursor
+        })
+        self.assertEqual(response.status_code, 200)
+        expected = [
+            {'uid': uids[0], 'name': 'First item', 'completed': True},
+            {'uid': uids[1], 'name': 'Second item', 'completed': True}
+        ]
+        self.assertEqual(DeepDiff(expected, response.json), {})
+
+        # Fetch the names of the items one at a time
+        names = []
+        query_string = {'fields': 'name', 'limit': 1, 'cursor': cursor}
+        while True:
+            response = self.app.get('/items', query_string=query_string)
+            self.assertEqual(response.status_code, 200)
+            names.extend(response.json)
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor is None:
+                break
+            query_string['cursor'] = cursor
+        self.assertEqual(
+            names,
+            [{'name': 'First item'}, {'name': 'Second item'}]
+        )
+
+        # Fetch items with invalid fields
+        for fields in ('', 'name,secret'):
+            response = self.app.get('/items', query_string={'fields': fields})
+            self.assertEqual(response.status_code, 400)
+
+    def test_item_slots(self):
+        """
+        Unit test for the compact representation of items.
+            - Create an item and make sure it has no attribute dictionary
+              and rejects unknown attributes
+            - Create items with the row factories of a cursor, from a row
+              of all the columns and from a row of some of the columns,
+              and make sure their attributes are populated
+        """
+        # Create an item
+        item = todo_app.Item(name='Slotted item')
+        self.assertFalse(hasattr(item, '__dict__'))
+        with self.assertRaises(AttributeError):
+            item.priority = 1
+
+        # Create items with the row factories of a cursor
+        connection = sqlite3.connect(':memory:')
+        try:
+            cursor = connection.cursor()
+            cursor.row_factory = todo_app.Item.from_row
+            item = cursor.execute("SELECT 1, 'First item', NULL, 1").fetchone()
+            cursor.row_factory = todo_app.Item.row_factory(
+                ('uid', 'completed')
+            )
+            partial_item = cursor.execute('SELECT 2, 0').fetchone()
+        finally:
+            connection.close()
+        self.assertIsInstance(item, todo_app.Item)
+        self.assertEqual(
+            (item.uid, item.name, item.description, item.completed),
+            (1, 'First item', None, True)
+        )
+        self.assertEqual(
+            (partial_item.uid, partial_item.name, partial_item.completed),
+            (2, None, False)
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,10 @@
+import json
 import sqlite3
+import threading
+import time
 import unittest
 from deepdiff import DeepDiff
+from unittest.mock import patch
 import tutorial_04_using_data_access_objects as todo_app
 
 
@@ -73,6 +77,10 @@ class TestToDoApp(unittest.TestCase):
 
         self.existing_uids.clear()
 
+        # The rows were deleted without going through the application,
+        # so clear the cache of items
+        todo_app.item_cache.clear()
+
     def test_items_crud_actions(self):
         """
         Unit test for CRUD actions for the `item` resource.
@@ -118,8 +126,12 @@ class TestToDoApp(unittest.TestCase):
         self.assertIsInstance(data, dict)
         self.assertFalse(DeepDiff(data, expected, ignore_order=True))
 
-        # Fetch all items - make sure the item is in the returned list
-        response = self.app.get('/items')
+        # Fetch all items, starting before the created item so the
+        # existing rows do not push it off the first page - make
+        # sure the item is in the returned list
+        response = self.app.get('/items', query_string={
+            'cursor': todo_app.encode_cursor(item_uid - 1)
+        })
         expected = {
             'uid': item_uid,
             'name': 'Create API',
@@ -203,6 +215,919 @@ class TestToDoApp(unittest.TestCase):
         response = self.app.get(f'/items/{item_uid}')
         self.assertEqual(response.status_code, 404)
 
+    def test_connection_pool(self):
+        """
+        Unit test for the pool of database connections.
+            - Check out a connection twice in the same thread and make
+              sure the same connection is shared
+            - Check out a connection again and make sure the idle
+              connection is reused
+            - Check out the idle connection and make sure it is only
+              pinged once it was idle for longer than the ping interval
+            - Close the idle connection and make sure a healthy
+              connection is checked out instead
+            - Hold the only connection of a pool in another thread and
+              make sure a checkout times out
+        """
+        pool = todo_app.ConnectionPool(
+            path=todo_app.db_path,
+            size=1,
+            timeout=0.01,
+            pragmas={'foreign_keys': 'ON'}
+        )
+
+        # Check out a connection twice in the same thread
+        with pool.connection() as connection:
+            with pool.connection() as nested_connection:
+                self.assertIs(nested_connection, connection)
+            self.assertEqual(
+                connection.execute('PRAGMA foreign_keys').fetchone()[0],
+                1
+            )
+
+        # Check out a connection again - make sure it is reused
+        with pool.connection() as reused_connection:
+            self.assertIs(reused_connection, connection)
+
+        # Check out the idle connection - make sure it is only pinged
+        # once it was idle for longer than the ping interval
+        statements = []
+        connection.set_trace_callback(statements.append)
+        with pool.connection():
+            self.assertEqual(statements, [])
+        pool.ping_after = 0.0
+        time.sleep(0.001)
+        with pool.connection():
+            self.assertEqual(statements, ['SELECT 1'])
+        connection.set_trace_callback(None)
+
+        # Close the idle connection - make sure it is replaced
+        connection.close()
+        with pool.connection() as new_connection:
+            self.assertIsNot(new_connection, connection)
+            self.assertEqual(
+                new_connection.execute('SELECT 1').fetchone()[0],
+                1
+            )
+
+        # Hold the only connection in another thread - make sure a
+        # checkout times out
+        holding = threading.Event()
+        release = threading.Event()
+
+        def hold_connection():
+            with pool.connection():
+                holding.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold_connection)
+        thread.start()
+        holding.wait()
+        with self.assertRaises(TimeoutError):
+            pool.checkout()
+        release.set()
+        thread.join()
+        pool.close()
+
+    def test_items_pagination(self):
+        """
+        Unit test for paginating the collection of items.
+            - Create three items
+            - Fetch all items two at a time by following the cursor of
+              each page and make sure the items are in order of their
+              unique identifiers
+            - Fetch items with a limit above the maximum page size and
+              make sure the page is capped
+            - Fetch items with an invalid limit or cursor and make sure
+              the request is rejected
+        """
+        # Create three items
+        created_uids = []
+        for name in ('First item', 'Second item', 'Third item'):
+            response = self.app.post('/items', json={'name': name})
+            self.assertEqual(response.status_code, 200)
+            created_uids.append(response.json['uid'])
+
+        # Fetch all items two at a time by following the cursors
+        fetched_uids = []
+        query_string = {'limit': 2}
+        while True:
+            response = self.app.get('/items', query_string=query_string)
+            self.assertEqual(response.status_code, 200)
+            data = response.json
+            self.assertIsInstance(data, list)
+            self.assertLessEqual(len(data), 2)
+            fetched_uids.extend([item['uid'] for item in data])
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor is None:
+                break
+            query_string['cursor'] = cursor
+        self.assertEqual(fetched_uids, sorted(fetched_uids))
+        for uid in created_uids:
+            self.assertIn(uid, fetched_uids)
+
+        # Fetch items with a limit above the maximum page size
+        with patch.object(todo_app, 'max_page_size', 1):
+            response = self.app.get('/items', query_string={'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 1)
+        self.assertIn('X-Next-Cursor', response.headers)
+
+        # Fetch items with an invalid limit or cursor
+        for query_string in ({'limit': 0}, {'limit': 'all'}, {'cursor': '*'}):
+            response = self.app.get('/items', query_string=query_string)
+            self.assertEqual(response.status_code, 400)
+
+    def test_items_streaming(self):
+        """
+        Unit test for streaming the collection of items.
+            - Create two items
+            - Stream all items as a JSON array and make sure the items
+              are in the array
+            - Stream all items as newline delimited JSON and make sure
+              the items are in the lines
+            - Stream items with an invalid format and make sure the
+              request is rejected
+        """
+        # Create two items
+        created_uids = []
+        for name in ('First item', 'Second item'):
+            response = self.app.post('/items', json={'name': name})
+            self.assertEqual(response.status_code, 200)
+            created_uids.append(response.json['uid'])
+
+        # Stream all items as a JSON array
+        response = self.app.get('/items', query_string={'stream': 'json'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        data = response.json
+        self.assertIsInstance(data, list)
+        fetched_uids = [item['uid'] for item in data]
+        for uid in created_uids:
+            self.assertIn(uid, fetched_uids)
+
+        # Stream all items as newline delimited JSON
+        response = self.app.get('/items', query_string={'stream': 'ndjson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data(as_text=True).splitlines()
+        fetched_uids = [json.loads(line)['uid'] for line in lines]
+        self.assertEqual(fetched_uids, [item['uid'] for item in data])
+
+        # Stream items with an invalid format
+        response = self.app.get('/items', query_string={'stream': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_item_cache(self):
+        """
+        Unit test for the cache of items.
+            - Create an item and fetch it twice and make sure the second
+              fetch is a cache hit
+            - Update the item and make sure the fetched item is updated
+            - Fill a small cache and make sure the least recently used
+              entry is evicted
+            - Cache rows read before an invalidation and make sure they
+              are not cached
+            - Cache rows larger than the cache and make sure they are
+              not cached
+            - Cache rows with no time to live and make sure they expire
+        """
+        # Create an item and fetch it twice
+        response = self.app.post('/items', json={'name': 'Create API'})
+        self.assertEqual(response.status_code, 200)
+        item_uid = response.json['uid']
+        self.app.get(f'/items/{item_uid}')
+        hits = todo_app.item_cache.hits
+        response = self.app.get(f'/items/{item_uid}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(todo_app.item_cache.hits, hits + 1)
+
+        # Update the item - make sure the fetched item is updated
+        response = self.app.patch(
+            f'/items/{item_uid}',
+            json={'completed': True}
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.app.get(f'/items/{item_uid}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json['completed'])
+
+        # Fill a small cache
+        cache = todo_app.ItemCache(max_entries=2)
+        for uid in (1, 2, 3):
+            cache.set(uid, [(uid, 'Item', None, 0)], cache.generation)
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.get(3), [(3, 'Item', None, 0)])
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+        # Cache rows read before an invalidation
+        generation = cache.generation
+        cache.invalidate(4)
+        cache.set(4, [(4, 'Item', None, 0)], generation)
+        self.assertIsNone(cache.get(4))
+
+        # Cache rows larger than the cache
+        cache = todo_app.ItemCache(max_bytes=100)
+        cache.set(1, [(1, 'Item' * 100, None, 0)], cache.generation)
+        self.assertIsNone(cache.get(1))
+
+        # Cache rows with no time to live
+        cache = todo_app.ItemCache(ttl=0)
+        cache.set(1, [(1, 'Item', None, 0)], cache.generation)
+        time.sleep(0.001)
+        self.assertIsNone(cache.get(1))
+
+    def test_items_batch_create(self):
+        """
+        Unit test for creating a collection of items.
+            - Create three items in a batch and make sure each item can
+              be fetched by its returned unique identifier
+            - Create a batch with an invalid item and make sure none of
+              the items are created
+            - Create a batch which is not a list and make sure it is
+              rejected
+        """
+        # Create three items in a batch
+        batch_data = [
+            {'name': 'First item'},
+            {'name': 'Second item', 'description': 'Second description'},
+            {'name': 'Third item', 'completed': True}
+        ]
+        response = self.app.post('/items/batch', json=batch_data)
+        self.assertEqual(response.status_code, 200)
+        uids = response.json
+        self.assertIsInstance(uids, list)
+        self.assertEqual(len(uids), 3)
+        for uid, item_data in zip(uids, batch_data):
+            response = self.app.get(f'/items/{uid}')
+            self.assertEqual(response.status_code, 200)
+            expected = {
+                'uid': uid,
+                'name': item_data['name'],
+                'description': item_data.get('description'),
+                'completed': item_data.get('completed', False)
+            }
+            self.assertFalse(DeepDiff(response.json, expected))
+
+        # Create a batch with an invalid item
+        batch_data = [
+            {'name': 'Valid batch item'},
+            {'description': 'Invalid batch item without a name'}
+        ]
+        response = self.app.post('/items/batch', json=batch_data)
+        self.assertEqual(response.status_code, 400)
+        response = self.app.get('/items', query_string={'stream': 'json'})
+        names = [item['name'] for item in response.json]
+        self.assertNotIn('Valid batch item', names)
+
+        # Create a batch which is not a list
+        response = self.app.post('/items/batch', json={'name': 'Item'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_items_batch_update(self):
+        """
+        Unit test for partially updating a collection of items.
+            - Create three items
+            - Partially update two of the items and an item which does
+              not exist and make sure the updated and missing items are
+              reported
+            - Fetch the items and make sure only the two items were
+              updated
+            - Partially update a batch without unique identifiers and
+              make sure it is rejected
+        """
+        # Create three items
+        response = self.app.post('/items/batch', json=[
+            {'name': 'First item'},
+            {'name': 'Second item'},
+            {'name': 'Third item'}
+        ])
+        self.assertEqual(response.status_code, 200)
+        uids = response.json
+        missing_uid = max(uids) + 1000
+
+        # Partially update two of the items and a missing item
+        response = self.app.patch('/items', json=[
+            {'uid': uids[0], 'completed': True},
+            {'uid': missing_uid, 'completed': True},
+            {'uid': uids[1], 'name': 'Renamed item', 'completed': True}
+        ])
+        self.assertEqual(response.status_code, 200)
+        expected = {
+            'updated': [uids[0], uids[1]],
+            'not_found': [missing_uid]
+        }
+        self.assertFalse(DeepDiff(response.json, expected))
+
+        # Fetch the items - make sure only the two items were updated
+        expected = [
+            ('First item', True),
+            ('Renamed item', True),
+            ('Third item', False)
+        ]
+        for uid, (name, completed) in zip(uids, expected):
+            response = self.app.get(f'/items/{uid}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json['name'], name)
+            self.assertEqual(response.json['completed'], completed)
+
+        # Partially update a batch without unique identifiers
+        response = self.app.patch('/items', json=[{'completed': True}])
+        self.assertEqual(response.status_code, 400)
+
+    def test_items_batch_delete(self):
+        """
+        Unit test for deleting a collection of items.
+            - Create three items, two of them completed
+            - Delete an item and an item which does not exist by their
+              unique identifiers and make sure one item is deleted
+            - Delete the completed items in chunks of one item and make
+              sure the remaining completed item is deleted
+            - Fetch the items and make sure only the uncompleted item
+              remains
+            - Create two completed items, fetch a page of them, fail to
+              delete the second item in chunks of one item, and make sure
+              the page no longer holds the first item
+            - Delete a collection of items without a filter and make
+              sure it is rejected
+        """
+        # Create three items, two of them completed
+        response = self.app.post('/items/batch', json=[
+            {'name': 'First item', 'completed': True},
+            {'name': 'Second item', 'completed': True},
+            {'name': 'Third item'}
+        ])
+        self.assertEqual(response.status_code, 200)
+        uids = response.json
+        missing_uid = max(uids) + 1000
+
+        # Delete an item and a missing item by their unique identifiers
+        response = self.app.delete(
+            '/items', json={'uids': [uids[0], missing_uid]}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {'deleted': 1})
+
+        # Delete the completed items in chunks of one item
+        with patch.object(todo_app, 'delete_chunk_size', 1):
+            response = self.app.delete('/items', json={'completed': True})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {'deleted': 1})
+
+        # Fetch the items - make sure only the uncompleted item remains
+        for uid in uids[:2]:
+            response = self.app.get(f'/items/{uid}')
+            self.assertEqual(response.status_code, 404)
+        response = self.app.get(f'/items/{uids[2]}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['name'], 'Third item')
+
+        # Create two completed items and fetch a page of them
+        response = self.app.post('/items/batch', json=[
+            {'name': 'Deleted item', 'completed': True},
+            {'name': 'Failed item', 'completed': True}
+        ])
+        self.assertEqual(response.status_code, 200)
+        deleted_uid, failed_uid = response.json
+        cursor = todo_app.encode_cursor(deleted_uid - 1)
+        response = self.app.get('/items', query_string={'cursor': cursor})
+        self.assertEqual(
+            [item['uid'] for item in response.json],
+            [deleted_uid, failed_uid]
+        )
+
+        # Fail to delete the second item in chunks of one item
+        connection = sqlite3.connect(todo_app.db_path)
+        connection.execute(f"""
+            CREATE TRIGGER fail_delete BEFORE DELETE ON item
+            WHEN old.uid = {failed_uid}
+            BEGIN SELECT RAISE(ABORT, 'Failed delete'); END
+        """)
+        try:
+            with patch.object(todo_app, 'delete_chunk_size', 1):
+                response = self.app.delete(
+                    '/items',
+                    json={'completed': True}
+                )
+            self.assertEqual(response.status_code, 400)
+        finally:
+            connection.execute('DROP TRIGGER fail_delete')
+            connection.close()
+
+        # Fetch the page - make sure the first item is no longer in it
+        response = self.app.get('/items', query_string={'cursor': cursor})
+        self.assertEqual(
+            [item['uid'] for item in response.json],
+            [failed_uid]
+        )
+
+        # Delete a collection of items without a filter
+        response = self.app.delete('/items', json={})
+        self.assertEqual(response.status_code, 400)
+
+    def test_storage_profiles(self):
+        """
+        Unit test for the storage profiles of the database connections.
+            - Check out a connection from the pool and make sure the
+              pragmas of the default profile are applied
+            - Apply the `throughput` profile to a new connection and make
+              sure its pragmas are applied
+            - Change the storage profile and make sure the connections
+              opened by the pool afterwards have its pragmas applied
+        """
+        # Check out a connection - make sure the default profile is
+        # applied
+        with todo_app.pool.connection() as connection:
+            self.assertEqual(
+                connection.execute('PRAGMA journal_mode').fetchone()[0],
+                'wal'
+            )
+            self.assertEqual(
+                connection.execute('PRAGMA synchronous').fetchone()[0],
+                1
+            )
+            self.assertEqual(
+                connection.execute('PRAGMA busy_timeout').fetchone()[0],
+                5000
+            )
+
+        # Apply the `throughput` profile - make sure it is applied
+        connection = sqlite3.connect(':memory:')
+        todo_app.apply_pragmas(
+            connection,
+            todo_app.storage_profiles['throughput']
+        )
+        self.assertEqual(
+            connection.execute('PRAGMA synchronous').fetchone()[0],
+            0
+        )
+        self.assertEqual(
+            connection.execute('PRAGMA cache_size').fetchone()[0],
+            -262144
+        )
+        self.assertEqual(
+            connection.execute('PRAGMA temp_store').fetchone()[0],
+            2
+        )
+        connection.close()
+
+        # Change the storage profile. The idle connections are closed, so
+        # the pool opens a new connection.
+        todo_app.pool.close()
+        try:
+            with patch.object(todo_app, 'storage_profile', 'throughput'):
+                with todo_app.pool.connection() as connection:
+                    self.assertEqual(
+                        connection.execute(
+                            'PRAGMA synchronous'
+                        ).fetchone()[0],
+                        0
+                    )
+        finally:
+            todo_app.pool.close()
+
+    def test_items_completed_filter(self):
+        """
+        Unit test for filtering the collection of items by status.
+            - Create a completed item and an item which is not completed
+            - Fetch the items of each status and make sure only the item
+              of that status is fetched
+            - Stream the items which are not completed and make sure the
+              completed item is not streamed
+            - Fetch items with an invalid status and make sure the
+              request is rejected
+            - Make sure the index on the status of the items is used to
+              find the items of a status
+        """
+        # Create a completed item and an item which is not completed
+        response = self.app.post(
+            '/items',
+            json={'name': 'Completed item', 'completed': True}
+        )
+        self.assertEqual(response.status_code, 200)
+        completed_uid = response.json['uid']
+        response = self.app.post('/items', json={'name': 'Open item'})
+        self.assertEqual(response.status_code, 200)
+        open_uid = response.json['uid']
+
+        # Fetch the items of each status, starting before the created
+        # items
+        cursor = todo_app.encode_cursor(completed_uid - 1)
+        for completed, uid in (('true', completed_uid), ('false', open_uid)):
+            response = self.app.get('/items', query_string={
+                'completed': completed,
+                'cursor': cursor
+            })
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([item['uid'] for item in response.json], [uid])
+            self.assertEqual(
+                response.json[0]['completed'],
+                completed == 'true'
+            )
+
+        # Stream the items which are not completed
+        response = self.app.get('/items', query_string={
+            'completed': 'false',
+            'stream': 'ndjson'
+        })
+        self.assertEqual(response.status_code, 200)
+        uids = [json.loads(line)['uid'] for line in response.data.splitlines()]
+        self.assertIn(open_uid, uids)
+        self.assertNotIn(completed_uid, uids)
+
+        # Fetch items with an invalid status
+        response = self.app.get('/items', query_string={'completed': 'yes'})
+        self.assertEqual(response.status_code, 400)
+
+        # Make sure the index is used to find the items of a status
+        connection = sqlite3.connect(todo_app.db_path)
+        try:
+            plan = connection.execute(
+                """
+                EXPLAIN QUERY PLAN
+                SELECT uid, name, description, completed FROM item
+                WHERE completed = ? AND uid > ? ORDER BY uid LIMIT ?
+                """,
+                (True, 0, todo_app.page_size + 1)
+            ).fetchall()
+        finally:
+            connection.close()
+        self.assertIn('ix_item_completed', ' '.join(row[-1] for row in plan))
+
+    def test_items_fields(self):
+        """
+        Unit test for selecting the fields of the items in a page.
+            - Create two items
+            - Fetch the items with some of their fields and make sure
+              only those fields are in the payload
+            - Fetch the items without their unique identifiers a page of
+              one item at a time by following the cursors, and make sure
+              both items are fetched
+            - Fetch items with invalid fields and make sure the request
+              is rejected
+        """
+        # Create two items
+        uids = []
+        for name in ('First item', 'Second item'):
+            response = self.app.post('/items', json={
+                'name': name,
+                'description': 'Long description of the item',
+                'completed': True
+            })
+            self.assertEqual(response.status_code, 200)
+            uids.append(response.json['uid'])
+        cursor = todo_app.encode_cursor(uids[0] - 1)
+
+        # Fetch the items with some of their fields
+        response = self.app.get('/items', query_string={
+            'fields': 'uid,name,completed',
+            'cursor': cursor
+        })
+        self.assertEqual(response.status_code, 200)
+        expected = [
+            {'uid': uids[0], 'name': 'First item', 'completed': True},
+            {'uid': uids[1], 'name': 'Second item', 'completed': True}
+        ]
+        self.assertEqual(DeepDiff(expected, response.json), {})
+
+        # Fetch the names of the items one at a time
+        names = []
+        query_string = {'fields': 'name', 'limit': 1, 'cursor': cursor}
+        while True:
+            response = self.app.get('/items', query_string=query_string)
+            self.assertEqual(response.status_code, 200)
+            names.extend(response.json)
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor is None:
+                break
+            query_string['cursor'] = cursor
+        self.assertEqual(
+            names,
+            [{'name': 'First item'}, {'name': 'Second item'}]
+        )
+
+        # Fetch items with invalid fields
+        for fields in ('', 'name,secret'):
+            response = self.app.get('/items', query_string={'fields': fields})
+            self.assertEqual(response.status_code, 400)
+
+    def test_item_slots(self):
+        """
+        Unit test for the compact representation of items.
+            - Create an item and make sure it has no attribute dictionary
+              and rejects unknown attributes
+            - Create items with the row factories of a cursor, from a row
+              of all the columns and from a row of some of the columns,
+              and make sure their attributes are populated
+        """
+        # Create an item
+        item = todo_app.Item(name='Slotted item')
+        self.assertFalse(hasattr(item, '__dict__'))
+        with self.assertRaises(AttributeError):
+            item.priority = 1
+
+        # Create items with the row factories of a cursor
+        connection = sqlite3.connect(':memory:')
+        try:
+            cursor = connection.cursor()
+            cursor.row_factory = todo_app.Item.from_row
+            item = cursor.execute("SELECT 1, 'First item', NULL, 1").fetchone()
+            cursor.row_factory = todo_app.Item.row_factory(
+                ('uid', 'completed')
+            )
+            partial_item = cursor.execute('SELECT 2, 0').fetchone()
+        finally:
+            connection.close()
+        self.assertIsInstance(item, todo_app.Item)
+        self.assertEqual(
+            (item.uid, item.name, item.description, item.completed),
+            (1, 'First item', None, True)
+        )
+        self.assertEqual(
+            (partial_item.uid, partial_item.name, partial_item.completed),
+            (2, None, False)
+        )
+
+    def test_items_single_statement_writes(self):
+        """
+        Unit test for updating and deleting an item without fetching it
+        first.
+            - Create an item
+            - Update the item with a PUT request, a PATCH request, and a
+              PATCH request with no attributes while fetching items
+              fails, and make sure the updated item is in each payload
+            - Delete the item while fetching items fails, and make sure
+              it is deleted
+            - Update and delete the deleted item and make sure the
+              requests are rejected
+        """
+        # Create an item
+        response = self.app.post('/items', json={
+            'name': 'Original item',
+            'description': 'Original description'
+        })
+        self.assertEqual(response.status_code, 200)
+        uid = response.json['uid']
+
+        # Update the item while fetching items fails
+        expected = {
+            'uid': uid,
+            'name': 'Replaced item',
+            'description': 'Original description',
+            'completed': True
+        }
+        fetch = patch.object(
+            todo_app.Item,
+            'fetch',
+            side_effect=AssertionError('The item was fetched')
+        )
+        with fetch:
+            response = self.app.put(f'/items/{uid}', json={
+                'name': 'Replaced item',
+                'completed': True
+            })
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(DeepDiff(expected, response.json), {})
+
+            response = self.app.patch(
+                f'/items/{uid}',
+                json={'description': None}
+            )
+            expected['description'] = None
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(DeepDiff(expected, response.json), {})
+
+            response = self.app.patch(f'/items/{uid}', json={})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(DeepDiff(expected, response.json), {})
+
+            # Delete the item while fetching items fails
+            response = self.app.delete(f'/items/{uid}')
+            self.assertEqual(response.status_code, 200)
+
+            # Update and delete the deleted item
+            response = self.app.put(f'/items/{uid}', json={'name': 'Item'})
+            self.assertEqual(response.status_code, 400)
+            response = self.app.patch(f'/items/{uid}', json={})
+            self.assertEqual(response.status_code, 400)
+            response = self.app.delete(f'/items/{uid}')
+            self.assertEqual(response.status_code, 400)
+
+        response = self.app.get(f'/items/{uid}')
+        self.assertEqual(response.status_code, 404)
+
+    def test_items_multi_get(self):
+        """
+        Unit test for fetching a collection of items by their unique
+        identifiers.
+            - Create items
+            - Fetch the items, a missing item, and a repeated item with
+              a GET request, and make sure the items are in the order
+              they were requested and the missing item is reported
+            - Fetch the items with a POST request and make sure the
+              payload is the same
+            - Fetch the items again without a connection to the
+              database, and in chunks
+            - Fetch items with invalid unique identifiers and make sure
+              the requests are rejected
+        """
+        # Create items
+        uids = []
+        for index in range(3):
+            response = self.app.post('/items', json={
+                'name': f'Item {index}'
+            })
+            self.assertEqual(response.status_code, 200)
+            uids.append((response.json)['uid'])
+        missing = uids[-1] + 1
+
+        # Fetch the items, a missing item, and a repeated item
+        requested = [uids[2], missing, uids[0], uids[2], uids[1]]
+        expected = {
+            'items': [
+                {
+                    'uid': uid,
+                    'name': f'Item {uids.index(uid)}',
+                    'description': None,
+                    'completed': False
+                }
+                for uid in (uids[2], uids[0], uids[1])
+            ],
+            'not_found': [missing]
+        }
+        query = ','.join(str(uid) for uid in requested)
+        response = self.app.get(f'/items?uids={query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(DeepDiff(expected, response.json), {})
+
+        # Fetch the items with a POST request
+        response = self.app.post(
+            '/items/lookup',
+            json={'uids': requested}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(DeepDiff(expected, response.json), {})
+
+        # Fetch the items again without a connection to the database
+        connection = patch.object(
+            todo_app.pool,
+            'connection',
+            side_effect=AssertionError('The database was queried')
+        )
+        with connection:
+            response = self.app.get(f'/items?uids={query}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                DeepDiff(expected, response.json),
+                {}
+            )
+
+        # Fetch the items in chunks of two unique identifiers
+        todo_app.item_cache.clear()
+        with patch.object(todo_app, 'in_chunk_size', 2):
+            response = self.app.get(f'/items?uids={query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(DeepDiff(expected, response.json), {})
+
+        # Fetch items with invalid unique identifiers
+        for query in ('1,a', '1,,2', ''):
+            response = self.app.get(f'/items?uids={query}')
+            self.assertEqual(response.status_code, 400)
+        for payload in ({}, {'uids': '1,2'}, {'uids': [1, '2']},
+                        {'uids': [True]}):
+            response = self.app.post('/items/lookup', json=payload)
+            self.assertEqual(response.status_code, 400)
+
+    def test_group_commit(self):
+        """
+        Unit test for committing the single item writes in groups.
+            - Queue writes, including a failing write, and make sure
+              they are committed in one group apart from the failing
+              write
+            - Queue more writes than fit in a group and make sure they
+              are committed in more groups
+            - Create, update, and delete an item through the write
+              queue of the application
+            - Create an item with group commit disabled and make sure it
+              is committed by the calling thread
+        """
+
+        def insert(cursor, name):
+            cursor.execute('INSERT INTO item (name) VALUES (?)', (name,))
+            return cursor.lastrowid
+
+        def fail(cursor):
+            cursor.execute("INSERT INTO item (name) VALUES ('Failed item')")
+            raise LookupError('Item not found')
+
+        # Queue writes, including a failing write. The writer thread
+        # waits for the writes queued before the delay passes.
+        write_queue = todo_app.WriteQueue(todo_app.pool, delay=0.2)
+        try:
+            futures = [
+                write_queue.submit(insert, 'Grouped item 1'),
+                write_queue.submit(fail),
+                write_queue.submit(insert, 'Grouped item 2')
+            ]
+            first_uid = futures[0].result()
+            with self.assertRaises(LookupError):
+                futures[1].result()
+            second_uid = futures[2].result()
+            self.assertEqual(write_queue.stats(), {
+                'groups': 1,
+                'writes': 3,
+                'queued': 0
+            })
+
+            # Queue more writes than fit in a group
+            write_queue.max_size = 2
+            futures = [
+                write_queue.submit(insert, f'Item {index}')
+                for index in range(3)
+            ]
+            self.assertEqual(len({future.result() for future in futures}), 3)
+            self.assertEqual(write_queue.groups, 3)
+        finally:
+            write_queue.close()
+
+        connection = sqlite3.connect(todo_app.db_path)
+        try:
+            rows = connection.execute(
+                'SELECT uid, name FROM item WHERE uid IN (?, ?) '
+                "OR name = 'Failed item' ORDER BY uid",
+                (first_uid, second_uid)
+            ).fetchall()
+        finally:
+            connection.close()
+        self.assertEqual(rows, [
+            (first_uid, 'Grouped item 1'),
+            (second_uid, 'Grouped item 2')
+        ])
+
+        # Create, update, and delete an item through the write queue of
+        # the application
+        writes = todo_app.write_queue.writes
+        response = self.app.post('/items', json={'name': 'Item'})
+        self.assertEqual(response.status_code, 200)
+        uid = (response.json)['uid']
+        response = self.app.patch(
+            f'/items/{uid}',
+            json={'completed': True}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue((response.json)['completed'])
+        response = self.app.delete(f'/items/{uid}')
+        self.assertEqual(response.status_code, 200)
+        response = self.app.delete(f'/items/{uid}')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(todo_app.write_queue.writes, writes + 4)
+
+        # Create an item with group commit disabled
+        with patch.object(todo_app, 'group_commit', False):
+            future = todo_app.write_queue.submit(insert, 'Ungrouped item')
+            self.assertTrue(future.done())
+            self.assertIsInstance(future.result(), int)
+
+    def test_group_commit_while_streaming(self):
+        """
+        Unit test for writing items while streams hold the connections of
+        the pool.
+            - Create an item
+            - Start as many streams of the items as there are connections
+              in the pool, and make sure no connection is left
+            - Create, update, and delete an item and make sure the writes
+              do not wait for the connections held by the streams
+        """
+        # Create an item
+        response = self.app.post('/items', json={'name': 'Streamed item'})
+        self.assertEqual(response.status_code, 200)
+
+        # Start as many streams as there are connections in the pool.
+        # Each stream holds its connection until it is closed.
+        streams = [todo_app.Item.iterate() for _ in range(todo_app.pool.size)]
+        try:
+            for stream in streams:
+                next(stream)
+            with patch.object(todo_app.pool, 'timeout', 0.1):
+                with self.assertRaises(TimeoutError):
+                    todo_app.pool.checkout()
+
+                # Create, update, and delete an item, failing fast if a
+                # write waits for a connection of the pool
+                response = self.app.post('/items', json={'name': 'Item'})
+                self.assertEqual(response.status_code, 200)
+                uid = response.json['uid']
+                response = self.app.patch(
+                    f'/items/{uid}',
+                    json={'completed': True}
+                )
+                self.assertEqual(response.status_code, 200)
+                response = self.app.delete(f'/items/{uid}')
+                self.assertEqual(response.status_code, 200)
+        finally:
+            for stream in streams:
+                stream.close()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,1011 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import unittest
+from aiohttp import ClientPayloadError
+from aiohttp.test_utils import AioHTTPTestCase
+from deepdiff import DeepDiff
+from unittest.mock import patch
+import tutorial_09_using_asyncio as todo_app
+
+
+class TestToDoApp(AioHTTPTestCase):
+    """
+    Unit tests for the To-Do API.
+
+    Before each unit test, keep track of the existing rows in the
+    database. After each unit test, any newly added rows are deleted.
+
+    Each unit test is a coroutine which runs on a new event loop, and
+    invokes HTTP methods for the To-Do API with the `client` attribute.
+
+    Class Attributes:
+        existing_uids (set): Collection of unique identifiers of the
+            existing rows in the `item` table in the database
+    """
+
+    existing_uids = set()
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Before any unit tests, make sure the tables are created in the
+        database.
+        """
+        todo_app.create_tables()
+
+    async def get_application(self):
+        """
+        Create the aiohttp application which is served for each unit
+        test.
+
+        Returns:
+            web.Application: aiohttp application object
+        """
+        return todo_app.create_app()
+
+    def setUp(self):
+        """
+        Before each unit test, keep track of the existing rows in the
+        `item` table in the database.
+        """
+        # Establish a connection to the database
+        connection = sqlite3.connect(todo_app.db_path)
+        cursor = connection.cursor()
+
+        # Get all the current records from the `item` table in the
+        # database and store them to the `existing_uids` set
+        rows = cursor.execute('SELECT uid FROM item').fetchall()
+        self.existing_uids.update([row[0] for row in rows])
+
+        # Close the database connection
+        cursor.close()
+        connection.close()
+
+    def tearDown(self):
+        """
+        After each unit test, delete any newly created rows in the
+        `item` table in the database.
+        """
+        # Establish a connection to the database
+        connection = sqlite3.connect(todo_app.db_path)
+        cursor = connection.cursor()
+
+        # Get all the current records from the `item` table in the
+        # database. If any of them are not in the `existing_uids` set,
+        # then delete them from the database.
+        rows = cursor.execute('SELECT uid FROM item').fetchall()
+        for row in rows:
+            if row[0] not in self.existing_uids:
+                cursor.execute('DELETE FROM item WHERE uid = ?', (row[0],))
+
+        connection.commit()
+
+        # Close the database connection
+        cursor.close()
+        connection.close()
+
+        self.existing_uids.clear()
+
+        # The rows were deleted without going through the application,
+        # so clear the cache of items
+        todo_app.item_cache.clear()
+
+    async def test_items_crud_actions(self):
+        """
+        Unit test for CRUD actions for the `item` resource.
+            - Create the item
+            - Fetch the item by its unique identifier
+            - Fetch all items and make sure the item is in the returned
+              list
+            - Update the item
+            - Partially update the item
+            - Fetch the item by its unique identifier to check the update
+            - Delete the item
+            - Fetch the item by its unique identifier to check the delete
+        """
+        # Create the item
+        item_data = {
+            'name': 'Create API',
+            'description': 'Create a To-Do API'
+        }
+        response = await self.client.post('/items', json=item_data)
+        expected = {
+            'name': 'Create API',
+            'description': 'Create a To-Do API',
+            'completed': False
+        }
+        self.assertEqual(response.status, 200)
+        data = await response.json()
+        self.assertIsInstance(data, dict)
+        item_uid = data.pop('uid')
+        self.assertTrue(item_uid)
+        self.assertFalse(DeepDiff(data, expected, ignore_order=True))
+
+        # Fetch the item by its unique identifier
+        response = await self.client.get(f'/items/{item_uid}')
+        expected = {
+            'uid': item_uid,
+            'name': 'Create API',
+            'description': 'Create a To-Do API',
+            'completed': False
+        }
+        self.assertEqual(response.status, 200)
+        data = await response.json()
+        self.assertFalse(DeepDiff(data, expected, ignore_order=True))
+
+        # Fetch all items, starting before the created item so the
+        # existing rows do not push it off the first page - make
+        # sure the item is in the returned list
+        response = await self.client.get('/items', params={
+            'cursor': todo_app.encode_cursor(item_uid - 1)
+        })
+        self.assertEqual(response.status, 200)
+        data = await response.json()
+        self.assertIsInstance(data, list)
+        self.assertIn(expected, data)
+
+        # Update the item
+        update_data = {
+            'name': 'Update API',
+            'description': 'Update the To-Do API'
+        }
+        response = await self.client.put(
+            f'/items/{item_uid}',
+            json=update_data
+        )
+        expected = {
+            'uid': item_uid,
+            'name': 'Update API',
+            'description': 'Update the To-Do API',
+            'completed': False
+        }
+        self.assertEqual(response.status, 200)
+        data = await response.json()
+        self.assertFalse(DeepDiff(data, expected, ignore_order=True))
+
+        # Partially update the item
+        response = await self.client.patch(
+            f'/items/{item_uid}',
+            json={'completed': True}
+        )
+        expected['completed'] = True
+        self.assertEqual(response.status, 200)
+        data = await response.json()
+        self.assertFalse(DeepDiff(data, expected, ignore_order=True))
+
+        # Fetch the item by its unique identifier to check the update
+        response = await self.client.get(f'/items/{item_uid}')
+        self.assertEqual(response.status, 200)
+        data = await response.json()
+        self.assertFalse(DeepDiff(data, expected, ignore_order=True))
+
+        # Delete the item
+        response = await self.client.delete(f'/items/{item_uid}')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(await response.read(), b'')
+
+        # Fetch the item by its unique identifier to check the delete
+        response = await self.client.get(f'/items/{item_uid}')
+        self.assertEqual(response.status, 404)
+
+    async def test_items_pagination(self):
+        """
+        Unit test for paginating the collection of items.
+            - Create three items
+            - Fetch all items two at a time by following the cursor of
+              each page and make sure the items are in order of their
+              unique identifiers
+            - Fetch items with a limit above the maximum page size and
+              make sure the page is capped
+            - Fetch items with an invalid limit or cursor and make sure
+              the request is rejected
+        """
+        # Create three items
+        response = await self.client.post('/items/batch', json=[
+            {'name': 'First item'},
+            {'name': 'Second item'},
+            {'name': 'Third item'}
+        ])
+        self.assertEqual(response.status, 200)
+        created_uids = await response.json()
+
+        # Fetch all items two at a time by following the cursors
+        fetched_uids = []
+        params = {'limit': 2}
+        while True:
+            response = await self.client.get('/items', params=params)
+            self.assertEqual(response.status, 200)
+            data = await response.json()
+            self.assertLessEqual(len(data), 2)
+            fetched_uids.extend([item['uid'] for item in data])
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor is None:
+                break
+            params['cursor'] = cursor
+        self.assertEqual(fetched_uids, sorted(fetched_uids))
+        for uid in created_uids:
+            self.assertIn(uid, fetched_uids)
+
+        # Fetch items with a limit above the maximum page size
+        with patch.object(todo_app, 'max_page_size', 1):
+            response = await self.client.get('/items', params={'limit': 5})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(len(await response.json()), 1)
+        self.assertIn('X-Next-Cursor', response.headers)
+
+        # Fetch items with an invalid limit or cursor
+        for params in ({'limit': 0}, {'limit': 'all'}, {'cursor': '*'}):
+            response = await self.client.get('/items', params=params)
+            self.assertEqual(response.status, 400)
+
+    async def test_items_streaming(self):
+        """
+        Unit test for streaming the collection of items.
+            - Create three items
+            - Stream all items as a JSON array a page of two items at a
+              time and make sure the items are in the array
+            - Stream all items as newline delimited JSON and make sure
+              the items are in the lines, and that the item cache is not
+              used
+            - Fail to read the second page of a stream and make sure the
+              connection is aborted
+            - Stream items with an invalid format and make sure the
+              request is rejected
+        """
+        # Create three items
+        response = await self.client.post('/items/batch', json=[
+            {'name': 'First item'},
+            {'name': 'Second item'},
+            {'name': 'Third item'}
+        ])
+        self.assertEqual(response.status, 200)
+        created_uids = await response.json()
+
+        # Stream all items as a JSON array, two items at a time
+        with patch.object(todo_app, 'stream_batch_size', 2):
+            response = await self.client.get(
+                '/items',
+                params={'stream': 'json'}
+            )
+            self.assertEqual(response.status, 200)
+            data = await response.json()
+        self.assertIsInstance(data, list)
+        fetched_uids = [item['uid'] for item in data]
+        self.assertEqual(fetched_uids, sorted(fetched_uids))
+        for uid in created_uids:
+            self.assertIn(uid, fetched_uids)
+
+        # Stream all items as newline delimited JSON
+        stats = todo_app.item_cache.stats()
+        response = await self.client.get('/items', params={'stream': 'ndjson'})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.content_type, 'application/x-ndjson')
+        lines = (await response.text()).splitlines()
+        self.assertEqual(
+            [json.loads(line)['uid'] for line in lines],
+            fetched_uids
+        )
+        self.assertEqual(todo_app.item_cache.stats(), stats)
+
+        # Fail to read the second page of a stream
+        fetch_page = todo_app.Item.fetch_page
+        pages = []
+
+        def fail_page(*args, **kwargs):
+            if pages:
+                raise sqlite3.OperationalError('disk I/O error')
+            pages.append(args)
+            return fetch_page(*args, **kwargs)
+
+        with patch.object(todo_app, 'stream_batch_size', 1), \
+                patch.object(todo_app.Item, 'fetch_page',
+                             side_effect=fail_page):
+            response = await self.client.get(
+                '/items',
+                params={'stream': 'json'}
+            )
+            self.assertEqual(response.status, 200)
+            with self.assertRaises(ClientPayloadError):
+                await asyncio.wait_for(response.read(), timeout=5.0)
+
+        # Stream items with an invalid format
+        response = await self.client.get('/items', params={'stream': 'xml'})
+        self.assertEqual(response.status, 400)
+
+    async def test_conditional_requests(self):
+        """
+        Unit test for conditional requests with entity tags.
+            - Create an item
+            - Fetch the item and fetch it again with its entity tag, and
+              with its weak entity tag, and make sure it is not modified
+            - Fetch all items and fetch them again with the entity tag
+              of the collection and make sure they are not modified
+            - Update the item and make sure the entity tags of the item
+              and of the collection no longer match
+            - Fetch the item, update it from another connection as
+              another process would, and make sure the fetched item and
+              its entity tag are both of the new version
+            - Remove the version of the item, create the tables again,
+              and make sure the item has an entity tag again
+        """
+        # Create an item
+        response = await self.client.post('/items', json={'name': 'API'})
+        self.assertEqual(response.status, 200)
+        item_uid = (await response.json())['uid']
+
+        # Fetch the item and fetch it again with its entity tag
+        response = await self.client.get(f'/items/{item_uid}')
+        self.assertEqual(response.status, 200)
+        item_etag = response.headers['ETag']
+        response = await self.client.get(
+            f'/items/{item_uid}',
+            headers={'If-None-Match': item_etag}
+        )
+        self.assertEqual(response.status, 304)
+        response = await self.client.get(
+            f'/items/{item_uid}',
+            headers={'If-None-Match': f'W/{item_etag}'}
+        )
+        self.assertEqual(response.status, 304)
+
+        # Fetch all items and fetch them again with the entity tag of
+        # the collection
+        response = await self.client.get('/items')
+        self.assertEqual(response.status, 200)
+        collection_etag = response.headers['ETag']
+        response = await self.client.get(
+            '/items',
+            headers={'If-None-Match': collection_etag}
+        )
+        self.assertEqual(response.status, 304)
+
+        # Update the item - make sure the entity tags no longer match
+        response = await self.client.patch(
+            f'/items/{item_uid}',
+            json={'completed': True}
+        )
+        self.assertEqual(response.status, 200)
+        response = await self.client.get(
+            f'/items/{item_uid}',
+            headers={'If-None-Match': item_etag}
+        )
+        self.assertEqual(response.status, 200)
+        self.assertNotEqual(response.headers['ETag'], item_etag)
+        response = await self.client.get(
+            '/items',
+            headers={'If-None-Match': collection_etag}
+        )
+        self.assertEqual(response.status, 200)
+
+        # Fetch the item, and update it from another connection
+        await self.client.get(f'/items/{item_uid}')
+        connection = sqlite3.connect(todo_app.db_path)
+        connection.execute(
+            "UPDATE item SET name = 'Renamed API' WHERE uid = ?",
+            (item_uid,)
+        )
+        connection.commit()
+        version = connection.execute(
+            'SELECT version FROM item_version WHERE uid = ?',
+            (item_uid,)
+        ).fetchone()[0]
+        connection.close()
+        response = await self.client.get(f'/items/{item_uid}')
+        self.assertEqual(response.status, 200)
+        self.assertEqual((await response.json())['name'], 'Renamed API')
+        etag = todo_app.make_etag(f'item-{item_uid}', version)
+        self.assertEqual(response.headers['ETag'], todo_app.quote_etag(etag))
+
+        # Remove the version of the item and create the tables again
+        connection = sqlite3.connect(todo_app.db_path)
+        connection.execute(
+            'DELETE FROM item_version WHERE uid = ?',
+            (item_uid,)
+        )
+        connection.commit()
+        connection.close()
+        todo_app.create_tables()
+        response = await self.client.get(f'/items/{item_uid}')
+        self.assertEqual(response.status, 200)
+        item_etag = response.headers['ETag']
+        response = await self.client.get(
+            f'/items/{item_uid}',
+            headers={'If-None-Match': item_etag}
+        )
+        self.assertEqual(response.status, 304)
+
+    async def test_items_batch_actions(self):
+        """
+        Unit test for creating, partially updating, and deleting a
+        collection of items.
+            - Create three items, two of them completed
+            - Partially update an item and an item which does not exist
+              and make sure the updated and missing items are reported
+            - Delete the completed items and make sure they are deleted
+            - Create a batch which is not a list and make sure it is
+              rejected
+        """
+        # Create three items, two of them completed
+        response = await self.client.post('/items/batch', json=[
+            {'name': 'First item', 'completed': True},
+            {'name': 'Second item', 'completed': True},
+            {'name': 'Third item'}
+        ])
+        self.assertEqual(response.status, 200)
+        uids = await response.json()
+        missing_uid = max(uids) + 1000
+
+        # Partially update an item and a missing item
+        response = await self.client.patch('/items', json=[
+            {'uid': uids[2], 'name': 'Renamed item'},
+            {'uid': missing_uid, 'completed': True}
+        ])
+        self.assertEqual(response.status, 200)
+        expected = {'updated': [uids[2]], 'not_found': [missing_uid]}
+        self.assertFalse(DeepDiff(await response.json(), expected))
+
+        # Delete the completed items
+        response = await self.client.delete(
+            '/items',
+            json={'completed': True}
+        )
+        self.assertEqual(response.status, 200)
+        self.assertEqual(await response.json(), {'deleted': 2})
+        for uid in uids[:2]:
+            response = await self.client.get(f'/items/{uid}')
+            self.assertEqual(response.status, 404)
+        response = await self.client.get(f'/items/{uids[2]}')
+        self.assertEqual((await response.json())['name'], 'Renamed item')
+
+        # Create a batch which is not a list
+        response = await self.client.post('/items/batch', json={})
+        self.assertEqual(response.status, 400)
+
+    async def test_executors(self):
+        """
+        Unit test for running the database work off the event loop.
+            - Run a write and make sure it runs on the writer thread
+            - Run a read and make sure it runs on a reader thread
+            - Create items with concurrent requests and make sure they
+              are all created
+        """
+        # Run a write - make sure it runs on the writer thread
+        thread = await todo_app.run_write(threading.current_thread)
+        self.assertTrue(thread.name.startswith('writer'))
+        self.assertIsNot(thread, threading.current_thread())
+
+        # Run a read - make sure it runs on a reader thread
+        thread = await todo_app.run_read(threading.current_thread)
+        self.assertTrue(thread.name.startswith('reader'))
+
+        # Create items with concurrent requests
+        responses = await asyncio.gather(*[
+            self.client.post('/items', json={'name': f'Item {index}'})
+            for index in range(20)
+        ])
+        self.assertEqual(
+            [response.status for response in responses],
+            [200] * 20
+        )
+        uids = [(await response.json())['uid'] for response in responses]
+        self.assertEqual(len(set(uids)), 20)
+
+    async def test_items_completed_filter(self):
+        """
+        Unit test for filtering the collection of items by status.
+            - Create a completed item and an item which is not completed
+            - Fetch the items of each status and make sure only the item
+              of that status is fetched
+            - Stream the items which are not completed and make sure the
+              completed item is not streamed
+            - Fetch items with an invalid status and make sure the
+              request is rejected
+        """
+        # Create a completed item and an item which is not completed
+        response = await self.client.post('/items/batch', json=[
+            {'name': 'Completed item', 'completed': True},
+            {'name': 'Open item'}
+        ])
+        self.assertEqual(response.status, 200)
+        completed_uid, open_uid = await response.json()
+
+        # Fetch the items of each status, starting before the created
+        # items
+        cursor = todo_app.encode_cursor(completed_uid - 1)
+        for completed, uid in (('true', completed_uid), ('false', open_uid)):
+            response = await self.client.get('/items', params={
+                'completed': completed,
+                'cursor': cursor
+            })
+            self.assertEqual(response.status, 200)
+            data = await response.json()
+            self.assertEqual([item['uid'] for item in data], [uid])
+            self.assertEqual(data[0]['completed'], completed == 'true')
+
+        # Stream the items which are not completed
+        response = await self.client.get('/items', params={
+            'completed': 'false',
+            'stream': 'ndjson'
+        })
+        self.assertEqual(response.status, 200)
+        lines = (await response.text()).splitlines()
+        uids = [json.loads(line)['uid'] for line in lines]
+        self.assertIn(open_uid, uids)
+        self.assertNotIn(completed_uid, uids)
+
+        # Fetch items with an invalid status
+        response = await self.client.get('/items', params={'completed': 'yes'})
+        self.assertEqual(response.status, 400)
+
+    async def test_items_search(self):
+        """
+        Unit test for the full-text search of items.
+            - Create items which mention a word in their name, in their
+              description, or only as a prefix
+            - Search the word and make sure the match in the name ranks
+              above the match in the description
+            - Search the word as a prefix a page of one item at a time by
+              following the cursors, and make sure all the items are
+              found
+            - Rename and delete items and make sure the search results
+              follow the changes
+            - Search with invalid queries and make sure the requests are
+              rejected
+        """
+        # Create items which mention the word
+        response = await self.client.post('/items/batch', json=[
+            {'name': 'Photograph animals',
+             'description': 'Find a quokka at the zoo'},
+            {'name': 'Feed the quokka', 'description': 'Leaves and grass'},
+            {'name': 'Quokkas of Rottnest Island'}
+        ])
+        self.assertEqual(response.status, 200)
+        uids = await response.json()
+        description_uid, name_uid, prefix_uid = uids
+
+        # Search the word
+        response = await self.client.get(
+            '/items/search',
+            params={'q': 'quokka'}
+        )
+        self.assertEqual(response.status, 200)
+        self.assertEqual(
+            [item['uid'] for item in await response.json()],
+            [name_uid, description_uid]
+        )
+
+        # Search the word as a prefix, one item at a time
+        fetched_uids = []
+        params = {'q': 'quokka*', 'limit': 1}
+        while True:
+            response = await self.client.get('/items/search', params=params)
+            self.assertEqual(response.status, 200)
+            data = await response.json()
+            self.assertLessEqual(len(data), 1)
+            fetched_uids.extend([item['uid'] for item in data])
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor is None:
+                break
+            params['cursor'] = cursor
+        self.assertEqual(sorted(fetched_uids), uids)
+
+        # Rename and delete items
+        response = await self.client.patch(
+            f'/items/{name_uid}',
+            json={'name': 'Feed the cat'}
+        )
+        self.assertEqual(response.status, 200)
+        response = await self.client.delete(f'/items/{description_uid}')
+        self.assertEqual(response.status, 200)
+        response = await self.client.get(
+            '/items/search',
+            params={'q': 'quokka*'}
+        )
+        self.assertEqual(response.status, 200)
+        self.assertEqual(
+            [item['uid'] for item in await response.json()],
+            [prefix_uid]
+        )
+
+        # Search with invalid queries
+        for params in ({}, {'q': ' '}, {'q': '"*'}):
+            response = await self.client.get('/items/search', params=params)
+            self.assertEqual(response.status, 400)
+
+    async def test_items_fields(self):
+        """
+        Unit test for selecting the fields of the items in a page.
+            - Create two items
+            - Fetch the items with some of their fields and make sure
+              only those fields are in the payload
+            - Fetch the items without their unique identifiers a page of
+              one item at a time by following the cursors, and make sure
+              both items are fetched
+            - Fetch items with invalid fields and make sure the request
+              is rejected
+        """
+        # Create two items
+        response = await self.client.post('/items/batch', json=[
+            {'name': name, 'description': 'Long description of the item',
+             'completed': True}
+            for name in ('First item', 'Second item')
+        ])
+        self.assertEqual(response.status, 200)
+        uids = await response.json()
+        cursor = todo_app.encode_cursor(uids[0] - 1)
+
+        # Fetch the items with some of their fields
+        response = await self.client.get('/items', params={
+            'fields': 'uid,name,completed',
+            'cursor': cursor
+        })
+        self.assertEqual(response.status, 200)
+        expected = [
+            {'uid': uids[0], 'name': 'First item', 'completed': True},
+            {'uid': uids[1], 'name': 'Second item', 'completed': True}
+        ]
+        self.assertEqual(DeepDiff(expected, await response.json()), {})
+
+        # Fetch the names of the items one at a time
+        names = []
+        params = {'fields': 'name', 'limit': 1, 'cursor': cursor}
+        while True:
+            response = await self.client.get('/items', params=params)
+            self.assertEqual(response.status, 200)
+            names.extend(await response.json())
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor is None:
+                break
+            params['cursor'] = cursor
+        self.assertEqual(
+            names,
+            [{'name': 'First item'}, {'name': 'Second item'}]
+        )
+
+        # Fetch items with invalid fields
+        for fields in ('', 'name,secret'):
+            response = await self.client.get(
+                '/items',
+                params={'fields': fields}
+            )
+            self.assertEqual(response.status, 400)
+
+    def test_item_slots(self):
+        """
+        Unit test for the compact representation of items.
+            - Create an item and make sure it has no attribute dictionary
+              and rejects unknown attributes
+            - Create items with the row factories of a cursor, from a row
+              of all the columns and from a row of some of the columns,
+              and make sure their attributes are populated
+        """
+        # Create an item
+        item = todo_app.Item(name='Slotted item')
+        self.assertFalse(hasattr(item, '__dict__'))
+        with self.assertRaises(AttributeError):
+            item.priority = 1
+
+        # Create items with the row factories of a cursor
+        connection = sqlite3.connect(':memory:')
+        try:
+            cursor = connection.cursor()
+            cursor.row_factory = todo_app.Item.from_row
+            item = cursor.execute("SELECT 1, 'First item', NULL, 1").fetchone()
+            cursor.row_factory = todo_app.Item.row_factory(
+                ('uid', 'completed')
+            )
+            partial_item = cursor.execute('SELECT 2, 0').fetchone()
+        finally:
+            connection.close()
+        self.assertIsInstance(item, todo_app.Item)
+        self.assertEqual(
+            (item.uid, item.name, item.description, item.completed),
+            (1, 'First item', None, True)
+        )
+        self.assertEqual(
+            (partial_item.uid, partial_item.name, partial_item.completed),
+            (2, None, False)
+        )
+
+    async def test_items_single_statement_writes(self):
+        """
+        Unit test for updating and deleting an item without fetching it
+        first.
+            - Create an item
+            - Update the item with a PUT request, a PATCH request, and a
+              PATCH request with no attributes while fetching items
+              fails, and make sure the updated item is in each payload
+            - Delete the item while fetching items fails, and make sure
+              it is deleted
+            - Update and delete the deleted item and make sure the
+              requests are rejected
+        """
+        # Create an item
+        response = await self.client.post('/items', json={
+            'name': 'Original item',
+            'description': 'Original description'
+        })
+        self.assertEqual(response.status, 200)
+        uid = (await response.json())['uid']
+
+        # Update the item while fetching items fails
+        expected = {
+            'uid': uid,
+            'name': 'Replaced item',
+            'description': 'Original description',
+            'completed': True
+        }
+        fetch = patch.object(
+            todo_app.Item,
+            'fetch',
+            side_effect=AssertionError('The item was fetched')
+        )
+        with fetch:
+            response = await self.client.put(f'/items/{uid}', json={
+                'name': 'Replaced item',
+                'completed': True
+            })
+            self.assertEqual(response.status, 200)
+            self.assertEqual(DeepDiff(expected, await response.json()), {})
+
+            response = await self.client.patch(
+                f'/items/{uid}',
+                json={'description': None}
+            )
+            expected['description'] = None
+            self.assertEqual(response.status, 200)
+            self.assertEqual(DeepDiff(expected, await response.json()), {})
+
+            response = await self.client.patch(f'/items/{uid}', json={})
+            self.assertEqual(response.status, 200)
+            self.assertEqual(DeepDiff(expected, await response.json()), {})
+
+            # Delete the item while fetching items fails
+            response = await self.client.delete(f'/items/{uid}')
+            self.assertEqual(response.status, 200)
+
+            # Update and delete the deleted item
+            response = await self.client.put(
+                f'/items/{uid}',
+                json={'name': 'Item'}
+            )
+            self.assertEqual(response.status, 404)
+            response = await self.client.patch(f'/items/{uid}', json={})
+            self.assertEqual(response.status, 404)
+            response = await self.client.delete(f'/items/{uid}')
+            self.assertEqual(response.status, 404)
+
+        response = await self.client.get(f'/items/{uid}')
+        self.assertEqual(response.status, 404)
+
+    async def test_items_multi_get(self):
+        """
+        Unit test for fetching a collection of items by their unique
+        identifiers.
+            - Create items
+            - Fetch the items, a missing item, and a repeated item with
+              a GET request, and make sure the items are in the order
+              they were requested and the missing item is reported
+            - Fetch the items with a POST request and make sure the
+              payload is the same
+            - Fetch the items again without a connection to the
+              database, and in chunks
+            - Fetch items with invalid unique identifiers and make sure
+              the requests are rejected
+        """
+        # Create items
+        uids = []
+        for index in range(3):
+            response = await self.client.post('/items', json={
+                'name': f'Item {index}'
+            })
+            self.assertEqual(response.status, 200)
+            uids.append((await response.json())['uid'])
+        missing = uids[-1] + 1
+
+        # Fetch the items, a missing item, and a repeated item
+        requested = [uids[2], missing, uids[0], uids[2], uids[1]]
+        expected = {
+            'items': [
+                {
+                    'uid': uid,
+                    'name': f'Item {uids.index(uid)}',
+                    'description': None,
+                    'completed': False
+                }
+                for uid in (uids[2], uids[0], uids[1])
+            ],
+            'not_found': [missing]
+        }
+        query = ','.join(str(uid) for uid in requested)
+        response = await self.client.get(f'/items?uids={query}')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(DeepDiff(expected, await response.json()), {})
+
+        # Fetch the items with a POST request
+        response = await self.client.post(
+            '/items/lookup',
+            json={'uids': requested}
+        )
+        self.assertEqual(response.status, 200)
+        self.assertEqual(DeepDiff(expected, await response.json()), {})
+
+        # Fetch the items again without a connection to the database
+        connection = patch.object(
+            todo_app.pool,
+            'connection',
+            side_effect=AssertionError('The database was queried')
+        )
+        with connection:
+            response = await self.client.get(f'/items?uids={query}')
+            self.assertEqual(response.status, 200)
+            self.assertEqual(
+                DeepDiff(expected, await response.json()),
+                {}
+            )
+
+        # Fetch the items in chunks of two unique identifiers
+        todo_app.item_cache.clear()
+        with patch.object(todo_app, 'in_chunk_size', 2):
+            response = await self.client.get(f'/items?uids={query}')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(DeepDiff(expected, await response.json()), {})
+
+        # Fetch items with invalid unique identifiers
+        for query in ('1,a', '1,,2', ''):
+            response = await self.client.get(f'/items?uids={query}')
+            self.assertEqual(response.status, 400)
+        for payload in ({}, {'uids': '1,2'}, {'uids': [1, '2']},
+                        {'uids': [True]}):
+            response = await self.client.post('/items/lookup', json=payload)
+            self.assertEqual(response.status, 400)
+
+    async def test_group_commit(self):
+        """
+        Unit test for committing the single item writes in groups.
+            - Queue writes, including a failing write, and make sure
+              they are committed in one group apart from the failing
+              write
+            - Queue more writes than fit in a group and make sure they
+              are committed in more groups
+            - Create, update, and delete an item through the write
+              queue of the application
+            - Create an item with group commit disabled and make sure it
+              is committed by the calling thread
+        """
+
+        def insert(cursor, name):
+            cursor.execute('INSERT INTO item (name) VALUES (?)', (name,))
+            return cursor.lastrowid
+
+        def fail(cursor):
+            cursor.execute("INSERT INTO item (name) VALUES ('Failed item')")
+            raise LookupError('Item not found')
+
+        # Queue writes, including a failing write. The writer thread
+        # waits for the writes queued before the delay passes.
+        write_queue = todo_app.WriteQueue(todo_app.writer_pool, delay=0.2)
+        try:
+            futures = [
+                write_queue.submit(insert, 'Grouped item 1'),
+                write_queue.submit(fail),
+                write_queue.submit(insert, 'Grouped item 2')
+            ]
+            first_uid = futures[0].result()
+            with self.assertRaises(LookupError):
+                futures[1].result()
+            second_uid = futures[2].result()
+            self.assertEqual(write_queue.stats(), {
+                'groups': 1,
+                'writes': 3,
+                'queued': 0
+            })
+
+            # Queue more writes than fit in a group
+            write_queue.max_size = 2
+            futures = [
+                write_queue.submit(insert, f'Item {index}')
+                for index in range(3)
+            ]
+            self.assertEqual(len({future.result() for future in futures}), 3)
+            self.assertEqual(write_queue.groups, 3)
+        finally:
+            write_queue.close()
+
+        connection = sqlite3.connect(todo_app.db_path)
+        try:
+            rows = connection.execute(
+                'SELECT uid, name FROM item WHERE uid IN (?, ?) '
+                "OR name = 'Failed item' ORDER BY uid",
+                (first_uid, second_uid)
+            ).fetchall()
+        finally:
+            connection.close()
+        self.assertEqual(rows, [
+            (first_uid, 'Grouped item 1'),
+            (second_uid, 'Grouped item 2')
+        ])
+
+        # Create, update, and delete an item through the write queue of
+        # the application
+        writes = todo_app.write_queue.writes
+        response = await self.client.post('/items', json={'name': 'Item'})
+        self.assertEqual(response.status, 200)
+        uid = (await response.json())['uid']
+        response = await self.client.patch(
+            f'/items/{uid}',
+            json={'completed': True}
+        )
+        self.assertEqual(response.status, 200)
+        self.assertTrue((await response.json())['completed'])
+        response = await self.client.delete(f'/items/{uid}')
+        self.assertEqual(response.status, 200)
+        response = await self.client.delete(f'/items/{uid}')
+        self.assertEqual(response.status, 404)
+        self.assertEqual(todo_app.write_queue.writes, writes + 4)
+
+        # Create an item with group commit disabled
+        with patch.object(todo_app, 'group_commit', False):
+            future = todo_app.write_queue.submit(insert, 'Ungrouped item')
+            self.assertTrue(future.done())
+            self.assertIsInstance(future.result(), int)
+
+    async def test_group_commit_during_batch_delete(self):
+        """
+        Unit test for the single item writes queued while a collection of
+        items is deleted in chunks.
+            - Create a collection of items
+            - Delete the items in chunks, and create an item once the
+              first chunk is deleted and before the next chunk, and make
+              sure the item is created without waiting for the delete
+            - Make sure all the items are deleted
+        """
+        # Create a collection of items
+        response = await self.client.post('/items/batch', json=[
+            {'name': f'Deleted item {index}'} for index in range(50)
+        ])
+        self.assertEqual(response.status, 200)
+        uids = await response.json()
+
+        # Hold the delete after its first chunk until an item is created
+        chunk_deleted = threading.Event()
+        item_created = threading.Event()
+        invalidate = todo_app.item_cache.invalidate
+
+        def invalidate_chunk(*chunk):
+            invalidate(*chunk)
+            if set(chunk) <= set(uids):
+                chunk_deleted.set()
+                item_created.wait(timeout=10.0)
+
+        loop = asyncio.get_running_loop()
+        with patch.object(todo_app, 'in_chunk_size', 10), \
+                patch.object(todo_app.item_cache, 'invalidate',
+                             invalidate_chunk):
+            delete = asyncio.ensure_future(
+                self.client.delete('/items', json={'uids': uids})
+            )
+            try:
+                self.assertTrue(await loop.run_in_executor(
+                    None, chunk_deleted.wait, 10.0
+                ))
+
+                # Create an item between the chunks of the delete
+                response = await asyncio.wait_for(
+                    self.client.post('/items', json={'name': 'Item'}),
+                    timeout=2.0
+                )
+                self.assertEqual(response.status, 200)
+            finally:
+                item_created.set()
+            response = await delete
+
+        # Make sure all the items are deleted
+        self.assertEqual(response.status, 200)
+        self.assertEqual(await response.json(), {'deleted': 50})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+    """
+    Unit tests for the benchmark suite.
+    """
+
+    def test_percentiles(self):
+        """
+        Unit test for summarizing latencies.
+            - Get percentiles of a collection of values and make sure the
+              nearest ranks are returned
+            - Get a percentile of no values and make sure it is zero
+            - Summarize latencies and make sure the throughput and the
+              latencies in milliseconds are reported
+        """
+        # Get percentiles of a collection of values
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 0.50), 50)
+        self.assertEqual(benchmark.percentile(values, 0.95), 95)
+        self.assertEqual(benchmark.percentile(values, 0.99), 99)
+        self.assertEqual(benchmark.percentile([7], 0.99), 7)
+
+        # Get a percentile of no values
+        self.assertEqual(benchmark.percentile([], 0.50), 0.0)
+
+        # Summarize latencies
+        summary = benchmark.summarize([0.002, 0.001, 0.003, 0.004], 0.01)
+        self.assertEqual(summary['requests'], 4)
+        self.assertAlmostEqual(summary['throughput'], 400.0)
+        self.assertAlmostEqual(summary['p50_ms'], 2.0)
+        self.assertAlmostEqual(summary['p99_ms'], 4.0)
+
+    def test_run_variant(self):
+        """
+        Unit test for benchmarking a variant.
+            - Run all the scenarios against a variant and make sure each
+              scenario is reported with the peak resident set size
+            - Report the results against themselves and make sure the
+              throughput is unchanged
+        """
+        # Run all the scenarios against a variant
+        name = 'tutorial_04_using_data_access_objects'
+        result = benchmark.run_variant(name, count=5, warmup_count=1)
+        self.assertEqual(tuple(result['scenarios']), benchmark.scenarios)
+        for summary in result['scenarios'].values():
+            self.assertEqual(summary['requests'], 5)
+            self.assertGreater(summary['throughput'], 0)
+            self.assertLessEqual(summary['p50_ms'], summary['p99_ms'])
+        self.assertGreater(result['peak_rss_kib'], 0)
+
+        # Report the results against themselves
+        results = {'variants': {name: result}}
+        table = benchmark.report(results, baseline=results).splitlines()
+        self.assertEqual(len(table), 1 + len(benchmark.scenarios))
+        for line in table[1:]:
+            self.assertTrue(line.endswith('1.00x'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import os
+import sqlite3
+import unittest
+from benchmark import load_variant, percentile, timed, variants
+from generate_data import ItemGenerator, seed
+
+scale_items = 10000  # The number of items seeded before the scale tests
+request_count = 50  # The number of timed requests per measurement
+
+# The p95 latency budgets in milliseconds of each kind of request
+budgets = {
+    'list': 100,
+    'get': 25,
+    'write': 100
+}
+
+
+@unittest.skipUnless(
+    os.environ.get('RUN_SCALE_TESTS'),
+    'set RUN_SCALE_TESTS=1 to check the latency budgets'
+)
+class TestScale(unittest.TestCase):
+    """
+    Scale tests for the To-Do API.
+
+    The latency budgets depend on the speed of the machine, so the scale
+    tests only run when the `RUN_SCALE_TESTS` environment variable is
+    set, and the default test run stays deterministic.
+
+    Before the scale tests, the database is seeded with generated items
+    and the tables of every variant are created. After the scale tests,
+    any newly added rows are deleted.
+
+    Class Attributes:
+        modules (dict): Modules of the variants, keyed by their names
+        first_uid (int): Unique identifier of the first seeded item
+        last_uid (int): Unique identifier of the last seeded item
+    """
+
+    modules = {}
+    first_uid = None
+    last_uid = None
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Before any scale tests, make sure the tables of every variant
+        are created in the database and seed it with generated items.
+        """
+        for name in variants:
+            cls.modules[name] = load_variant(name)
+        db_path = cls.modules[variants[0]].db_path
+        cls.first_uid, cls.last_uid = seed(
+            db_path,
+            scale_items,
+            ItemGenerator(seed=1)
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        After all scale tests, delete the seeded rows and any rows
+        created by the scale tests.
+        """
+        connection = sqlite3.connect(cls.modules[variants[0]].db_path)
+        connection.execute(
+            'DELETE FROM item WHERE uid >= ?',
+            (cls.first_uid,)
+        )
+        connection.commit()
+        connection.close()
+
+        # The rows were deleted without going through the applications,
+        # so clear the caches of items
+        for module in cls.modules.values():
+            item_cache = getattr(module, 'item_cache', None)
+            if item_cache is not None:
+                item_cache.clear()
+
+    def assertWithinBudget(self, kind, latencies):
+        """
+        Assert that the p95 latency of requests is within its budget.
+
+        Args:
+            kind (str): Kind of the requests, which selects the budget
+            latencies (List[float]): Number of seconds of each request
+        """
+        p95 = percentile(sorted(latencies), 0.95) * 1000
+        self.assertLessEqual(
+            p95,
+            budgets[kind],
+            f'{kind} p95 latency of {p95:.1f} ms exceeds its budget'
+        )
+
+    def test_latency_budgets(self):
+        """
+        Scale test for the latency of each variant with the seeded
+        items.
+            - Fetch the first page and a page from the middle of the
+              items and make sure the latency is within budget
+            - Fetch seeded items by their unique identifiers and make
+              sure the latency is within budget
+            - Create, update, and delete items and make sure the latency
+              is within budget
+        """
+        middle_uid = (self.first_uid + self.last_uid) // 2
+        uids = [
+            self.first_uid + index * scale_items // request_count
+            for index in range(request_count)
+        ]
+
+        for name, module in self.modules.items():
+            with self.subTest(variant=name):
+                client = module.app.test_client()
+
+                # Fetch the first page and a page from the middle
+                cursor = module.encode_cursor(middle_uid)
+                latencies, _ = timed(
+                    lambda index=index: client.get(
+                        '/items?limit=100' if index % 2
+                        else f'/items?limit=100&cursor={cursor}'
+                    )
+                    for index in range(request_count)
+                )
+                self.assertWithinBudget('list', latencies)
+
+                # Fetch seeded items by their unique identifiers
+                latencies, _ = timed(
+                    lambda uid=uid: client.get(f'/items/{uid}')
+                    for uid in uids
+                )
+                self.assertWithinBudget('get', latencies)
+
+                # Create, update, and delete items
+                created = []
+
+                def create():
+                    response = client.post('/items', json={'name': 'Scale'})
+                    created.append(response.json['uid'])
+                    return response
+
+                latencies, _ = timed(create for _ in range(request_count // 2))
+                latencies += timed(
+                    lambda uid=uid: client.put(
+                        f'/items/{uid}',
+                        json={'name': 'Scale', 'completed': True}
+                    )
+                    for uid in created
+                )[0]
+                latencies += timed(
+                    lambda uid=uid: client.delete(f'/items/{uid}')
+                    for uid in created
+                )[0]
+                self.assertWithinBudget('write', latencies)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,134 @@
 import sqlite3
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from flask import Flask, request, Response
 from jsonpickle import encode
 
 db_path = 'app.db'  # The path to the SQLite3 database file
+page_size = 100  # The default number of items in a page
+max_page_size = 1000  # The maximum number of items in a page
+# The values of the `completed` query parameter and the status of the items
+# they filter by
+statuses = {'true': True, 'false': False}
+# The fields of an item, in the order of the columns of the `item` table
+item_fields = ('uid', 'name', 'description', 'completed')
 app = Flask(__name__)  # The Flask application object
 
 
+def encode_cursor(uid):
+    """
+    Encode the unique identifier of the last item of a page into an
+    opaque cursor which is used to fetch the next page.
+
+    Args:
+        uid (int): Unique identifier of the last item of a page
+
+    Returns:
+        str: Opaque cursor
+    """
+    return urlsafe_b64encode(str(uid).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode an opaque cursor into the unique identifier of the last item
+    of the previous page.
+
+    Args:
+        cursor (str): Opaque cursor
+
+    Returns:
+        int: Unique identifier of the last item of the previous page
+
+    Raises:
+        ValueError: Invalid cursor
+    """
+    try:
+        # The padding is stripped when encoding, so add it back
+        padding = '=' * (-len(cursor) % 4)
+        return int(urlsafe_b64decode(cursor + padding).decode())
+    except ValueError:
+        raise ValueError('Invalid cursor')
+
+
+def get_page_arguments():
+    """
+    Get the pagination arguments from the query string of the HTTP
+    request.
+
+    Query Parameters:
+        limit (int): Optional. Maximum number of items in the page. The
+            value is capped to `max_page_size`.
+        cursor (str): Optional. Cursor returned with the previous page
+
+    Returns:
+        tuple: The unique identifier after which the page starts and the
+            maximum number of items in the page
+
+    Raises:
+        ValueError: Invalid limit or cursor
+    """
+    try:
+        limit = int(request.args.get('limit', page_size))
+    except ValueError:
+        raise ValueError('Invalid limit')
+    if limit < 1:
+        raise ValueError('Invalid limit')
+
+    cursor = request.args.get('cursor')
+    after = decode_cursor(cursor) if cursor else 0
+
+    return after, min(limit, max_page_size)
+
+
+def get_completed_filter():
+    """
+    Get the status by which to filter the items from the query string
+    of the HTTP request.
+
+    Query Parameters:
+        completed (str): Optional. `true` to only get completed items,
+            or `false` to only get items which are not completed
+
+    Returns:
+        bool: The status of the items to get, or `None` to get all the
+            items
+
+    Raises:
+        ValueError: Invalid status
+    """
+    completed = request.args.get('completed')
+    if completed is None:
+        return None
+    if completed not in statuses:
+        raise ValueError('Invalid completed')
+    return statuses[completed]
+
+
+def get_fields():
+    """
+    Get the fields of the items to respond with from the query string of
+    the HTTP request.
+
+    Query Parameters:
+        fields (str): Optional. Comma separated names of the fields. The
+            default value is all the fields.
+
+    Returns:
+        tuple: Names of the fields, in the order of `item_fields`
+
+    Raises:
+        ValueError: Invalid fields
+    """
+    fields = request.args.get('fields')
+    if fields is None:
+        return item_fields
+
+    names = {name.strip() for name in fields.split(',')}
+    if not names <= set(item_fields):
+        raise ValueError('Invalid fields')
+    return tuple(field for field in item_fields if field in names)
+
+
 @app.route('/hello_world')
 def hello_world():
     """
@@ -20,41 +143,97 @@ def hello_world():
 @app.route('/items', methods=['GET'])
 def fetch_all_items():
     """
-    HTTP GET route to fetch all To-Do items from the database.
+    HTTP GET route to fetch a page of To-Do items from the database.
+
+    Items are ordered by their unique identifier. If there are more
+    items after the page, the `X-Next-Cursor` response header holds the
+    cursor to pass to fetch the next page.
+
+    Query Parameters:
+        limit (int): Optional. Maximum number of items in the page
+        cursor (str): Optional. Cursor returned with the previous page
+        completed (str): Optional. `true` or `false` to only fetch the
+            items with that status
+        fields (str): Optional. Comma separated names of the fields of
+            the items to respond with
 
     Returns:
         Response: HTTP response object with a payload of a JSON encoded
-            string of a collection of all the items retrieved from the
-            database
+            string of a page of the items retrieved from the database.
+            If the query parameters are invalid, a 400 response object
+            is returned with a message to the user.
     """
+    try:
+        # Get the unique identifier after which the page starts, the
+        # maximum number of items in the page, and the status of the
+        # items to fetch if they are filtered by status
+        after, limit = get_page_arguments()
+        completed = get_completed_filter()
+        fields = get_fields()
+    except ValueError as error:
+        # The query parameters are invalid, so create the HTTP
+        # response object using jsonpickle to serialize an error message
+        # for the user
+        message = {'message': str(error)}
+        return Response(
+            response=encode(value=message, unpicklable=False),
+            status=400,
+            mimetype='application/json'
+        )
+
     items = []  # Contains all of the items to return
+    headers = {}  # Contains the headers of the response
 
     # Establish a connection to the database
     connection = sqlite3.Connection = sqlite3.connect(db_path)
     cursor = connection.cursor()
 
-    # Get all of the rows from the `item` table in the database
-    rows = cursor.execute('SELECT uid, name, description, completed FROM item')
-
-    # For each row, create a dictionary which represents the item
-    for row in rows.fetchall():
-        item = {
-            'uid': row[0],
-            'name': row[1],
-            'description': row[2],
-            'completed': True if row[3] else False
-        }
+    # Only filter the rows by status if requested, in which case the
+    # index on the `completed` column is used to find them
+    condition, parameters = 'uid > ?', (after, limit + 1)
+    if completed is not None:
+        condition = 'completed = ? AND uid > ?'
+        parameters = (completed, after, limit + 1)
+
+    # Only select the columns of the requested fields, and the unique
+    # identifier which the cursor of the next page is made of
+    columns = fields if 'uid' in fields else ('uid',) + fields
+
+    # Get the rows of the page from the `item` table in the database,
+    # starting after the cursor. One more row than the limit is fetched
+    # to find out whether there is a next page.
+    rows = cursor.execute(
+        f"""
+        SELECT {', '.join(columns)} FROM item
+        WHERE {condition} ORDER BY uid LIMIT ?
+        """,
+        parameters
+    ).fetchall()
+
+    # For each row, create a dictionary which represents the item with
+    # the requested fields
+    for row in rows[:limit]:
+        item = dict(zip(columns, row))
+        if 'completed' in item:
+            item['completed'] = True if item['completed'] else False
+        if 'uid' not in fields:
+            del item['uid']
         items.append(item)
 
     # Close the database connection
     cursor.close()
     connection.close()
 
+    # If there is a next page, add its cursor to the response headers
+    if len(rows) > limit:
+        headers['X-Next-Cursor'] = encode_cursor(rows[limit - 1][0])
+
     # Create the HTTP response object using jsonpickle to serialize the
     # response data
     return Response(
         response=encode(value=items, unpicklable=False),
         status=200,
+        headers=headers,
         mimetype='application/json'
     )
 
@@ -324,17 +503,28 @@ def partial_update_item(uid):
     connection = sqlite3.Connection = sqlite3.connect(db_path)
     cursor = connection.cursor()
 
-    # Get the row from the `item` table in the database which matches
-    # the unique identifier. The `fetchone` method returns `None` if
-    # there is no match.
-    row = cursor.execute(
-        'SELECT uid, name, description, completed FROM item WHERE uid = ?',
-        (uid,)
-    ).fetchone()
+    try:
+        # Update the matching row in the database with the values
+        # supplied by the user and return the updated row, so the item is
+        # not fetched first. If an attribute is `None`, then it was not
+        # supplied by the user, so the current value in the database is
+        # kept. If no row was returned, then the item was not found, so
+        # raise an exception.
+        row = cursor.execute(
+            """
+            UPDATE item SET name = COALESCE(?, name),
+                description = COALESCE(?, description),
+                completed = COALESCE(?, completed)
+            WHERE uid = ?
+            RETURNING uid, name, description, completed
+            """,
+            (name, description, completed, uid)
+        ).fetchone()
+        if row is None:
+            raise LookupError('Item not found')
+        connection.commit()
 
-    if row:
-        # The item was found, so create a dictionary which represents
-        # the item
+        # Create a dictionary which represents the updated item
         item = {
             'uid': row[0],
             'name': row[1],
@@ -342,62 +532,23 @@ def partial_update_item(uid):
             'completed': True if row[3] else False
         }
 
-        # If the `name`, `description`, or `completed` attributes are
-        # `None`, then it was not supplied by the user, so the current
-        # values from the database should be used.
-        if name is None:
-            name = item['name']
-        if description is None:
-            description = item['description']
-        if completed is None:
-            completed = item['completed']
-
-        try:
-            # Update the matching row in the database with the updated
-            # values
-            cursor.execute(
-                """
-                UPDATE item SET name = ?, description = ?, completed = ?
-                WHERE uid = ?
-                """,
-                (name, description, completed, uid)
-            )
-            connection.commit()
-
-            # Create a dictionary which represents the updated item
-            item = {
-                'uid': uid,
-                'name': name,
-                'description': description,
-                'completed': completed
-            }
-
-            # Create the HTTP response object using jsonpickle to serialize
-            # the response data
-            response = Response(
-                response=encode(value=item, unpicklable=False),
-                status=200,
-                mimetype='application/json'
-            )
-        except Exception as error:
-            # If any errors occurred, rollback the database connection and
-            # create the HTTP response object using jsonpickle to serialize
-            # an error message for the user. If the raise exception is a
-            # lookup error, then set the response status code to 404
-            connection.rollback()
-            message = {'message': str(error)}
-            response = Response(
-                response=encode(value=message, unpicklable=False),
-                status=400,
-                mimetype='application/json'
-            )
-    else:
-        # The item was not found, so create the HTTP response object
-        # using jsonpickle to serialize an error message for the user
-        message = {'message': 'Item not found'}
+        # Create the HTTP response object using jsonpickle to serialize
+        # the response data
+        response = Response(
+            response=encode(value=item, unpicklable=False),
+            status=200,
+            mimetype='application/json'
+        )
+    except Exception as error:
+        # If any errors occurred, rollback the database connection and
+        # create the HTTP response object using jsonpickle to serialize
+        # an error message for the user. If the raise exception is a
+        # lookup error, then set the response status code to 404
+        connection.rollback()
+        message = {'message': str(error)}
         response = Response(
             response=encode(value=message, unpicklable=False),
-            status=404,
+            status=404 if isinstance(error, LookupError) else 400,
             mimetype='application/json'
         )
 
@@ -494,6 +645,14 @@ def create_tables():
             connection.close()
             raise
 
+    # Create the index on the status of the items, if it does not already
+    # exist, so the items are filtered by status without scanning the
+    # whole `item` table
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS ix_item_completed ON item (completed)'
+    )
+    connection.commit()
+
     # Close the database connection
     cursor.close()
     connection.close()
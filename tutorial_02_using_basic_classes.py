@@ -1,8 +1,16 @@
 import sqlite3
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from flask import Flask, request, Response
 from jsonpickle import encode
 
 db_path = 'app.db'  # The path to the SQLite3 database file
+page_size = 100  # The default number of items in a page
+max_page_size = 1000  # The maximum number of items in a page
+# The values of the `completed` query parameter and the status of the items
+# they filter by
+statuses = {'true': True, 'false': False}
+# The fields of an item, in the order of the columns of the `item` table
+item_fields = ('uid', 'name', 'description', 'completed')
 app = Flask(__name__)  # The Flask application object
 
 
@@ -10,6 +18,9 @@ class Item(object):
     """
     This class represents a To-Do item.
 
+    The attributes are stored in slots rather than in a dictionary per
+    object, as listing or streaming the items creates an object per row.
+
     Attributes:
         uid (int): Unique identifier for the item
         name (str): Name of the item
@@ -18,6 +29,8 @@ class Item(object):
             default value is `False`.
     """
 
+    __slots__ = ('uid', 'name', 'description', 'completed')
+
     def __init__(self, uid=None, name=None, description=None, completed=False):
         """
         Initialize an `Item` object.
@@ -34,6 +47,182 @@ class Item(object):
         self.description = description
         self.completed = completed
 
+    @classmethod
+    def from_row(cls, cursor, row):
+        """
+        Create an `Item` object from a row of the `uid`, `name`,
+        `description`, and `completed` columns of the `item` table.
+
+        This is a row factory, so it can be assigned to the
+        `row_factory` attribute of a `sqlite3` cursor to create the items
+        directly as the rows are fetched. The slots are assigned from the
+        row without calling `__init__`.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor which fetched the row. It is
+                not used, and may be `None`.
+            row (tuple): Values of the columns
+
+        Returns:
+            Item: Item created from the row
+        """
+        item = object.__new__(cls)
+        item.uid, item.name, item.description, completed = row
+        item.completed = True if completed else False
+        return item
+
+    @classmethod
+    def row_factory(cls, columns=item_fields):
+        """
+        Get a row factory which creates `Item` objects from rows of some
+        of the columns of the `item` table.
+
+        Args:
+            columns (tuple): Optional. Names of the columns of the rows,
+                in the order of `item_fields`. The default value is
+                `item_fields`.
+
+        Returns:
+            Callable function: Row factory, which takes a cursor and a
+                row
+        """
+        if columns == item_fields:
+            return cls.from_row
+
+        def from_partial_row(cursor, row):
+            """
+            Create an `Item` object from a row of only some of the
+            columns. See above for details.
+
+            Args:
+                cursor (sqlite3.Cursor): Cursor which fetched the row
+                row (tuple): Values of the columns
+
+            Returns:
+                Item: Item created from the row
+            """
+            values = dict(zip(columns, row))
+            if 'completed' in values:
+                values['completed'] = True if values['completed'] else False
+            return cls(**values)
+
+        return from_partial_row
+
+
+def encode_cursor(uid):
+    """
+    Encode the unique identifier of the last item of a page into an
+    opaque cursor which is used to fetch the next page.
+
+    Args:
+        uid (int): Unique identifier of the last item of a page
+
+    Returns:
+        str: Opaque cursor
+    """
+    return urlsafe_b64encode(str(uid).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode an opaque cursor into the unique identifier of the last item
+    of the previous page.
+
+    Args:
+        cursor (str): Opaque cursor
+
+    Returns:
+        int: Unique identifier of the last item of the previous page
+
+    Raises:
+        ValueError: Invalid cursor
+    """
+    try:
+        # The padding is stripped when encoding, so add it back
+        padding = '=' * (-len(cursor) % 4)
+        return int(urlsafe_b64decode(cursor + padding).decode())
+    except ValueError:
+        raise ValueError('Invalid cursor')
+
+
+def get_page_arguments():
+    """
+    Get the pagination arguments from the query string of the HTTP
+    request.
+
+    Query Parameters:
+        limit (int): Optional. Maximum number of items in the page. The
+            value is capped to `max_page_size`.
+        cursor (str): Optional. Cursor returned with the previous page
+
+    Returns:
+        tuple: The unique identifier after which the page starts and the
+            maximum number of items in the page
+
+    Raises:
+        ValueError: Invalid limit or cursor
+    """
+    try:
+        limit = int(request.args.get('limit', page_size))
+    except ValueError:
+        raise ValueError('Invalid limit')
+    if limit < 1:
+        raise ValueError('Invalid limit')
+
+    cursor = request.args.get('cursor')
+    after = decode_cursor(cursor) if cursor else 0
+
+    return after, min(limit, max_page_size)
+
+
+def get_completed_filter():
+    """
+    Get the status by which to filter the items from the query string
+    of the HTTP request.
+
+    Query Parameters:
+        completed (str): Optional. `true` to only get completed items,
+            or `false` to only get items which are not completed
+
+    Returns:
+        bool: The status of the items to get, or `None` to get all the
+            items
+
+    Raises:
+        ValueError: Invalid status
+    """
+    completed = request.args.get('completed')
+    if completed is None:
+        return None
+    if completed not in statuses:
+        raise ValueError('Invalid completed')
+    return statuses[completed]
+
+
+def get_fields():
+    """
+    Get the fields of the items to respond with from the query string of
+    the HTTP request.
+
+    Query Parameters:
+        fields (str): Optional. Comma separated names of the fields. The
+            default value is all the fields.
+
+    Returns:
+        tuple: Names of the fields, in the order of `item_fields`
+
+    Raises:
+        ValueError: Invalid fields
+    """
+    fields = request.args.get('fields')
+    if fields is None:
+        return item_fields
+
+    names = {name.strip() for name in fields.split(',')}
+    if not names <= set(item_fields):
+        raise ValueError('Invalid fields')
+    return tuple(field for field in item_fields if field in names)
+
 
 @app.route('/hello_world')
 def hello_world():
@@ -49,41 +238,98 @@ def hello_world():
 @app.route('/items', methods=['GET'])
 def fetch_all_items():
     """
-    HTTP GET route to fetch all To-Do items from the database.
+    HTTP GET route to fetch a page of To-Do items from the database.
+
+    Items are ordered by their unique identifier. If there are more
+    items after the page, the `X-Next-Cursor` response header holds the
+    cursor to pass to fetch the next page.
+
+    Query Parameters:
+        limit (int): Optional. Maximum number of items in the page
+        cursor (str): Optional. Cursor returned with the previous page
+        completed (str): Optional. `true` or `false` to only fetch the
+            items with that status
+        fields (str): Optional. Comma separated names of the fields of
+            the items to respond with
 
     Returns:
         Response: HTTP response object with a payload of a JSON encoded
-            string of a collection of all the items retrieved from the
-            database
+            string of a page of the items retrieved from the database.
+            If the query parameters are invalid, a 400 response object
+            is returned with a message to the user.
     """
-    items = []  # Contains all of the items to return
+    try:
+        # Get the unique identifier after which the page starts, the
+        # maximum number of items in the page, and the status of the
+        # items to fetch if they are filtered by status
+        after, limit = get_page_arguments()
+        completed = get_completed_filter()
+        fields = get_fields()
+    except ValueError as error:
+        # The query parameters are invalid, so create the HTTP
+        # response object using jsonpickle to serialize an error message
+        # for the user
+        message = {'message': str(error)}
+        return Response(
+            response=encode(value=message, unpicklable=False),
+            status=400,
+            mimetype='application/json'
+        )
+
+    headers = {}  # Contains the headers of the response
 
     # Establish a connection to the database
     connection = sqlite3.Connection = sqlite3.connect(db_path)
     cursor = connection.cursor()
 
-    # Get all of the rows from the `item` table in the database
-    rows = cursor.execute('SELECT uid, name, description, completed FROM item')
-
-    # For each row, create an `Item` object
-    for row in rows.fetchall():
-        item = Item(
-            uid=row[0],
-            name=row[1],
-            description=row[2],
-            completed=True if row[3] else False
-        )
-        items.append(item)
+    # Only filter the rows by status if requested, in which case the
+    # index on the `completed` column is used to find them
+    condition, parameters = 'uid > ?', (after, limit + 1)
+    if completed is not None:
+        condition = 'completed = ? AND uid > ?'
+        parameters = (completed, after, limit + 1)
+
+    # Only select the columns of the requested fields, and the unique
+    # identifier which the cursor of the next page is made of
+    columns = fields if 'uid' in fields else ('uid',) + fields
+
+    # Get the items of the page from the `item` table in the database,
+    # starting after the cursor. The cursor creates an `Item` object
+    # with the selected columns from each row. One more item than the
+    # limit is fetched to find out whether there is a next page.
+    cursor.row_factory = Item.row_factory(columns)
+    rows = cursor.execute(
+        f"""
+        SELECT {', '.join(columns)} FROM item
+        WHERE {condition} ORDER BY uid LIMIT ?
+        """,
+        parameters
+    ).fetchall()
+
+    items = rows[:limit]
 
     # Close the database connection
     cursor.close()
     connection.close()
 
+    # If there is a next page, add its cursor to the response headers
+    if len(rows) > limit:
+        headers['X-Next-Cursor'] = encode_cursor(items[-1].uid)
+
+    # Only serialize the requested fields of the items
+    data = items
+    if fields != item_fields:
+        data = [
+            {field: getattr(item, field) for field in fields}
+            for item in items
+        ]
+
     # Create the HTTP response object using jsonpickle to serialize the
     # response data
     return Response(
-        response=encode(value=items, unpicklable=False),
+        response=encode(value=data, unpicklable=False),
         status=200,
+        headers=headers,
         mimetype='application/json'
     )
 
@@ -117,12 +363,7 @@ def fetch_one_item(uid):
 
     if row:
         # The item was found, so create an `Item` object
-        item = Item(
-            uid=row[0],
-            name=row[1],
-            description=row[2],
-            completed=True if row[3] else False
-        )
+        item = Item.from_row(cursor, row)
 
         # Create the HTTP response object using jsonpickle to serialize
         # the response data
@@ -322,77 +563,61 @@ def partial_update_item(uid):
     # Get the deserialized JSON data from the HTTP request
     data = request.json
 
-    # Establish a connection to the database
+    # Extract the optional `name`, `description`, and `completed`
+    # attributes which are supplied by the user
+    try:
+        changes = {
+            key: data[key]
+            for key in ('name', 'description', 'completed')
+            if key in data
+        }
+    except TypeError:
+        changes = {}
+
+    # Only the columns of the supplied attributes are updated. If no
+    # attribute is supplied, the status is assigned to itself, so the
+    # statement still finds the item and returns its row.
+    assignments = ', '.join(f'{key} = ?' for key in changes)
+    assignments = assignments or 'completed = completed'
+
+    # Establish a connection to the database. The cursor creates an
+    # `Item` object from the returned row.
     connection = sqlite3.Connection = sqlite3.connect(db_path)
     cursor = connection.cursor()
+    cursor.row_factory = Item.from_row
 
-    # Get the row from the `item` table in the database which matches
-    # the unique identifier. The `fetchone` method returns `None` if
-    # there is no match.
-    row = cursor.execute(
-        'SELECT uid, name, description, completed FROM item WHERE uid = ?',
-        (uid,)
-    ).fetchone()
+    try:
+        # Update the matching row in the database and return the updated
+        # row, so the item is not fetched first. If no row was returned,
+        # then the item was not found, so raise an exception.
+        item = cursor.execute(
+            f"""
+            UPDATE item SET {assignments} WHERE uid = ?
+            RETURNING uid, name, description, completed
+            """,
+            list(changes.values()) + [uid]
+        ).fetchone()
+        if item is None:
+            raise LookupError('Item not found')
+        connection.commit()
 
-    if row:
-        # The item was found, so create a `Item` object
-        item = Item(
-            uid=row[0],
-            name=row[1],
-            description=row[2],
-            completed=True if row[3] else False
+        # Create the HTTP response object using jsonpickle to serialize
+        # the response data
+        response = Response(
+            response=encode(value=item, unpicklable=False),
+            status=200,
+            mimetype='application/json'
         )
-
-        # Extract the optional `name`, `description`, and `completed`
-        # attributes
-        try:
-            if 'name' in data:
-                item.name = data['name']
-            if 'description' in data:
-                item.description = data['description']
-            if 'completed' in data:
-                item.completed = data['completed']
-        except TypeError:
-            pass
-
-        try:
-            # Update the matching row in the database with the updated
-            # values
-            cursor.execute(
-                """
-                UPDATE item SET name = ?, description = ?, completed = ?
-                WHERE uid = ?
-                """,
-                (item.name, item.description, item.completed, item.uid)
-            )
-            connection.commit()
-
-            # Create the HTTP response object using jsonpickle to serialize
-            # the response data
-            response = Response(
-                response=encode(value=item, unpicklable=False),
-                status=200,
-                mimetype='application/json'
-            )
-        except Exception as error:
-            # If any errors occurred, rollback the database connection and
-            # create the HTTP response object using jsonpickle to serialize
-            # an error message for the user. If the raise exception is a
-            # lookup error, then set the response status code to 404
-            connection.rollback()
-            message = {'message': str(error)}
-            response = Response(
-                response=encode(value=message, unpicklable=False),
-                status=400,
-                mimetype='application/json'
-            )
-    else:
-        # The item was not found, so create the HTTP response object
-        # using jsonpickle to serialize an error message for the user
-        message = {'message': 'Item not found'}
+    except Exception as error:
+        # If any errors occurred, rollback the database connection and
+        # create the HTTP response object using jsonpickle to serialize
+        # an error message for the user. If the raise exception is a
+        # lookup error, then set the response status code to 404
+        connection.rollback()
+        message = {'message': str(error)}
         response = Response(
             response=encode(value=message, unpicklable=False),
-            status=404,
+            status=404 if isinstance(error, LookupError) else 400,
             mimetype='application/json'
         )
 
@@ -489,6 +714,14 @@ def create_tables():
             connection.close()
             raise
 
+    # Create the index on the status of the items, if it does not already
+    # exist, so the items are filtered by status without scanning the
+    # whole `item` table
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS ix_item_completed ON item (completed)'
+    )
+    connection.commit()
+
     # Close the database connection
     cursor.close()
     connection.close()
@@ -1,15 +1,729 @@
+import queue
 import sqlite3
-from flask import Flask, request, Response
+import sys
+import threading
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from flask import Flask, request, Response, stream_with_context
 from jsonpickle import encode
 
 db_path = 'app.db'  # The path to the SQLite3 database file
+page_size = 100  # The default number of items in a page
+max_page_size = 1000  # The maximum number of items in a page
+# The values of the `completed` query parameter and the status of the items
+# they filter by
+statuses = {'true': True, 'false': False}
+# The fields of an item, in the order of the columns of the `item` table
+item_fields = ('uid', 'name', 'description', 'completed')
+stream_batch_size = 500  # The number of items read at a time to stream
+max_batch_size = 10000  # The maximum number of items in a batch
+in_chunk_size = 500  # The maximum number of values in an IN clause
+delete_chunk_size = 1000  # The number of items deleted at a time
+group_commit = True  # Whether or not single writes are committed in groups
+group_commit_size = 100  # The maximum number of writes per transaction
+group_commit_delay = 0.0  # The seconds to wait for more writes to group
+storage_profile = 'balanced'  # The name of the storage profile to apply
 app = Flask(__name__)  # The Flask application object
 
 
+# The named storage profiles, each of which holds the names and values of
+# the pragmas applied to every connection to the SQLite3 database file.
+#   - `durable`: Rollback journal and a full sync on every commit, so no
+#     committed transaction is lost even on a power failure
+#   - `balanced`: Write-ahead log, so readers do not block behind a
+#     writer, synced at checkpoints. A power failure may lose the last
+#     committed transactions, but never corrupts the database.
+#   - `throughput`: Write-ahead log which is never synced, with a larger
+#     cache and memory map. An operating system crash or a power failure
+#     may corrupt the database.
+storage_profiles = {
+    'durable': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'mmap_size': 0,
+        'cache_size': -2000,  # 2 MiB
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000  # 5 seconds
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,  # 256 MiB
+        'cache_size': -65536,  # 64 MiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000  # 5 seconds
+    },
+    'throughput': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'mmap_size': 1073741824,  # 1 GiB
+        'cache_size': -262144,  # 256 MiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 10000  # 10 seconds
+    }
+}
+
+
+def apply_pragmas(connection, pragmas):
+    """
+    Apply pragmas to a SQLite3 database connection.
+
+    The pragmas are applied in order, so the journal mode is changed
+    before any other setting.
+
+    Args:
+        connection (sqlite3.Connection): Database connection
+        pragmas (dict): Names and values of the pragmas to apply
+    """
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}').fetchall()
+
+
+class ConnectionPool(object):
+    """
+    This class represents a bounded pool of SQLite3 database connections.
+
+    Connections are opened lazily, up to the size of the pool, and are
+    reused instead of being opened and closed for every operation. This
+    saves the cost of connecting and of parsing the database schema each
+    time. A thread which checks out a connection while it already holds
+    one is given the same connection, so nested operations in a single
+    thread share one connection.
+
+    Every connection has the configured pragmas applied when it is
+    opened, or else the pragmas of the storage profile at that time, and
+    is checked for health when it is checked out. Only a connection which
+    was idle for longer than the ping interval is pinged with a
+    statement, so most checkouts do not add a statement.
+
+    Attributes:
+        path (str): The path to the SQLite3 database file
+        size (int): Maximum number of connections open at the same time
+        timeout (float): Number of seconds to wait for a free connection
+            before giving up, or `None` to wait until one is free
+        pragmas (dict): Names and values of pragmas to apply to a
+            connection when it is opened, or `None` to apply the pragmas
+            of the storage profile
+        ping_after (float): Number of seconds a connection is idle
+            before it is pinged when it is checked out
+    """
+
+    def __init__(self, path, size=5, timeout=5.0, pragmas=None,
+                 ping_after=30.0):
+        """
+        Initialize a `ConnectionPool` object.
+
+        Args:
+            path (str): The path to the SQLite3 database file
+            size (int): Optional. Maximum number of connections open at
+                the same time. The default value is `5`.
+            timeout (float): Optional. Number of seconds to wait for a
+                free connection before giving up, or `None` to wait until
+                one is free. The default value is `5.0`.
+            pragmas (dict): Optional. Names and values of pragmas to
+                apply to a connection when it is opened. The default
+                value is `None`, which applies the pragmas of the storage
+                profile configured when the connection is opened.
+            ping_after (float): Optional. Number of seconds a connection
+                is idle before it is pinged when it is checked out. The
+                default value is `30.0`.
+        """
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self.ping_after = ping_after
+        self._idle = queue.LifoQueue()  # Idle connections, since when
+        self._slots = threading.BoundedSemaphore(size)  # Free pool slots
+        self._local = threading.local()  # Connection held by each thread
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager which checks out a connection from the pool and
+        returns it to the pool when the context exits.
+
+        If the current thread already holds a connection, that
+        connection is reused and only returned to the pool when the
+        outermost context exits.
+
+        Yields:
+            sqlite3.Connection: Database connection
+        """
+        if getattr(self._local, 'connection', None) is not None:
+            # The thread already holds a connection, so share it
+            yield self._local.connection
+            return
+
+        connection = self.checkout()
+        self._local.connection = connection
+        try:
+            yield connection
+        finally:
+            self._local.connection = None
+            self.checkin(connection)
+
+    def checkout(self):
+        """
+        Check out a connection from the pool.
+
+        An idle connection is reused if one is healthy, otherwise a new
+        connection is opened. If all the connections of the pool are in
+        use, wait for one to be returned.
+
+        Returns:
+            sqlite3.Connection: Database connection
+
+        Raises:
+            TimeoutError: No connection was returned to the pool in time
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError('Connection pool exhausted')
+
+        try:
+            connection = self._reuse()
+            if connection is None:
+                # There is no idle connection, so open a new one
+                connection = sqlite3.connect(
+                    self.path,
+                    check_same_thread=False
+                )
+
+                # The storage profile is looked up when the connection is
+                # opened, so changing it applies to every connection
+                # opened afterwards
+                pragmas = self.pragmas
+                if pragmas is None:
+                    pragmas = storage_profiles[storage_profile]
+                apply_pragmas(connection, pragmas)
+
+        except Exception:
+            # If any error occurred, free the slot and re-raise the
+            # exception.
+            self._slots.release()
+            raise
+
+        return connection
+
+    def checkin(self, connection):
+        """
+        Return a checked out connection to the pool.
+
+        Any transaction left open on the connection is rolled back. If
+        that fails, the connection is closed instead of being reused.
+
+        Args:
+            connection (sqlite3.Connection): Database connection
+        """
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            self._idle.put((connection, time.monotonic()))
+        except sqlite3.Error:
+            self._close(connection)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """
+        Close all the idle connections of the pool.
+        """
+        while True:
+            try:
+                self._close(self._idle.get_nowait()[0])
+            except queue.Empty:
+                break
+
+    def _reuse(self):
+        """
+        Take a healthy connection from the idle connections of the pool.
+
+        Idle connections which are no longer usable are closed and
+        discarded. A connection is only pinged if it was idle for longer
+        than the ping interval.
+
+        Returns:
+            sqlite3.Connection: Database connection, or `None` if there
+                is no healthy idle connection
+        """
+        while True:
+            try:
+                connection, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+
+            ping = time.monotonic() - idle_since > self.ping_after
+            if self._is_healthy(connection, ping):
+                return connection
+            self._close(connection)
+
+    @staticmethod
+    def _is_healthy(connection, ping=False):
+        """
+        Check whether a connection can still run a statement.
+
+        A closed connection is found without running a statement, and the
+        connection is only pinged with a statement if requested.
+
+        Args:
+            connection (sqlite3.Connection): Database connection
+            ping (bool): Optional. Whether or not to run a statement. The
+                default value is `False`.
+
+        Returns:
+            bool: Whether or not the connection is usable
+        """
+        try:
+            # Reading the number of changes fails if the connection is
+            # closed
+            connection.total_changes
+            if ping:
+                sqlite3.Cursor(connection).execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _close(connection):
+        """
+        Close a connection, ignoring any errors.
+
+        Args:
+            connection (sqlite3.Connection): Database connection
+        """
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+
+
+# The pool of database connections, tuned by the storage profile
+pool = ConnectionPool(path=db_path)
+
+# The pool of the single database connection of the writer thread of the
+# write queue, tuned by the storage profile. The writer has a connection
+# of its own, so it never waits for the connections held by streams, and
+# a write committed by its own thread waits for its turn rather than for
+# the timeout of the pool.
+writer_pool = ConnectionPool(
+    path=db_path,
+    size=1,
+    timeout=None
+)
+
+
+class ItemCache(object):
+    """
+    This class represents an in-process cache of rows of the `item`
+    table, which evicts the least recently used entries.
+
+    An entry is keyed by the unique identifier of an item, or by a tuple
+    for a collection of items. Entries expire after a time to live, and
+    the least recently used entries are evicted when there are too many
+    of them or when they use too much memory. Any write to an item
+    invalidates the entry of that item and all the collections.
+
+    The generation of the cache is incremented on every invalidation.
+    Callers read it before reading rows from the database and pass it
+    on when caching them, so rows read before a concurrent write are not
+    cached.
+
+    Attributes:
+        max_entries (int): Maximum number of entries
+        max_bytes (int): Maximum estimated memory used by the entries
+        ttl (float): Number of seconds before an entry expires
+        generation (int): Number of invalidations of the cache
+        hits (int): Number of lookups which found an entry
+        misses (int): Number of lookups which did not find an entry
+        evictions (int): Number of entries evicted to make room
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024,
+                 ttl=60.0):
+        """
+        Initialize an `ItemCache` object.
+
+        Args:
+            max_entries (int): Optional. Maximum number of entries. The
+                default value is `10000`.
+            max_bytes (int): Optional. Maximum estimated memory used by
+                the entries. The default value is 64 MiB.
+            ttl (float): Optional. Number of seconds before an entry
+                expires. The default value is `60.0`.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # Entries in least recent order
+        self._collections = set()  # Keys of the collection entries
+        self._bytes = 0  # Estimated memory used by the entries
+        self._lock = threading.Lock()  # Guards the entries and counters
+
+    def get(self, key):
+        """
+        Get the rows cached for a key.
+
+        Args:
+            key (int or tuple): Unique identifier of an item, or key of
+                a collection of items
+
+        Returns:
+            List[tuple]: Cached rows, or `None` if there is no entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                # The entry has expired, so discard it
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, rows, generation):
+        """
+        Cache the rows for a key, evicting the least recently used
+        entries if needed.
+
+        The rows are not cached if the cache was invalidated since they
+        were read, or if they are larger than the cache.
+
+        Args:
+            key (int or tuple): Unique identifier of an item, or key of
+                a collection of items
+            rows (List[tuple]): Rows read from the database
+            generation (int): Generation of the cache read before the
+                rows were read from the database
+        """
+        size = self._sizeof(rows)
+
+        with self._lock:
+            if generation != self.generation or size > self.max_bytes:
+                return
+
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, rows)
+            self._bytes += size
+            if isinstance(key, tuple):
+                self._collections.add(key)
+
+            # Evict the least recently used entries until the cache is
+            # within its limits
+            while (len(self._entries) > self.max_entries
+                   or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *uids):
+        """
+        Invalidate the entries of items and all the collection entries.
+
+        Args:
+            *uids (int): Unique identifiers of the items
+        """
+        with self._lock:
+            self.generation += 1
+            for uid in uids:
+                self._remove(uid)
+            for key in list(self._collections):
+                self._remove(key)
+
+    def clear(self):
+        """
+        Invalidate all the entries.
+        """
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._collections.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Get the statistics of the cache.
+
+        Returns:
+            dict: Number of hits, misses, evictions, and entries, and the
+                estimated memory used by the entries
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes
+            }
+
+    def _remove(self, key):
+        """
+        Remove an entry, if it exists. The lock must be held.
+
+        Args:
+            key (int or tuple): Key of the entry
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+            self._collections.discard(key)
+
+    @staticmethod
+    def _sizeof(rows):
+        """
+        Estimate the memory used by rows.
+
+        Args:
+            rows (List[tuple]): Rows read from the database
+
+        Returns:
+            int: Estimated number of bytes
+        """
+        size = sys.getsizeof(rows)
+        for row in rows:
+            size += sys.getsizeof(row) + sum(map(sys.getsizeof, row))
+        return size
+
+
+item_cache = ItemCache()  # The cache of rows of the `item` table
+
+
+class WriteQueue(object):
+    """
+    This class represents a queue of writes to the database, which are
+    run by a single writer thread and committed in groups.
+
+    The writes queued while the writer thread commits a group form the
+    next group, which is committed in one transaction, so concurrent
+    writes share the write lock and the sync of a single commit rather
+    than each waiting for their own. Each write runs in its own
+    savepoint, so a failed write is rolled back without failing the
+    other writes of its group.
+
+    Attributes:
+        pool (ConnectionPool): Pool of the connection of the writer
+            thread
+        max_size (int): Maximum number of writes per transaction
+        delay (float): Number of seconds to wait for more writes before
+            committing a group which is not full
+        groups (int): Number of committed groups
+        writes (int): Number of writes in the committed groups
+    """
+
+    def __init__(self, pool, max_size=group_commit_size,
+                 delay=group_commit_delay):
+        """
+        Initialize a `WriteQueue` object.
+
+        Args:
+            pool (ConnectionPool): Pool of the connection of the writer
+                thread
+            max_size (int): Optional. Maximum number of writes per
+                transaction. The default value is `group_commit_size`.
+            delay (float): Optional. Number of seconds to wait for more
+                writes before committing a group which is not full. The
+                default value is `group_commit_delay`.
+        """
+        self.pool = pool
+        self.max_size = max_size
+        self.delay = delay
+        self.groups = 0
+        self.writes = 0
+        self._queue = queue.Queue()  # Writes waiting for the writer thread
+        self._lock = threading.Lock()  # Guards the counters and the thread
+        self._thread = None  # The writer thread, started by the first write
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Queue a write for the writer thread.
+
+        If group commit is disabled, the write is committed on its own
+        by the calling thread instead.
+
+        Args:
+            function (Callable function): Function which runs the write
+                with a `sqlite3.Cursor` as its first argument
+            *args: Arguments to pass through to the function
+            **kwargs: Keyword arguments to pass through to the function
+
+        Returns:
+            Future: Future of the result of the function, which is
+                completed once the transaction of the write is committed
+        """
+        future = Future()
+        write = (future, function, args, kwargs)
+
+        if not group_commit:
+            self._commit([write])
+            return future
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='group-commit',
+                    daemon=True
+                )
+                self._thread.start()
+        self._queue.put(write)
+
+        return future
+
+    def run(self, function, *args, **kwargs):
+        """
+        Queue a write and wait for its transaction to be committed.
+
+        Args:
+            function (Callable function): Function which runs the write
+                with a `sqlite3.Cursor` as its first argument
+            *args: Arguments to pass through to the function
+            **kwargs: Keyword arguments to pass through to the function
+
+        Returns:
+            The result of the function
+        """
+        return self.submit(function, *args, **kwargs).result()
+
+    def stats(self):
+        """
+        Get the statistics of the write queue.
+
+        Returns:
+            dict: Number of committed groups, of writes in the committed
+                groups, and of queued writes
+        """
+        with self._lock:
+            return {
+                'groups': self.groups,
+                'writes': self.writes,
+                'queued': self._queue.qsize()
+            }
+
+    def close(self):
+        """
+        Commit the queued writes and stop the writer thread.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _run(self):
+        """
+        Take groups of writes off the queue and commit them, until the
+        queue is closed.
+        """
+        closed = False
+        while not closed:
+            write = self._queue.get()
+            if write is None:
+                break
+
+            # Group the writes which are already queued, and the writes
+            # queued before the delay passes, up to the maximum size
+            group = [write]
+            deadline = time.monotonic() + self.delay
+            while len(group) < self.max_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    if timeout > 0:
+                        write = self._queue.get(timeout=timeout)
+                    else:
+                        write = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                if write is None:
+                    closed = True
+                    break
+                group.append(write)
+
+            self._commit(group)
+
+    def _commit(self, group):
+        """
+        Run a group of writes in one transaction, and complete their
+        futures once the transaction is committed.
+
+        Args:
+            group (List[tuple]): Futures of the writes, with the
+                functions and arguments which run them
+        """
+        results = []  # Futures of the writes with their results or errors
+
+        try:
+            # Check out the connection of the writer thread. The
+            # connection is returned to its pool, rather than closed,
+            # when done.
+            connection = self.pool.checkout()
+            try:
+                # Take the write lock once for the whole group
+                connection.execute('BEGIN IMMEDIATE')
+                for future, function, args, kwargs in group:
+                    cursor = connection.cursor()
+                    cursor.execute('SAVEPOINT item_write')
+                    try:
+                        result = function(cursor, *args, **kwargs)
+                        results.append((future, result, None))
+                    except Exception as error:
+                        # Only rollback this write, the other writes
+                        # of the group are still committed
+                        cursor.execute('ROLLBACK TO item_write')
+                        results.append((future, None, error))
+                    finally:
+                        cursor.execute('RELEASE item_write')
+                        cursor.close()
+                connection.commit()
+
+            except Exception:
+                # If any error occurred, rollback the database
+                # connection and re-raise the exception.
+                connection.rollback()
+                raise
+
+            finally:
+                self.pool.checkin(connection)
+
+        except Exception as error:
+            # The group was not committed, so all of its writes failed
+            for future, _, _, _ in group:
+                future.set_exception(error)
+            return
+
+        with self._lock:
+            self.groups += 1
+            self.writes += len(group)
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+# The queue of the single item writes, committed in groups by its writer
+# thread
+write_queue = WriteQueue(writer_pool)
+
+
 class Item(object):
     """
     This class represents a To-Do item.
 
+    The attributes are stored in slots rather than in a dictionary per
+    object, as listing or streaming the items creates an object per row.
+
     Attributes:
         uid (int): Unique identifier for the item
         name (str): Name of the item
@@ -18,6 +732,8 @@ class Item(object):
             default value is `False`.
     """
 
+    __slots__ = ('uid', 'name', 'description', 'completed')
+
     def __init__(self, uid=None, name=None, description=None, completed=False):
         """
         Initialize an `Item` object.
@@ -34,12 +750,76 @@ class Item(object):
         self.description = description
         self.completed = completed
 
+    @classmethod
+    def from_row(cls, cursor, row):
+        """
+        Create an `Item` object from a row of the `uid`, `name`,
+        `description`, and `completed` columns of the `item` table.
+
+        This is a row factory, so it can be assigned to the
+        `row_factory` attribute of a `sqlite3` cursor to create the items
+        directly as the rows are fetched. The slots are assigned from the
+        row without calling `__init__`.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor which fetched the row. It is
+                not used, and may be `None`.
+            row (tuple): Values of the columns
+
+        Returns:
+            Item: Item created from the row
+        """
+        item = object.__new__(cls)
+        item.uid, item.name, item.description, completed = row
+        item.completed = True if completed else False
+        return item
+
+    @classmethod
+    def row_factory(cls, columns=item_fields):
+        """
+        Get a row factory which creates `Item` objects from rows of some
+        of the columns of the `item` table.
+
+        Args:
+            columns (tuple): Optional. Names of the columns of the rows,
+                in the order of `item_fields`. The default value is
+                `item_fields`.
+
+        Returns:
+            Callable function: Row factory, which takes a cursor and a
+                row
+        """
+        if columns == item_fields:
+            return cls.from_row
+
+        def from_partial_row(cursor, row):
+            """
+            Create an `Item` object from a row of only some of the
+            columns. See above for details.
+
+            Args:
+                cursor (sqlite3.Cursor): Cursor which fetched the row
+                row (tuple): Values of the columns
+
+            Returns:
+                Item: Item created from the row
+            """
+            values = dict(zip(columns, row))
+            if 'completed' in values:
+                values['completed'] = True if values['completed'] else False
+            return cls(**values)
+
+        return from_partial_row
+
     @classmethod
     def fetch(cls, uid=None):
         """
         Create one or a collection of items with data populated from the
         `item` table in the database.
 
+        The rows are read through the item cache, so the database is
+        only queried when they are not cached.
+
         Args:
             uid (int): Optional. Unique identifier of an item
 
@@ -53,220 +833,1105 @@ class Item(object):
         Raises:
             LookupError: Item not found
         """
-        # Establish a connection to the database
-        connection = sqlite3.Connection = sqlite3.connect(db_path)
+        # Get the cached rows of the item, or of all the items. Rows are
+        # cached rather than `Item` objects, as the objects are modified
+        # by their callers.
+        key = uid if uid else ('all',)
+        generation = item_cache.generation
+        rows = item_cache.get(key)
+
+        if rows is None:
+            # Check out a connection from the pool. The connection is
+            # returned to the pool, rather than closed, when done.
+            with pool.connection() as connection:
+                cursor = connection.cursor()
+
+                try:
+                    if uid:
+                        # Get the row from the `item` table in the
+                        # database which matches the unique identifier
+                        rows = cursor.execute(
+                            """
+                            SELECT uid, name, description, completed
+                            FROM item WHERE uid = ?
+                            """,
+                            (uid,)
+                        ).fetchall()
+                    else:
+                        # Get all of the rows from the `item` table in
+                        # the database
+                        rows = cursor.execute(
+                            'SELECT uid, name, description, completed '
+                            'FROM item'
+                        ).fetchall()
+
+                except Exception:
+                    # If any error occurred, rollback the database
+                    # connection and re-raise the exception.
+                    connection.rollback()
+                    raise
+
+                finally:
+                    # Close the cursor
+                    cursor.close()
+
+            item_cache.set(key, rows, generation)
+
+        if uid:
+            if not rows:
+                # The item was not found, raise an exception
+                raise LookupError('Item not found')
+
+            # The item was found, so create an `Item` object
+            return cls.from_row(None, rows[0])
+
+        # For each row, create an `Item` object
+        return [cls.from_row(None, row) for row in rows]
+
+    @classmethod
+    def fetch_many(cls, uids):
+        """
+        Create a collection of items with data populated from the `item`
+        table in the database, by their unique identifiers.
+
+        The rows are read through the item cache, and the rows which are
+        not cached are read with one `IN` query per chunk of unique
+        identifiers, rather than one query per item.
+
+        Args:
+            uids (List[int]): Unique identifiers of the items
+
+        Returns:
+            tuple: Found items as `List[Item]`, in the order of their
+                unique identifiers, and the unique identifiers of the
+                items which were not found as `List[int]`. An item is
+                only returned once, even if its unique identifier is
+                repeated.
+        """
+        # Remove the repeated unique identifiers, keeping their order
+        uids = list(dict.fromkeys(uids))
+
+        # Get the cached rows of the items. An empty list is cached for
+        # an item which was not found.
+        generation = item_cache.generation
+        rows = {}  # The rows of the items, keyed by their unique identifiers
+        missing = []  # Unique identifiers of the items which are not cached
+        for uid in uids:
+            cached = item_cache.get(uid)
+            if cached is None:
+                missing.append(uid)
+            elif cached:
+                rows[uid] = cached[0]
+
+        if missing:
+            # Check out a connection from the pool. The connection is
+            # returned to the pool, rather than closed, when done.
+            with pool.connection() as connection:
+                cursor = connection.cursor()
+
+                try:
+                    # Get the rows of the items which are not cached, a
+                    # chunk of unique identifiers at a time
+                    for start in range(0, len(missing), in_chunk_size):
+                        chunk = missing[start:start + in_chunk_size]
+                        placeholders = ', '.join('?' * len(chunk))
+                        found = cursor.execute(
+                            f"""
+                            SELECT uid, name, description, completed
+                            FROM item WHERE uid IN ({placeholders})
+                            """,
+                            chunk
+                        ).fetchall()
+                        rows.update((row[0], row) for row in found)
+
+                except Exception:
+                    # If any error occurred, rollback the database
+                    # connection and re-raise the exception.
+                    connection.rollback()
+                    raise
+
+                finally:
+                    # Close the cursor
+                    cursor.close()
+
+            # Cache the rows which were read, as `fetch` does
+            for uid in missing:
+                row = rows.get(uid)
+                item_cache.set(uid, [row] if row else [], generation)
+
+        return (
+            [cls.from_row(None, rows[uid]) for uid in uids if uid in rows],
+            [uid for uid in uids if uid not in rows]
+        )
+
+    @classmethod
+    def fetch_page(cls, after=0, limit=page_size, completed=None,
+                   fields=item_fields):
+        """
+        Create a page of items with data populated from the `item` table
+        in the database, ordered by their unique identifiers.
+
+        The rows are read through the item cache, so the database is
+        only queried when they are not cached.
+
+        Args:
+            after (int): Optional. Unique identifier after which the page
+                starts. The default value is `0`.
+            limit (int): Optional. Maximum number of items in the page.
+                The default value is `page_size`.
+            completed (bool): Optional. Status of the items in the page,
+                or `None` for items of any status. The default value is
+                `None`.
+            fields (tuple): Optional. Names of the fields to populate, in
+                the order of `item_fields`. The unique identifier is
+                always populated. The default value is `item_fields`.
+
+        Returns:
+            tuple: Collection of the items in the page as `List[Item]`
+                and whether or not there are more items after the page
+        """
+        # Only select the columns of the requested fields, and the unique
+        # identifier which the cursor of the next page is made of
+        columns = fields if 'uid' in fields else ('uid',) + fields
+
+        # Get the cached rows of the page
+        key = ('page', after, limit, completed, fields)
+        generation = item_cache.generation
+        rows = item_cache.get(key)
+
+        if rows is None:
+            # Check out a connection from the pool. The connection is
+            # returned to the pool, rather than closed, when done.
+            with pool.connection() as connection:
+                cursor = connection.cursor()
+
+                # Only filter the rows by status if requested, in which
+                # case the index on the `completed` column is used to
+                # find them
+                condition, parameters = 'uid > ?', (after, limit + 1)
+                if completed is not None:
+                    condition = 'completed = ? AND uid > ?'
+                    parameters = (completed, after, limit + 1)
+
+                try:
+                    # Get the rows of the page from the `item` table in
+                    # the database, starting after the given unique
+                    # identifier. One more row than the limit is fetched
+                    # to find out whether there is a next page.
+                    rows = cursor.execute(
+                        f"""
+                        SELECT {', '.join(columns)} FROM item
+                        WHERE {condition} ORDER BY uid LIMIT ?
+                        """,
+                        parameters
+                    ).fetchall()
+
+                except Exception:
+                    # If any error occurred, rollback the database
+                    # connection and re-raise the exception.
+                    connection.rollback()
+                    raise
+
+                finally:
+                    # Close the cursor
+                    cursor.close()
+
+            item_cache.set(key, rows, generation)
+
+        # For each row in the page, create an `Item` object with the
+        # selected columns
+        factory = cls.row_factory(columns)
+        result = [factory(None, row) for row in rows[:limit]]
+        return result, len(rows) > limit
+
+    @classmethod
+    def iterate(cls, batch_size=stream_batch_size, completed=None):
+        """
+        Lazily create all the items with data populated from the `item`
+        table in the database, ordered by their unique identifiers.
+
+        Rows are read from the database in batches, so only one batch is
+        held in memory at a time. The connection is checked out from the
+        pool until all the items are generated or the generator is
+        closed.
+
+        Args:
+            batch_size (int): Optional. Number of rows to read at a time.
+                The default value is `stream_batch_size`.
+            completed (bool): Optional. Status of the items, or `None`
+                for items of any status. The default value is `None`.
+
+        Yields:
+            Item: Item created from a row of the `item` table
+        """
+        # Check out a connection directly, as the generator may not be
+        # resumed in the thread which started it
+        connection = pool.checkout()
         cursor = connection.cursor()
 
-        try:
-            if uid:
-                # Get the row from the `item` table in the database
-                # which matches the unique identifier. The `fetchone`
-                # method returns `None` if there is no match.
-                row = cursor.execute(
-                    """
-                    SELECT uid, name, description, completed
-                    FROM item WHERE uid = ?
-                    """,
-                    (uid,)
-                ).fetchone()
-
-                if row:
-                    # The item was found, so create an `Item` object
-                    result = cls(
-                        uid=row[0],
-                        name=row[1],
-                        description=row[2],
-                        completed=True if row[3] else False
-                    )
-                else:
-                    # The item was not found, raise an exception
-                    raise LookupError('Item not found')
+        # The cursor creates an `Item` object from each row
+        cursor.row_factory = cls.from_row
 
+        try:
+            if completed is None:
+                cursor.execute(
+                    'SELECT uid, name, description, completed FROM item '
+                    'ORDER BY uid'
+                )
             else:
-                # Get all of the rows from the `item` table in the
-                # database
-                rows = cursor.execute(
-                    'SELECT uid, name, description, completed FROM item'
+                cursor.execute(
+                    'SELECT uid, name, description, completed FROM item '
+                    'WHERE completed = ? ORDER BY uid',
+                    (completed,)
                 )
 
-                # For each row, create an `Item` object
-                result = []
-                for row in rows.fetchall():
-                    item = cls(
-                        uid=row[0],
-                        name=row[1],
-                        description=row[2],
-                        completed=True if row[3] else False
-                    )
-                    result.append(item)
-
-        except Exception:
-            # If any error occurred, rollback the database connection
-            # and re-raise the exception.
-            connection.rollback()
-            raise
+            # Fetch the items a batch at a time
+            items = cursor.fetchmany(batch_size)
+            while items:
+                yield from items
+                items = cursor.fetchmany(batch_size)
 
         finally:
-            # Close the database connection
+            # Close the cursor and return the connection to the pool
             cursor.close()
-            connection.close()
-
-        return result
+            pool.checkin(connection)
 
     def create(self):
         """
         Create the item in the database.
 
-        Returns:
-            Item: Allow for method chaining of self
+        Returns:
+            Item: Allow for method chaining of self
+
+        Raises:
+            Exception: Any errors encountered when inserting a new row
+                to the database
+        """
+        # Queue the insert for the writer thread, which commits it with
+        # the other writes queued at the same time, and populate the
+        # `uid` attribute with the auto-generated unique identifier
+        self.uid = write_queue.run(self._insert)
+
+        # Invalidate the cached rows of the item and of all the
+        # collections of items
+        item_cache.invalidate(self.uid)
+
+        return self
+
+    def _insert(self, cursor):
+        """
+        Insert a new row to the `item` table with the values from the
+        current object.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor of the transaction of the
+                writer thread
+
+        Returns:
+            int: Auto-generated unique identifier of the item
+        """
+        cursor.execute(
+            """
+            INSERT INTO item (name, description, completed)
+            VALUES (?, ?, ?)
+            """,
+            (self.name, self.description, self.completed)
+        )
+        return cursor.lastrowid
+
+    @classmethod
+    def create_many(cls, items):
+        """
+        Create a collection of items in the database in a single
+        transaction.
+
+        Returns:
+            List[Item]: The same items, with their `uid` attributes
+                populated
+
+        Raises:
+            Exception: Any errors encountered when inserting the new
+                rows to the database. If any error occurred, none of the
+                items are created.
+        """
+        if not items:
+            return items
+
+        # Check out a connection from the pool. The connection is
+        # returned to the pool, rather than closed, when done.
+        with pool.connection() as connection:
+            cursor = connection.cursor()
+
+            try:
+                # Insert all the new rows to the database with a single
+                # statement. The unique identifiers are assigned in
+                # sequence within the transaction, so they are derived
+                # from the last auto-generated unique identifier.
+                cursor.executemany(
+                    """
+                    INSERT INTO item (name, description, completed)
+                    VALUES (?, ?, ?)
+                    """,
+                    [
+                        (item.name, item.description, item.completed)
+                        for item in items
+                    ]
+                )
+                last_uid = cursor.execute(
+                    'SELECT last_insert_rowid()'
+                ).fetchone()[0]
+                connection.commit()
+
+                first_uid = last_uid - len(items) + 1
+                for uid, item in enumerate(items, start=first_uid):
+                    item.uid = uid
+
+                # Invalidate the cached rows of the items and of all the
+                # collections of items
+                item_cache.invalidate(*[item.uid for item in items])
+
+            except Exception:
+                # If any error occurred, rollback the database connection
+                # and re-raise the exception.
+                connection.rollback()
+                raise
+
+            finally:
+                # Close the cursor
+                cursor.close()
+
+        return items
+
+    def update(self):
+        """
+        Update the item in the database.
+
+        Returns:
+            Item: Allow for method chaining of self
+
+        Raises:
+            LookupError: Item not found
+            Exception: Any errors encountered when inserting a new row
+                to the database
+        """
+        # Queue the update for the writer thread, which commits it with
+        # the other writes queued at the same time
+        write_queue.run(self._update)
+
+        # Invalidate the cached rows of the item and of all the
+        # collections of items
+        item_cache.invalidate(self.uid)
+
+        return self
+
+    def _update(self, cursor):
+        """
+        Update the matching row in the `item` table with the values from
+        the current object.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor of the transaction of the
+                writer thread
+
+        Raises:
+            LookupError: Item not found
+        """
+        # If no row was updated, then the item was not found, so raise an
+        # exception.
+        cursor.execute(
+            """
+            UPDATE item SET name = ?, description = ?, completed = ?
+            WHERE uid = ?
+            """,
+            (self.name, self.description, self.completed, self.uid)
+        )
+        if not cursor.rowcount:
+            raise LookupError('Item not found')
+
+    @classmethod
+    def update_by_uid(cls, uid, changes):
+        """
+        Update the attributes of an item in the database without fetching
+        the item first.
+
+        Only the columns of the changed attributes are updated, and the
+        updated row is returned by the same statement.
+
+        Args:
+            uid (int): Unique identifier of the item
+            changes (dict): Attributes to update, keyed by their names
+
+        Returns:
+            Item: Updated item
+
+        Raises:
+            LookupError: Item not found
+            Exception: Any errors encountered when updating the row of
+                the database
+        """
+        # Queue the update for the writer thread, which commits it with
+        # the other writes queued at the same time
+        item = write_queue.run(cls._update_by_uid, uid, changes)
+
+        # Invalidate the cached rows of the item and of all the
+        # collections of items
+        item_cache.invalidate(uid)
+
+        return item
+
+    @classmethod
+    def _update_by_uid(cls, cursor, uid, changes):
+        """
+        Update the changed columns of the matching row in the `item`
+        table and return the updated row.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor of the transaction of the
+                writer thread
+            uid (int): Unique identifier of the item
+            changes (dict): Attributes to update, keyed by their names
+
+        Returns:
+            Item: Updated item
+
+        Raises:
+            LookupError: Item not found
+        """
+        # If no attribute is changed, the status is assigned to itself, so
+        # the statement still finds the item and returns its row
+        assignments = ', '.join(f'{key} = ?' for key in changes)
+        assignments = assignments or 'completed = completed'
+
+        # If no row was returned, then the item was not found, so raise an
+        # exception.
+        cursor.row_factory = cls.from_row
+        item = cursor.execute(
+            f"""
+            UPDATE item SET {assignments} WHERE uid = ?
+            RETURNING uid, name, description, completed
+            """,
+            list(changes.values()) + [uid]
+        ).fetchone()
+        if item is None:
+            raise LookupError('Item not found')
+
+        return item
+
+    @classmethod
+    def update_many(cls, patches):
+        """
+        Partially update a collection of items in the database in a
+        single transaction.
+
+        Items which are updated with the same attributes are updated with
+        a single grouped statement.
+
+        Args:
+            patches (dict): Attributes to update of each item, keyed by
+                the unique identifiers of the items
+
+        Returns:
+            tuple: Unique identifiers of the updated items and of the
+                items which were not found, each as `List[int]`
+
+        Raises:
+            Exception: Any errors encountered when updating the rows of
+                the database. If any error occurred, none of the items
+                are updated.
+        """
+        uids = list(patches)
+        found = set()  # Unique identifiers of the items which exist
+
+        # Check out a connection from the pool. The connection is
+        # returned to the pool, rather than closed, when done.
+        with pool.connection() as connection:
+            cursor = connection.cursor()
+
+            try:
+                # Take the write lock before finding which items exist,
+                # so they cannot be deleted before they are updated
+                cursor.execute('BEGIN IMMEDIATE')
+                for start in range(0, len(uids), in_chunk_size):
+                    chunk = uids[start:start + in_chunk_size]
+                    placeholders = ', '.join('?' * len(chunk))
+                    rows = cursor.execute(
+                        f'SELECT uid FROM item WHERE uid IN ({placeholders})',
+                        chunk
+                    )
+                    found.update(row[0] for row in rows)
+
+                # Group the updates of the items by the attributes which
+                # are updated, and update each group with one statement
+                groups = {}
+                for uid in uids:
+                    if uid in found and patches[uid]:
+                        keys = tuple(sorted(patches[uid]))
+                        values = [patches[uid][key] for key in keys]
+                        groups.setdefault(keys, []).append(values + [uid])
+
+                for keys, parameters in groups.items():
+                    assignments = ', '.join(f'{key} = ?' for key in keys)
+                    cursor.executemany(
+                        f'UPDATE item SET {assignments} WHERE uid = ?',
+                        parameters
+                    )
+                connection.commit()
+
+            except Exception:
+                # If any error occurred, rollback the database connection
+                # and re-raise the exception.
+                connection.rollback()
+                raise
+
+            finally:
+                # Close the cursor
+                cursor.close()
+
+        # Invalidate the cached rows of the updated items and of all the
+        # collections of items
+        updated = [uid for uid in uids if uid in found]
+        item_cache.invalidate(*updated)
+
+        return updated, [uid for uid in uids if uid not in found]
+
+    def delete(self):
+        """
+        Delete the item from the database.
+
+        Returns:
+            Item: Allow for method chaining of self
+
+        Raises:
+            LookupError: Item not found
+            Exception: Any errors encountered when inserting a new row
+                to the database
+        """
+        # Queue the delete for the writer thread, which commits it with
+        # the other writes queued at the same time
+        write_queue.run(self._delete)
+
+        # Invalidate the cached rows of the item and of all the
+        # collections of items
+        item_cache.invalidate(self.uid)
+
+        # Clear the uid as it has been removed from the database
+        self.uid = 0
+
+        return self
+
+    def _delete(self, cursor):
+        """
+        Delete the matching row from the `item` table.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor of the transaction of the
+                writer thread
+
+        Raises:
+            LookupError: Item not found
+        """
+        # If no row was deleted, then the item was not found, so raise an
+        # exception.
+        cursor.execute('DELETE FROM item WHERE uid = ?', (self.uid,))
+        if not cursor.rowcount:
+            raise LookupError('Item not found')
+
+    @classmethod
+    def delete_many(cls, uids=None, completed=None):
+        """
+        Delete a collection of items from the database, either by their
+        unique identifiers or by their status.
+
+        The items are deleted with set-based statements in chunks, each
+        in its own transaction, so the write lock of the database is
+        released between chunks. If an error occurs, the chunks which
+        were already deleted stay deleted.
+
+        Args:
+            uids (List[int]): Optional. Unique identifiers of the items
+            completed (bool): Optional. Status of the items, used if the
+                unique identifiers are not provided
+
+        Returns:
+            int: Number of deleted items
+
+        Raises:
+            Exception: Any errors encountered when deleting rows from
+                the database
+        """
+        deleted = 0  # Number of deleted items
+
+        # Check out a connection from the pool. The connection is
+        # returned to the pool, rather than closed, when done.
+        with pool.connection() as connection:
+            cursor = connection.cursor()
+
+            try:
+                if uids is not None:
+                    # Delete the matching rows from the database, a chunk
+                    # of unique identifiers at a time
+                    for start in range(0, len(uids), in_chunk_size):
+                        chunk = uids[start:start + in_chunk_size]
+                        placeholders = ', '.join('?' * len(chunk))
+                        cursor.execute(
+                            f'DELETE FROM item WHERE uid IN ({placeholders})',
+                            chunk
+                        )
+                        deleted += cursor.rowcount
+                        connection.commit()
+                        item_cache.invalidate(*chunk)
+                else:
+                    # Delete the rows with the matching status from the
+                    # database, a chunk of rows at a time, until a chunk
+                    # is not full
+                    rowcount = delete_chunk_size
+                    while rowcount == delete_chunk_size:
+                        cursor.execute(
+                            """
+                            DELETE FROM item WHERE uid IN (
+                                SELECT uid FROM item WHERE completed = ?
+                                LIMIT ?
+                            )
+                            """,
+                            (completed, delete_chunk_size)
+                        )
+                        rowcount = cursor.rowcount
+                        deleted += rowcount
+                        connection.commit()
+
+                        # The deleted items are not known, so clear the
+                        # cache once each chunk is committed, as it stays
+                        # deleted even if a later chunk fails
+                        item_cache.clear()
+
+            except Exception:
+                # If any error occurred, rollback the database connection
+                # and re-raise the exception.
+                connection.rollback()
+                raise
+
+            finally:
+                # Close the cursor
+                cursor.close()
+
+        return deleted
+
+    def from_dict(self, data):
+        """
+        Deserialize a dictionary to populate the attributes of the
+        current object.
+
+        Only attributes of the current object which are in the
+        dictionary are updated. The unique identifier is not updated.
+
+        Args:
+            data (dict): Dictionary containing all or partial attributes
+                to deserialize.
+
+        Returns:
+            Item: Allow for method chaining of self
+        """
+        try:
+            if 'name' in data:
+                self.name = data['name']
+            if 'description' in data:
+                self.description = data['description']
+            if 'completed' in data:
+                self.completed = data['completed']
+        except TypeError:
+            pass
+
+        return self
+
+
+def encode_cursor(uid):
+    """
+    Encode the unique identifier of the last item of a page into an
+    opaque cursor which is used to fetch the next page.
+
+    Args:
+        uid (int): Unique identifier of the last item of a page
+
+    Returns:
+        str: Opaque cursor
+    """
+    return urlsafe_b64encode(str(uid).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode an opaque cursor into the unique identifier of the last item
+    of the previous page.
+
+    Args:
+        cursor (str): Opaque cursor
+
+    Returns:
+        int: Unique identifier of the last item of the previous page
+
+    Raises:
+        ValueError: Invalid cursor
+    """
+    try:
+        # The padding is stripped when encoding, so add it back
+        padding = '=' * (-len(cursor) % 4)
+        return int(urlsafe_b64decode(cursor + padding).decode())
+    except ValueError:
+        raise ValueError('Invalid cursor')
+
+
+def get_page_arguments():
+    """
+    Get the pagination arguments from the query string of the HTTP
+    request.
+
+    Query Parameters:
+        limit (int): Optional. Maximum number of items in the page. The
+            value is capped to `max_page_size`.
+        cursor (str): Optional. Cursor returned with the previous page
+
+    Returns:
+        tuple: The unique identifier after which the page starts and the
+            maximum number of items in the page
+
+    Raises:
+        ValueError: Invalid limit or cursor
+    """
+    try:
+        limit = int(request.args.get('limit', page_size))
+    except ValueError:
+        raise ValueError('Invalid limit')
+    if limit < 1:
+        raise ValueError('Invalid limit')
+
+    cursor = request.args.get('cursor')
+    after = decode_cursor(cursor) if cursor else 0
+
+    return after, min(limit, max_page_size)
+
+
+def get_completed_filter():
+    """
+    Get the status by which to filter the items from the query string
+    of the HTTP request.
+
+    Query Parameters:
+        completed (str): Optional. `true` to only get completed items,
+            or `false` to only get items which are not completed
+
+    Returns:
+        bool: The status of the items to get, or `None` to get all the
+            items
+
+    Raises:
+        ValueError: Invalid status
+    """
+    completed = request.args.get('completed')
+    if completed is None:
+        return None
+    if completed not in statuses:
+        raise ValueError('Invalid completed')
+    return statuses[completed]
+
+
+def get_fields():
+    """
+    Get the fields of the items to respond with from the query string of
+    the HTTP request.
+
+    Query Parameters:
+        fields (str): Optional. Comma separated names of the fields. The
+            default value is all the fields.
+
+    Returns:
+        tuple: Names of the fields, in the order of `item_fields`
+
+    Raises:
+        ValueError: Invalid fields
+    """
+    fields = request.args.get('fields')
+    if fields is None:
+        return item_fields
+
+    names = {name.strip() for name in fields.split(',')}
+    if not names <= set(item_fields):
+        raise ValueError('Invalid fields')
+    return tuple(field for field in item_fields if field in names)
+
+
+def get_uids():
+    """
+    Get the unique identifiers of the items to fetch from the query
+    string of the HTTP request.
+
+    Query Parameters:
+        uids (str): Optional. Comma separated unique identifiers of the
+            items
+
+    Returns:
+        List[int]: Unique identifiers of the items, or `None` if they
+            are not provided
+
+    Raises:
+        ValueError: Invalid unique identifiers, or too many of them
+    """
+    uids = request.args.get('uids')
+    if uids is None:
+        return None
+
+    try:
+        uids = [int(uid) for uid in uids.split(',')]
+    except ValueError:
+        raise ValueError('Invalid unique identifiers')
+    if len(uids) > max_batch_size:
+        raise ValueError(f'No more than {max_batch_size} items are allowed')
+    return uids
+
+
+def get_lookup_uids():
+    """
+    Get the unique identifiers of the items to fetch from the payload of
+    the HTTP request.
+
+    JSON Payload:
+        {
+            "uids": [integer]  <-- Unique identifiers of the items
+        }
+
+    Returns:
+        List[int]: Unique identifiers of the items
+
+    Raises:
+        ValueError: Invalid unique identifiers, or too many of them
+    """
+    data = request.json
+    uids = data.get('uids') if isinstance(data, dict) else None
+    if not isinstance(uids, list) or not all(
+        isinstance(uid, int) and not isinstance(uid, bool) for uid in uids
+    ):
+        raise ValueError('Invalid unique identifiers')
+    if len(uids) > max_batch_size:
+        raise ValueError(f'No more than {max_batch_size} items are allowed')
+    return uids
+
+
+def get_batch_data():
+    """
+    Get the collection of items supplied in the payload of the HTTP
+    request.
+
+    Returns:
+        list: Collection of dictionaries of attributes of the items
+
+    Raises:
+        ValueError: The payload is not a list or has too many elements
+    """
+    data = request.json
+    if not isinstance(data, list):
+        raise ValueError('A list of items is required')
+    if len(data) > max_batch_size:
+        raise ValueError(f'No more than {max_batch_size} items are allowed')
+
+    return data
+
+
+def get_batch_patches():
+    """
+    Get the partial updates of items supplied in the payload of the HTTP
+    request. Updates of the same item are merged in the order of the
+    payload.
+
+    Returns:
+        dict: Attributes to update of each item, keyed by the unique
+            identifiers of the items in the order of the payload
+
+    Raises:
+        ValueError: The payload is not a list, has too many elements, or
+            an element has no valid unique identifier
+    """
+    patches = {}
+    for data in get_batch_data():
+        try:
+            uid = data['uid']
+        except (KeyError, TypeError):
+            raise ValueError('A unique identifier is required for each item')
+        if not isinstance(uid, int) or isinstance(uid, bool):
+            raise ValueError('Invalid unique identifier')
+
+        # Only the `name`, `description`, and `completed` attributes are
+        # updated, as with `Item.from_dict`
+        patch = patches.setdefault(uid, {})
+        for key in ('name', 'description', 'completed'):
+            if key in data:
+                patch[key] = data[key]
+
+    return patches
+
+
+def get_item_changes(data):
+    """
+    Get the attributes of an item to update from the payload of the HTTP
+    request.
+
+    Only the `name`, `description`, and `completed` attributes are
+    updated, as with `Item.from_dict`.
+
+    Args:
+        data (dict): Deserialized JSON payload of the HTTP request
+
+    Returns:
+        dict: Attributes to update, keyed by their names
+    """
+    try:
+        return {
+            key: data[key]
+            for key in ('name', 'description', 'completed')
+            if key in data
+        }
+    except TypeError:
+        return {}
 
-        Raises:
-            Exception: Any errors encountered when inserting a new row
-                to the database
-        """
-        # Establish a connection to the database
-        connection = sqlite3.Connection = sqlite3.connect(db_path)
-        cursor = connection.cursor()
 
-        try:
-            # Insert a new row to the database with the values from the
-            # the current object and get the auto-generated unique
-            # identifier to populate the `uid` attribute
-            cursor.execute(
-                """
-                INSERT INTO item (name, description, completed)
-                VALUES (?, ?, ?)
-                """,
-                (self.name, self.description, self.completed)
-            )
-            self.uid = cursor.lastrowid
-            connection.commit()
+def get_delete_filter():
+    """
+    Get which items to delete from the payload of the HTTP request.
 
-        except Exception:
-            # If any error occurred, rollback the database connection
-            # and re-raise the exception.
-            connection.rollback()
-            raise
+    JSON Payload:
+        {
+            "uids": [integer]  <-- Unique identifiers of the items
+        }
+        or
+        {
+            "completed": boolean  <-- Status of the items
+        }
 
-        finally:
-            # Close the database connection
-            cursor.close()
-            connection.close()
+    Returns:
+        tuple: Unique identifiers of the items to delete as `List[int]`,
+            or `None`, and the status of the items to delete, or `None`
 
-        return self
+    Raises:
+        ValueError: The payload has neither or both of `uids` and
+            `completed`, or either of them is invalid
+    """
+    data = request.json
+    if not isinstance(data, dict) or ('uids' in data) == ('completed' in data):
+        raise ValueError('Either `uids` or `completed` is required')
+
+    if 'uids' in data:
+        uids = data['uids']
+        if not isinstance(uids, list) or not all(
+            isinstance(uid, int) and not isinstance(uid, bool) for uid in uids
+        ):
+            raise ValueError('Invalid unique identifiers')
+        if len(uids) > max_batch_size:
+            raise ValueError(
+                f'No more than {max_batch_size} items are allowed'
+            )
+        return uids, None
 
-    def update(self):
-        """
-        Update the item in the database.
+    if not isinstance(data['completed'], bool):
+        raise ValueError('Invalid status')
+    return None, data['completed']
 
-        Returns:
-            Item: Allow for method chaining of self
 
-        Raises:
-            LookupError: Item not found
-            Exception: Any errors encountered when inserting a new row
-                to the database
-        """
-        # Establish a connection to the database
-        connection = sqlite3.Connection = sqlite3.connect(db_path)
-        cursor = connection.cursor()
+def generate_json_array(items):
+    """
+    Generate a JSON array of items chunk by chunk.
 
-        try:
-            # Update the matching row in the database with the values
-            # from the current object. If no row was updated, then the
-            # item was not found, so raise an exception.
-            cursor.execute(
-                """
-                UPDATE item SET name = ?, description = ?, completed = ?
-                WHERE uid = ?
-                """,
-                (self.name, self.description, self.completed, self.uid)
-            )
-            if not cursor.rowcount:
-                raise LookupError('Item not found')
-            connection.commit()
+    Each chunk holds the serialized items of one batch, so only one
+    batch is held in memory at a time.
 
-        except Exception:
-            # If any error occurred, rollback the database connection
-            # and re-raise the exception.
-            connection.rollback()
-            raise
+    Args:
+        items (Iterable[Item]): Items to serialize
 
-        finally:
-            # Close the database connection
-            cursor.close()
-            connection.close()
+    Yields:
+        str: Chunk of the JSON array
+    """
+    yield '['
+    separator = ''
+    for batch in iterate_batches(items):
+        yield separator + ','.join(
+            encode(value=item, unpicklable=False) for item in batch
+        )
+        separator = ','
+    yield ']'
 
-        return self
 
-    def delete(self):
-        """
-        Delete the item from the database.
+def generate_ndjson(items):
+    """
+    Generate newline delimited JSON of items chunk by chunk, where each
+    line is one serialized item.
 
-        Returns:
-            Item: Allow for method chaining of self
+    Args:
+        items (Iterable[Item]): Items to serialize
 
-        Raises:
-            LookupError: Item not found
-            Exception: Any errors encountered when inserting a new row
-                to the database
-        """
-        # Establish a connection to the database
-        connection = sqlite3.Connection = sqlite3.connect(db_path)
-        cursor = connection.cursor()
+    Yields:
+        str: Chunk of lines of newline delimited JSON
+    """
+    for batch in iterate_batches(items):
+        yield ''.join(
+            encode(value=item, unpicklable=False) + '\n' for item in batch
+        )
 
-        try:
-            # Delete the matching row from the database. If no row was
-            # deleted, then the item was not found, so raise an
-            # exception.
-            cursor.execute('DELETE FROM item WHERE uid = ?', (self.uid,))
 
-            if not cursor.rowcount:
-                raise LookupError('Item not found')
-            connection.commit()
+def iterate_batches(items):
+    """
+    Group items into batches of `stream_batch_size` items.
 
-        except Exception:
-            # If any error occurred, rollback the database connection
-            # and re-raise the exception.
-            connection.rollback()
-            raise
+    Args:
+        items (Iterable[Item]): Items to group
 
-        finally:
-            # Close the database connection
-            cursor.close()
-            connection.close()
+    Yields:
+        List[Item]: Batch of items
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= stream_batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
-        # Clear the uid as it has been removed from the database
-        self.uid = 0
 
-        return self
+def stream_response(items):
+    """
+    Create an HTTP response which streams a collection of items in the
+    format requested by the `stream` query parameter.
 
-    def from_dict(self, data):
-        """
-        Deserialize a dictionary to populate the attributes of the
-        current object.
+    The items are consumed lazily while the payload is sent, so the
+    response starts before all the items are read from the database.
 
-        Only attributes of the current object which are in the
-        dictionary are updated. The unique identifier is not updated.
+    Query Parameters:
+        stream (str): `json` to stream a JSON array, or `ndjson` to
+            stream newline delimited JSON
 
-        Args:
-            data (dict): Dictionary containing all or partial attributes
-                to deserialize.
+    Args:
+        items (Iterable[Item]): Items to stream
 
-        Returns:
-            Item: Allow for method chaining of self
-        """
-        try:
-            if 'name' in data:
-                self.name = data['name']
-            if 'description' in data:
-                self.description = data['description']
-            if 'completed' in data:
-                self.completed = data['completed']
-        except TypeError:
-            pass
+    Returns:
+        Response: HTTP response object with a streamed payload
 
-        return self
+    Raises:
+        ValueError: Invalid streaming format
+    """
+    stream = request.args.get('stream')
+    if stream == 'json':
+        chunks = generate_json_array(items)
+        mimetype = 'application/json'
+    elif stream == 'ndjson':
+        chunks = generate_ndjson(items)
+        mimetype = 'application/x-ndjson'
+    else:
+        raise ValueError('Invalid stream')
+
+    # Keep the request context for the duration of the stream, as the
+    # chunks are generated after the route returns
+    return Response(
+        response=stream_with_context(chunks),
+        status=200,
+        mimetype=mimetype
+    )
 
 
 @app.route('/hello_world')
@@ -283,21 +1948,137 @@ def hello_world():
 @app.route('/items', methods=['GET'])
 def fetch_all_items():
     """
-    HTTP GET route to fetch all To-Do items from the database.
+    HTTP GET route to fetch a page of To-Do items from the database.
+
+    Items are ordered by their unique identifier. If there are more
+    items after the page, the `X-Next-Cursor` response header holds the
+    cursor to pass to fetch the next page.
+
+    Query Parameters:
+        limit (int): Optional. Maximum number of items in the page
+        cursor (str): Optional. Cursor returned with the previous page
+        stream (str): Optional. `json` or `ndjson` to stream all the
+            items instead of returning a page
+        completed (str): Optional. `true` or `false` to only fetch the
+            items with that status
+        fields (str): Optional. Comma separated names of the fields of
+            the items to respond with
+        uids (str): Optional. Comma separated unique identifiers of the
+            items to fetch instead of a page
 
     Returns:
         Response: HTTP response object with a payload of a JSON encoded
-            string of a collection of all the items retrieved from the
-            database
+            string of a page of the items retrieved from the database.
+            If the pagination arguments are invalid, a 400 response
+            object is returned with a message to the user.
     """
-    # Create the HTTP response object using jsonpickle to serialize the
-    # response data which is a list of all the items obtained by using
-    # the `Item.fetch` method.
-    return Response(
-        response=encode(value=Item.fetch(), unpicklable=False),
-        status=200,
-        mimetype='application/json'
-    )
+    try:
+        # The unique identifiers of items are provided, so fetch those
+        # items in the order they were requested, and report the items
+        # which were not found
+        uids = get_uids()
+        if uids is not None:
+            items, not_found = Item.fetch_many(uids)
+            result = {'items': items, 'not_found': not_found}
+            return Response(
+                response=encode(value=result, unpicklable=False),
+                status=200,
+                mimetype='application/json'
+            )
+
+        # Get the status of the items to fetch if they are filtered by
+        # status
+        completed = get_completed_filter()
+
+        # Get the fields of the items to respond with
+        fields = get_fields()
+
+        # If streaming is requested, stream all the items instead of
+        # returning a page
+        if 'stream' in request.args:
+            return stream_response(Item.iterate(completed=completed))
+
+        # Fetch the page of items by using the `Item.fetch_page` method
+        # and, if there is a next page, add its cursor to the headers
+        after, limit = get_page_arguments()
+        items, more = Item.fetch_page(after, limit, completed, fields)
+        headers = {}
+        if more:
+            headers['X-Next-Cursor'] = encode_cursor(items[-1].uid)
+
+        # Only serialize the requested fields of the items
+        data = items
+        if fields != item_fields:
+            data = [
+                {field: getattr(item, field) for field in fields}
+                for item in items
+            ]
+
+        # Create the HTTP response object using jsonpickle to serialize
+        # the response data
+        response = Response(
+            response=encode(value=data, unpicklable=False),
+            status=200,
+            headers=headers,
+            mimetype='application/json'
+        )
+    except Exception as error:
+        # If any errors occurred, create the HTTP response object using
+        # jsonpickle to serialize an error message for the user
+        message = {'message': str(error)}
+        response = Response(
+            response=encode(value=message, unpicklable=False),
+            status=400,
+            mimetype='application/json'
+        )
+
+    return response
+
+
+@app.route('/items/lookup', methods=['POST'])
+def lookup_items():
+    """
+    HTTP POST route to fetch a collection of To-Do items from the
+    database by their unique identifiers, for lists of unique
+    identifiers too long for the `uids` query parameter of a GET
+    request.
+
+    JSON Payload:
+        {
+            "uids": [integer]  <-- Unique identifiers of the items
+        }
+
+    Returns:
+        Response: HTTP response object with a payload of a JSON encoded
+            string of the found items, in the order of their unique
+            identifiers, and of the unique identifiers of the items which
+            were not found. If any errors occurred during the operation,
+            a response object is returned with the error message.
+    """
+    try:
+        # Extract the unique identifiers from the payload and fetch the
+        # items from the database
+        items, not_found = Item.fetch_many(get_lookup_uids())
+        result = {'items': items, 'not_found': not_found}
+
+        # Create the HTTP response object using jsonpickle to serialize
+        # the response data
+        response = Response(
+            response=encode(value=result, unpicklable=False),
+            status=200,
+            mimetype='application/json'
+        )
+    except Exception as error:
+        # If any errors occurred, create the HTTP response object using
+        # jsonpickle to serialize an error message for the user
+        message = {'message': str(error)}
+        response = Response(
+            response=encode(value=message, unpicklable=False),
+            status=400,
+            mimetype='application/json'
+        )
+
+    return response
 
 
 @app.route('/items/<int:uid>')
@@ -387,6 +2168,55 @@ def create_item():
     return response
 
 
+@app.route('/items/batch', methods=['POST'])
+def create_items():
+    """
+    HTTP POST route to create a collection of To-Do items in the database
+    in a single transaction based on data supplied from the user.
+
+    JSON Payload:
+        [
+            {
+                "name": string,         <-- Required name of the item
+                "description": string,  <-- Optional description
+                "completed": boolean    <-- Optional status of the item
+            },
+            ...
+        ]
+
+    Returns:
+        Response: HTTP response object with a payload of a JSON encoded
+            string of the unique identifiers of the newly created items,
+            in the order of the payload. If any errors occurred during
+            the operation, none of the items are created and a response
+            object is returned with the error message.
+    """
+    try:
+        # Extract the attributes of each item from the payload and
+        # create all the new records in the database
+        items = [Item().from_dict(data=data) for data in get_batch_data()]
+        uids = [item.uid for item in Item.create_many(items)]
+
+        # Create the HTTP response object using jsonpickle to serialize
+        # the response data
+        response = Response(
+            response=encode(value=uids, unpicklable=False),
+            status=200,
+            mimetype='application/json'
+        )
+    except Exception as error:
+        # If any errors occurred, create the HTTP response object using
+        # jsonpickle to serialize an error message for the user
+        message = {'message': str(error)}
+        response = Response(
+            response=encode(value=message, unpicklable=False),
+            status=400,
+            mimetype='application/json'
+        )
+
+    return response
+
+
 @app.route('/items/<int:uid>', methods=['PUT'])
 def update_item(uid):
     """
@@ -415,8 +2245,8 @@ def update_item(uid):
     try:
         # Extract the required `name` attribute and optional
         # `description` and `completed` attributes and update the
-        # record in the database.
-        item = Item.fetch(uid=uid).from_dict(data=data).update()
+        # record in the database with a single statement.
+        item = Item.update_by_uid(uid, get_item_changes(data))
 
         # Create the HTTP response object using jsonpickle to serialize
         # the response data
@@ -459,8 +2289,8 @@ def partial_update_item(uid):
     try:
         # Extract the required `name` attribute and optional
         # `description` and `completed` attributes and update the
-        # record in the database.
-        item = Item.fetch(uid=uid).from_dict(data=data).update()
+        # record in the database with a single statement.
+        item = Item.update_by_uid(uid, get_item_changes(data))
 
         # Create the HTTP response object using jsonpickle to serialize
         # the response data
@@ -482,6 +2312,57 @@ def partial_update_item(uid):
     return response
 
 
+@app.route('/items', methods=['PATCH'])
+def partial_update_items():
+    """
+    HTTP PATCH route to partially update a collection of items in a
+    single transaction with attributes supplied by the payload of the
+    HTTP request.
+
+    JSON Payload:
+        [
+            {
+                "uid": integer,         <-- Required unique identifier
+                "name": string,         <-- Optional name of the item
+                "description": string,  <-- Optional description
+                "completed": boolean    <-- Optional status of the item
+            },
+            ...
+        ]
+
+    Returns:
+        Response: HTTP response object with a payload of a JSON encoded
+            string of the unique identifiers of the updated items and of
+            the items which were not found. If any errors occurred
+            during the operation, none of the items are updated and a
+            response object is returned with the error message.
+    """
+    try:
+        # Extract the attributes to update of each item and update the
+        # records in the database
+        updated, not_found = Item.update_many(get_batch_patches())
+        result = {'updated': updated, 'not_found': not_found}
+
+        # Create the HTTP response object using jsonpickle to serialize
+        # the response data
+        response = Response(
+            response=encode(value=result, unpicklable=False),
+            status=200,
+            mimetype='application/json'
+        )
+    except Exception as error:
+        # If any errors occurred, create the HTTP response object using
+        # jsonpickle to serialize an error message for the user
+        message = {'message': str(error)}
+        response = Response(
+            response=encode(value=message, unpicklable=False),
+            status=400,
+            mimetype='application/json'
+        )
+
+    return response
+
+
 @app.route('/items/<int:uid>', methods=['DELETE'])
 def delete_item(uid):
     """
@@ -496,9 +2377,9 @@ def delete_item(uid):
             response object is returned with the error message.
     """
     try:
-        # Delete the item from the database and create the HTTP response
-        # object with no payload
-        Item.fetch(uid=uid).delete()
+        # Delete the item from the database with a single statement and
+        # create the HTTP response object with no payload
+        Item(uid=uid).delete()
         response = Response(status=200)
     except Exception as error:
         # If any errors occurred, create the HTTP response object using
@@ -513,12 +2394,62 @@ def delete_item(uid):
     return response
 
 
+@app.route('/items', methods=['DELETE'])
+def delete_items():
+    """
+    HTTP DELETE route to delete a collection of items from the database,
+    either by their unique identifiers or by their status.
+
+    The items are deleted in chunks, each in its own transaction, so
+    other writers are not locked out until all the items are deleted.
+
+    JSON Payload:
+        {
+            "uids": [integer]  <-- Unique identifiers of the items
+        }
+        or
+        {
+            "completed": boolean  <-- Status of the items
+        }
+
+    Returns:
+        Response: HTTP response object with a payload of a JSON encoded
+            string of the number of deleted items. If any errors occurred
+            during the operation, a response object is returned with the
+            error message.
+    """
+    try:
+        # Delete the items from the database and create the HTTP
+        # response object using jsonpickle to serialize the number of
+        # deleted items
+        uids, completed = get_delete_filter()
+        result = {'deleted': Item.delete_many(uids=uids, completed=completed)}
+        response = Response(
+            response=encode(value=result, unpicklable=False),
+            status=200,
+            mimetype='application/json'
+        )
+    except Exception as error:
+        # If any errors occurred, create the HTTP response object using
+        # jsonpickle to serialize an error message for the user
+        message = {'message': str(error)}
+        response = Response(
+            response=encode(value=message, unpicklable=False),
+            status=400,
+            mimetype='application/json'
+        )
+
+    return response
+
+
 def create_tables():
     """
     Create any table needed for the application.
     """
-    # Establish a connection to the database
+    # Establish a connection to the database and apply the storage
+    # profile, which switches the journal mode of the database file
     connection = sqlite3.connect(db_path)
+    apply_pragmas(connection, storage_profiles[storage_profile])
     cursor = connection.cursor()
 
     try:
@@ -550,6 +2481,14 @@ def create_tables():
             connection.close()
             raise
 
+    # Create the index on the status of the items, if it does not already
+    # exist, so the items are filtered by status without scanning the
+    # whole `item` table
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS ix_item_completed ON item (completed)'
+    )
+    connection.commit()
+
     # Close the database connection
     cursor.close()
     connection.close()
@@ -1,333 +1,3002 @@
+import cProfile
+import json
+import os
+import queue
+import random
 import sqlite3
-from flask import Flask, request, Response
+import sys
+import threading
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from flask import Flask, request, Response, stream_with_context
 from functools import wraps
 from jsonpickle import encode
+from operator import attrgetter
+from werkzeug.http import quote_etag
 
 db_path = 'app.db'  # The path to the SQLite3 database file
+page_size = 100  # The default number of items in a page
+max_page_size = 1000  # The maximum number of items in a page
+# The values of the `completed` query parameter and the status of the items
+# they filter by
+statuses = {'true': True, 'false': False}
+# The fields of an item, in the order of the columns of the `item` table
+item_fields = ('uid', 'name', 'description', 'completed')
+stream_batch_size = 500  # The number of items read at a time to stream
+max_batch_size = 10000  # The maximum number of items in a batch
+in_chunk_size = 500  # The maximum number of values in an IN clause
+delete_chunk_size = 1000  # The number of items deleted at a time
+group_commit = True  # Whether or not single writes are committed in groups
+group_commit_size = 100  # The maximum number of writes per transaction
+group_commit_delay = 0.0  # The seconds to wait for more writes to group
+storage_profile = 'balanced'  # The name of the storage profile to apply
+server_timing = True  # Whether or not to send the Server-Timing header
+profile_rate = 0.0  # The share of requests profiled with cProfile
+profile_dir = 'profiles'  # The directory to save request profiles to
 app = Flask(__name__)  # The Flask application object
 
 
+# The named storage profiles, each of which holds the names and values of
+# the pragmas applied to every connection to the SQLite3 database file.
+#   - `durable`: Rollback journal and a full sync on every commit, so no
+#     committed transaction is lost even on a power failure
+#   - `balanced`: Write-ahead log, so readers do not block behind a
+#     writer, synced at checkpoints. A power failure may lose the last
+#     committed transactions, but never corrupts the database.
+#   - `throughput`: Write-ahead log which is never synced, with a larger
+#     cache and memory map. An operating system crash or a power failure
+#     may corrupt the database.
+storage_profiles = {
+    'durable': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'mmap_size': 0,
+        'cache_size': -2000,  # 2 MiB
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000  # 5 seconds
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,  # 256 MiB
+        'cache_size': -65536,  # 64 MiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000  # 5 seconds
+    },
+    'throughput': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'mmap_size': 1073741824,  # 1 GiB
+        'cache_size': -262144,  # 256 MiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 10000  # 10 seconds
+    }
+}
+
+
+def apply_pragmas(connection, pragmas):
+    """
+    Apply pragmas to a SQLite3 database connection.
+
+    The pragmas are applied in order, so the journal mode is changed
+    before any other setting.
+
+    Args:
+        connection (sqlite3.Connection): Database connection
+        pragmas (dict): Names and values of the pragmas to apply
+    """
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}').fetchall()
+
+
+class ConnectionPool(object):
+    """
+    This class represents a bounded pool of SQLite3 database connections.
+
+    Connections are opened lazily, up to the size of the pool, and are
+    reused instead of being opened and closed for every operation. This
+    saves the cost of connecting and of parsing the database schema each
+    time. A thread which checks out a connection while it already holds
+    one is given the same connection, so nested operations in a single
+    thread share one connection.
+
+    Every connection has the configured pragmas applied when it is
+    opened, or else the pragmas of the storage profile at that time, and
+    is checked for health when it is checked out. Only a connection which
+    was idle for longer than the ping interval is pinged with a
+    statement, so most checkouts do not add a statement.
+
+    Attributes:
+        path (str): The path to the SQLite3 database file
+        size (int): Maximum number of connections open at the same time
+        timeout (float): Number of seconds to wait for a free connection
+            before giving up, or `None` to wait until one is free
+        pragmas (dict): Names and values of pragmas to apply to a
+            connection when it is opened, or `None` to apply the pragmas
+            of the storage profile
+        factory (type): Class of the connections
+        ping_after (float): Number of seconds a connection is idle
+            before it is pinged when it is checked out
+        opened (int): Number of connections opened
+        checkouts (int): Number of connections checked out
+        in_use (int): Number of connections currently checked out
+    """
+
+    def __init__(self, path, size=5, timeout=5.0, pragmas=None,
+                 factory=sqlite3.Connection, ping_after=30.0):
+        """
+        Initialize a `ConnectionPool` object.
+
+        Args:
+            path (str): The path to the SQLite3 database file
+            size (int): Optional. Maximum number of connections open at
+                the same time. The default value is `5`.
+            timeout (float): Optional. Number of seconds to wait for a
+                free connection before giving up, or `None` to wait until
+                one is free. The default value is `5.0`.
+            pragmas (dict): Optional. Names and values of pragmas to
+                apply to a connection when it is opened. The default
+                value is `None`, which applies the pragmas of the storage
+                profile configured when the connection is opened.
+            factory (type): Optional. Class of the connections. The
+                default value is `sqlite3.Connection`.
+            ping_after (float): Optional. Number of seconds a connection
+                is idle before it is pinged when it is checked out. The
+                default value is `30.0`.
+        """
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self.factory = factory
+        self.ping_after = ping_after
+        self.opened = 0
+        self.checkouts = 0
+        self.in_use = 0
+        self._lock = threading.Lock()  # Guards the counters
+        self._idle = queue.LifoQueue()  # Idle connections, since when
+        self._slots = threading.BoundedSemaphore(size)  # Free pool slots
+        self._local = threading.local()  # Connection held by each thread
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager which checks out a connection from the pool and
+        returns it to the pool when the context exits.
+
+        If the current thread already holds a connection, that
+        connection is reused and only returned to the pool when the
+        outermost context exits.
+
+        Yields:
+            sqlite3.Connection: Database connection
+        """
+        if getattr(self._local, 'connection', None) is not None:
+            # The thread already holds a connection, so share it
+            yield self._local.connection
+            return
+
+        start = time.perf_counter()
+        connection = self.checkout()
+        self._local.connection = connection
+        try:
+            yield connection
+        finally:
+            self._local.connection = None
+            self.checkin(connection)
+
+            # Count the time the connection was held as time spent in
+            # the database by the current request
+            record_database_time(time.perf_counter() - start)
+
+    def checkout(self):
+        """
+        Check out a connection from the pool.
+
+        An idle connection is reused if one is healthy, otherwise a new
+        connection is opened. If all the connections of the pool are in
+        use, wait for one to be returned.
+
+        Returns:
+            sqlite3.Connection: Database connection
+
+        Raises:
+            TimeoutError: No connection was returned to the pool in time
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError('Connection pool exhausted')
+
+        try:
+            connection = self._reuse()
+            if connection is None:
+                # There is no idle connection, so open a new one
+                connection = sqlite3.connect(
+                    self.path,
+                    check_same_thread=False,
+                    factory=self.factory
+                )
+
+                # The storage profile is looked up when the connection is
+                # opened, so changing it applies to every connection
+                # opened afterwards
+                pragmas = self.pragmas
+                if pragmas is None:
+                    pragmas = storage_profiles[storage_profile]
+                apply_pragmas(connection, pragmas)
+                with self._lock:
+                    self.opened += 1
+
+        except Exception:
+            # If any error occurred, free the slot and re-raise the
+            # exception.
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+
+        return connection
+
+    def checkin(self, connection):
+        """
+        Return a checked out connection to the pool.
+
+        Any transaction left open on the connection is rolled back. If
+        that fails, the connection is closed instead of being reused.
+
+        Args:
+            connection (sqlite3.Connection): Database connection
+        """
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            self._idle.put((connection, time.monotonic()))
+        except sqlite3.Error:
+            self._close(connection)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def stats(self):
+        """
+        Get the statistics of the pool.
+
+        Returns:
+            dict: Number of connections opened and checked out, and of
+                connections currently checked out and idle
+        """
+        with self._lock:
+            return {
+                'opened': self.opened,
+                'checkouts': self.checkouts,
+                'in_use': self.in_use,
+                'idle': self._idle.qsize()
+            }
+
+    def close(self):
+        """
+        Close all the idle connections of the pool.
+        """
+        while True:
+            try:
+                self._close(self._idle.get_nowait()[0])
+            except queue.Empty:
+                break
+
+    def _reuse(self):
+        """
+        Take a healthy connection from the idle connections of the pool.
+
+        Idle connections which are no longer usable are closed and
+        discarded. A connection is only pinged if it was idle for longer
+        than the ping interval.
+
+        Returns:
+            sqlite3.Connection: Database connection, or `None` if there
+                is no healthy idle connection
+        """
+        while True:
+            try:
+                connection, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+
+            ping = time.monotonic() - idle_since > self.ping_after
+            if self._is_healthy(connection, ping):
+                return connection
+            self._close(connection)
+
+    @staticmethod
+    def _is_healthy(connection, ping=False):
+        """
+        Check whether a connection can still run a statement.
+
+        A closed connection is found without running a statement, and the
+        connection is only pinged with a statement if requested. The ping
+        runs on a plain cursor, so it is not recorded in the metrics of
+        the statements.
+
+        Args:
+            connection (sqlite3.Connection): Database connection
+            ping (bool): Optional. Whether or not to run a statement. The
+                default value is `False`.
+
+        Returns:
+            bool: Whether or not the connection is usable
+        """
+        try:
+            # Reading the number of changes fails if the connection is
+            # closed
+            connection.total_changes
+            if ping:
+                sqlite3.Cursor(connection).execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _close(connection):
+        """
+        Close a connection, ignoring any errors.
+
+        Args:
+            connection (sqlite3.Connection): Database connection
+        """
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    This class represents a SQLite3 cursor which records the duration of
+    each statement it executes in the metrics.
+    """
+
+    def execute(self, *args, **kwargs):
+        """
+        Execute a SQL statement and record its duration.
+
+        Args:
+            *args: Arguments to pass through to `sqlite3.Cursor.execute`
+            **kwargs: Keyword arguments to pass through to
+                `sqlite3.Cursor.execute`
+
+        Returns:
+            TimedCursor: The same cursor
+        """
+        start = time.perf_counter()
+        try:
+            return super().execute(*args, **kwargs)
+        finally:
+            metrics.observe_statement(time.perf_counter() - start)
+
+    def executemany(self, *args, **kwargs):
+        """
+        Execute a SQL statement for many sets of parameters and record
+        its duration.
+
+        Args:
+            *args: Arguments to pass through to
+                `sqlite3.Cursor.executemany`
+            **kwargs: Keyword arguments to pass through to
+                `sqlite3.Cursor.executemany`
+
+        Returns:
+            TimedCursor: The same cursor
+        """
+        start = time.perf_counter()
+        try:
+            return super().executemany(*args, **kwargs)
+        finally:
+            metrics.observe_statement(time.perf_counter() - start)
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    This class represents a SQLite3 database connection whose cursors
+    record the duration of each statement they execute in the metrics,
+    including the statements executed on the connection itself.
+    """
+
+    def cursor(self, factory=TimedCursor):
+        """
+        Create a cursor of the connection.
+
+        Args:
+            factory (type): Optional. Class of the cursor. The default
+                value is `TimedCursor`.
+
+        Returns:
+            sqlite3.Cursor: Cursor of the connection
+        """
+        return super().cursor(factory)
+
+    def execute(self, *args, **kwargs):
+        """
+        Execute a SQL statement with a new cursor and record its
+        duration.
+
+        `sqlite3.Connection.execute` runs the statement without calling
+        the `execute` method of its cursor, so the statement is executed
+        by a `TimedCursor` instead.
+
+        Args:
+            *args: Arguments to pass through to `sqlite3.Cursor.execute`
+            **kwargs: Keyword arguments to pass through to
+                `sqlite3.Cursor.execute`
+
+        Returns:
+            TimedCursor: The cursor which executed the statement
+        """
+        return self.cursor().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        """
+        Execute a SQL statement for many sets of parameters with a new
+        cursor and record its duration.
+
+        Args:
+            *args: Arguments to pass through to
+                `sqlite3.Cursor.executemany`
+            **kwargs: Keyword arguments to pass through to
+                `sqlite3.Cursor.executemany`
+
+        Returns:
+            TimedCursor: The cursor which executed the statement
+        """
+        return self.cursor().executemany(*args, **kwargs)
+
+
+# The pool of database connections, tuned by the storage profile, whose
+# statements are recorded in the metrics
+pool = ConnectionPool(
+    path=db_path,
+    factory=TimedConnection
+)
+
+# The pool of the single database connection of the writer thread of the
+# write queue, tuned by the storage profile. The writer has a connection
+# of its own, so it never waits for the connections held by streams, and
+# a write committed by its own thread waits for its turn rather than for
+# the timeout of the pool.
+writer_pool = ConnectionPool(
+    path=db_path,
+    size=1,
+    timeout=None,
+    factory=TimedConnection
+)
+
+
+class ItemCache(object):
+    """
+    This class represents an in-process cache of rows of the `item`
+    table, which evicts the least recently used entries.
+
+    An entry is keyed by the unique identifier of an item, or by a tuple
+    for a collection of items. Entries expire after a time to live, and
+    the least recently used entries are evicted when there are too many
+    of them or when they use too much memory. Any write to an item
+    invalidates the entry of that item and all the collections.
+
+    The generation of the cache is incremented on every invalidation.
+    Callers read it before reading rows from the database and pass it
+    on when caching them, so rows read before a concurrent write are not
+    cached.
+
+    An entry may also be cached with the version of its rows. A lookup
+    at another version misses, so rows cached before a write, even one
+    by another process, are never served as the version written.
+
+    Attributes:
+        max_entries (int): Maximum number of entries
+        max_bytes (int): Maximum estimated memory used by the entries
+        ttl (float): Number of seconds before an entry expires
+        generation (int): Number of invalidations of the cache
+        hits (int): Number of lookups which found an entry
+        misses (int): Number of lookups which did not find an entry
+        evictions (int): Number of entries evicted to make room
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024,
+                 ttl=60.0):
+        """
+        Initialize an `ItemCache` object.
+
+        Args:
+            max_entries (int): Optional. Maximum number of entries. The
+                default value is `10000`.
+            max_bytes (int): Optional. Maximum estimated memory used by
+                the entries. The default value is 64 MiB.
+            ttl (float): Optional. Number of seconds before an entry
+                expires. The default value is `60.0`.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # Entries in least recent order
+        self._collections = set()  # Keys of the collection entries
+        self._bytes = 0  # Estimated memory used by the entries
+        self._lock = threading.Lock()  # Guards the entries and counters
+
+    def get(self, key, version=None):
+        """
+        Get the rows cached for a key.
+
+        Args:
+            key (int or tuple): Unique identifier of an item, or key of
+                a collection of items
+            version (int): Optional. Current version of the rows. An
+                entry cached at another version is discarded. The
+                default value is `None`, which accepts any entry.
+
+        Returns:
+            List[tuple]: Cached rows, or `None` if there is no entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                entry[0] < time.monotonic()
+                or version is not None and entry[3] != version
+            ):
+                # The entry has expired or is stale, so discard it
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, rows, generation, version=None):
+        """
+        Cache the rows for a key, evicting the least recently used
+        entries if needed.
+
+        The rows are not cached if the cache was invalidated since they
+        were read, or if they are larger than the cache.
+
+        Args:
+            key (int or tuple): Unique identifier of an item, or key of
+                a collection of items
+            rows (List[tuple]): Rows read from the database
+            generation (int): Generation of the cache read before the
+                rows were read from the database
+            version (int): Optional. Version the rows were read at. The
+                default value is `None`, which is not a known version.
+        """
+        size = self._sizeof(rows)
+
+        with self._lock:
+            if generation != self.generation or size > self.max_bytes:
+                return
+
+            self._remove(key)
+            self._entries[key] = (
+                time.monotonic() + self.ttl,
+                size,
+                rows,
+                version
+            )
+            self._bytes += size
+            if isinstance(key, tuple):
+                self._collections.add(key)
+
+            # Evict the least recently used entries until the cache is
+            # within its limits
+            while (len(self._entries) > self.max_entries
+                   or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *uids):
+        """
+        Invalidate the entries of items and all the collection entries.
+
+        Args:
+            *uids (int): Unique identifiers of the items
+        """
+        with self._lock:
+            self.generation += 1
+            for uid in uids:
+                self._remove(uid)
+            for key in list(self._collections):
+                self._remove(key)
+
+    def clear(self):
+        """
+        Invalidate all the entries.
+        """
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._collections.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Get the statistics of the cache.
+
+        Returns:
+            dict: Number of hits, misses, evictions, and entries, and the
+                estimated memory used by the entries
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes
+            }
+
+    def _remove(self, key):
+        """
+        Remove an entry, if it exists. The lock must be held.
+
+        Args:
+            key (int or tuple): Key of the entry
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+            self._collections.discard(key)
+
+    @staticmethod
+    def _sizeof(rows):
+        """
+        Estimate the memory used by rows.
+
+        Args:
+            rows (List[tuple]): Rows read from the database
+
+        Returns:
+            int: Estimated number of bytes
+        """
+        size = sys.getsizeof(rows)
+        for row in rows:
+            size += sys.getsizeof(row) + sum(map(sys.getsizeof, row))
+        return size
+
+
+item_cache = ItemCache()  # The cache of rows of the `item` table
+
+
+class WriteQueue(object):
+    """
+    This class represents a queue of writes to the database, which are
+    run by a single writer thread and committed in groups.
+
+    The writes queued while the writer thread commits a group form the
+    next group, which is committed in one transaction, so concurrent
+    writes share the write lock and the sync of a single commit rather
+    than each waiting for their own. Each write runs in its own
+    savepoint, so a failed write is rolled back without failing the
+    other writes of its group.
+
+    Attributes:
+        pool (ConnectionPool): Pool of the connection of the writer
+            thread
+        max_size (int): Maximum number of writes per transaction
+        delay (float): Number of seconds to wait for more writes before
+            committing a group which is not full
+        groups (int): Number of committed groups
+        writes (int): Number of writes in the committed groups
+    """
+
+    def __init__(self, pool, max_size=group_commit_size,
+                 delay=group_commit_delay):
+        """
+        Initialize a `WriteQueue` object.
+
+        Args:
+            pool (ConnectionPool): Pool of the connection of the writer
+                thread
+            max_size (int): Optional. Maximum number of writes per
+                transaction. The default value is `group_commit_size`.
+            delay (float): Optional. Number of seconds to wait for more
+                writes before committing a group which is not full. The
+                default value is `group_commit_delay`.
+        """
+        self.pool = pool
+        self.max_size = max_size
+        self.delay = delay
+        self.groups = 0
+        self.writes = 0
+        self._queue = queue.Queue()  # Writes waiting for the writer thread
+        self._lock = threading.Lock()  # Guards the counters and the thread
+        self._thread = None  # The writer thread, started by the first write
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Queue a write for the writer thread.
+
+        If group commit is disabled, the write is committed on its own
+        by the calling thread instead.
+
+        Args:
+            function (Callable function): Function which runs the write
+                with a `sqlite3.Cursor` as its first argument
+            *args: Arguments to pass through to the function
+            **kwargs: Keyword arguments to pass through to the function
+
+        Returns:
+            Future: Future of the result of the function, which is
+                completed once the transaction of the write is committed
+        """
+        future = Future()
+        write = (future, function, args, kwargs)
+
+        if not group_commit:
+            self._commit([write])
+            return future
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='group-commit',
+                    daemon=True
+                )
+                self._thread.start()
+        self._queue.put(write)
+
+        return future
+
+    def run(self, function, *args, **kwargs):
+        """
+        Queue a write and wait for its transaction to be committed.
+
+        The time waited is counted as time spent in the database by the
+        request of the current thread, as the write runs on the writer
+        thread.
+
+        Args:
+            function (Callable function): Function which runs the write
+                with a `sqlite3.Cursor` as its first argument
+            *args: Arguments to pass through to the function
+            **kwargs: Keyword arguments to pass through to the function
+
+        Returns:
+            The result of the function
+        """
+        start = time.perf_counter()
+        try:
+            return self.submit(function, *args, **kwargs).result()
+        finally:
+            record_database_time(time.perf_counter() - start)
+
+    def stats(self):
+        """
+        Get the statistics of the write queue.
+
+        Returns:
+            dict: Number of committed groups, of writes in the committed
+                groups, and of queued writes
+        """
+        with self._lock:
+            return {
+                'groups': self.groups,
+                'writes': self.writes,
+                'queued': self._queue.qsize()
+            }
+
+    def close(self):
+        """
+        Commit the queued writes and stop the writer thread.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _run(self):
+        """
+        Take groups of writes off the queue and commit them, until the
+        queue is closed.
+        """
+        closed = False
+        while not closed:
+            write = self._queue.get()
+            if write is None:
+                break
+
+            # Group the writes which are already queued, and the writes
+            # queued before the delay passes, up to the maximum size
+            group = [write]
+            deadline = time.monotonic() + self.delay
+            while len(group) < self.max_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    if timeout > 0:
+                        write = self._queue.get(timeout=timeout)
+                    else:
+                        write = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                if write is None:
+                    closed = True
+                    break
+                group.append(write)
+
+            self._commit(group)
+
+    def _commit(self, group):
+        """
+        Run a group of writes in one transaction, and complete their
+        futures once the transaction is committed.
+
+        Args:
+            group (List[tuple]): Futures of the writes, with the
+                functions and arguments which run them
+        """
+        results = []  # Futures of the writes with their results or errors
+
+        try:
+            # Check out the connection of the writer thread directly, so
+            # the time it is held is not counted for the request of the
+            # thread which commits the group. The connection is returned
+            # to its pool, rather than closed, when done.
+            connection = self.pool.checkout()
+            try:
+                # Take the write lock once for the whole group
+                connection.execute('BEGIN IMMEDIATE')
+                for future, function, args, kwargs in group:
+                    cursor = connection.cursor()
+                    cursor.execute('SAVEPOINT item_write')
+                    try:
+                        result = function(cursor, *args, **kwargs)
+                        results.append((future, result, None))
+                    except Exception as error:
+                        # Only rollback this write, the other writes
+                        # of the group are still committed
+                        cursor.execute('ROLLBACK TO item_write')
+                        results.append((future, None, error))
+                    finally:
+                        cursor.execute('RELEASE item_write')
+                        cursor.close()
+                connection.commit()
+
+            except Exception:
+                # If any error occurred, rollback the database
+                # connection and re-raise the exception.
+                connection.rollback()
+                raise
+
+            finally:
+                self.pool.checkin(connection)
+
+        except Exception as error:
+            # The group was not committed, so all of its writes failed
+            for future, _, _, _ in group:
+                future.set_exception(error)
+            return
+
+        with self._lock:
+            self.groups += 1
+            self.writes += len(group)
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+# The queue of the single item writes, committed in groups by its writer
+# thread
+write_queue = WriteQueue(writer_pool)
+
+
+serializers = {}  # The compiled serializers of the registered classes
+projections = {}  # The compiled serializers of the projections of items
+json_backend = json.dumps  # The function which encodes data to JSON
+
+
+def compile_serializer(fields):
+    """
+    Compile a serializer which converts an object into a dictionary of
+    some of its attributes.
+
+    Args:
+        fields (tuple): Names of the attributes to serialize
+
+    Returns:
+        Callable function: Serializer
+    """
+    getter = attrgetter(*fields)
+    if len(fields) == 1:
+        # The getter returns a single value instead of a tuple
+        return lambda obj: {fields[0]: getter(obj)}
+    return lambda obj: dict(zip(fields, getter(obj)))
+
+
+def serializable(*fields):
+    """
+    Class decorator which registers the fields of a class to serialize.
+
+    The fields are compiled once into a serializer which converts an
+    object of the class into a dictionary, so objects do not need to be
+    inspected each time they are serialized.
+
+    Args:
+        *fields (str): Names of the attributes to serialize
+
+    Returns:
+        Callable function: Class decorator
+    """
+    def decorator(cls):
+        """
+        Register the serializer of a class. See above for details.
+
+        Args:
+            cls (type): Class to register
+
+        Returns:
+            type: The same class
+        """
+        serializers[cls] = compile_serializer(fields)
+        return cls
+
+    return decorator
+
+
+def to_primitive(data):
+    """
+    Convert objects of registered classes, including those inside lists
+    and dictionaries, into dictionaries with their compiled serializers.
+
+    Args:
+        data: Data to convert
+
+    Returns:
+        Converted data. Objects of unregistered classes are returned
+            unchanged.
+    """
+    serializer = serializers.get(type(data))
+    if serializer is not None:
+        return serializer(data)
+    if isinstance(data, list):
+        return [to_primitive(value) for value in data]
+    if isinstance(data, dict):
+        return {key: to_primitive(value) for key, value in data.items()}
+    return data
+
+
+def serialize(data):
+    """
+    Serialize data into a JSON encoded string.
+
+    Objects of registered classes are converted with their compiled
+    serializers and the result is encoded with `json_backend`. If the
+    data contains objects of any other class, the `encode` function of
+    the `jsonpickle` package is used instead.
+
+    Args:
+        data: Data to serialize
+
+    Returns:
+        str: JSON encoded string
+    """
+    try:
+        return json_backend(to_primitive(data))
+    except TypeError:
+        return encode(value=data, unpicklable=False)
+
+
+def project(items, fields):
+    """
+    Convert items into dictionaries which only hold some of their
+    fields, with a serializer compiled once for each set of fields.
+
+    Args:
+        items (List[Item]): Items to convert
+        fields (tuple): Names of the fields to keep
+
+    Returns:
+        list: Converted items, or the same items if all the fields are
+            kept
+    """
+    if fields == item_fields:
+        return items
+
+    serializer = projections.get(fields)
+    if serializer is None:
+        serializer = projections[fields] = compile_serializer(fields)
+    return [serializer(item) for item in items]
+
+
+@serializable('uid', 'name', 'description', 'completed')
 class Item(object):
     """
-    This class represents a To-Do item.
+    This class represents a To-Do item.
+
+    The attributes are stored in slots rather than in a dictionary per
+    object, as listing or streaming the items creates an object per row.
+
+    Attributes:
+        uid (int): Unique identifier for the item
+        name (str): Name of the item
+        description (str): Description of the item
+        completed (bool): Whether or not the item is completed. The
+            default value is `False`.
+    """
+
+    __slots__ = ('uid', 'name', 'description', 'completed')
+
+    def __init__(self, uid=None, name=None, description=None, completed=False):
+        """
+        Initialize an `Item` object.
+
+        Args:
+            uid (int): Optional. Unique identifier for the item
+            name (str): Optional. Name of the item
+            description (str): Optional. Description of the item
+            completed (bool): Optional. Whether or not the item is
+                completed. The default value is `False`.
+        """
+        self.uid = uid
+        self.name = name
+        self.description = description
+        self.completed = completed
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """
+        Create an `Item` object from a row of the `uid`, `name`,
+        `description`, and `completed` columns of the `item` table.
+
+        This is a row factory, so it can be assigned to the
+        `row_factory` attribute of a `sqlite3` cursor to create the items
+        directly as the rows are fetched. The slots are assigned from the
+        row without calling `__init__`.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor which fetched the row. It is
+                not used, and may be `None`.
+            row (tuple): Values of the columns
+
+        Returns:
+            Item: Item created from the row
+        """
+        item = object.__new__(cls)
+        item.uid, item.name, item.description, completed = row
+        item.completed = True if completed else False
+        return item
+
+    @classmethod
+    def row_factory(cls, columns=item_fields):
+        """
+        Get a row factory which creates `Item` objects from rows of some
+        of the columns of the `item` table.
+
+        Args:
+            columns (tuple): Optional. Names of the columns of the rows,
+                in the order of `item_fields`. The default value is
+                `item_fields`.
+
+        Returns:
+            Callable function: Row factory, which takes a cursor and a
+                row
+        """
+        if columns == item_fields:
+            return cls.from_row
+
+        def from_partial_row(cursor, row):
+            """
+            Create an `Item` object from a row of only some of the
+            columns. See above for details.
+
+            Args:
+                cursor (sqlite3.Cursor): Cursor which fetched the row
+                row (tuple): Values of the columns
+
+            Returns:
+                Item: Item created from the row
+            """
+            values = dict(zip(columns, row))
+            if 'completed' in values:
+                values['completed'] = True if values['completed'] else False
+            return cls(**values)
+
+        return from_partial_row
+
+    @classmethod
+    def fetch(cls, uid=None):
+        """
+        Create one or a collection of items with data populated from the
+        `item` table in the database.
+
+        The rows are read through the item cache, so the database is
+        only queried when they are not cached.
+
+        Args:
+            uid (int): Optional. Unique identifier of an item
+
+        Returns:
+            Item or List[Item]: If the unique identifier of an item is
+                provided, fetch and return that item from the `item`
+                table in the database. Otherwise, fetch and return a
+                collection of all items from the `item` table in the
+                database.
+
+        Raises:
+            LookupError: Item not found
+        """
+        # Get the cached rows of the item, or of all the items. Rows are
+        # cached rather than `Item` objects, as the objects are modified
+        # by their callers.
+        key = uid if uid else ('all',)
+        generation = item_cache.generation
+        rows = item_cache.get(key)
+
+        if rows is None:
+            # Check out a connection from the pool. The connection is
+            # returned to the pool, rather than closed, when done.
+            with pool.connection() as connection:
+                cursor = connection.cursor()
+
+                try:
+                    if uid:
+                        # Get the row from the `item` table in the
+                        # database which matches the unique identifier
+                        rows = cursor.execute(
+                            """
+                            SELECT uid, name, description, completed
+                            FROM item WHERE uid = ?
+                            """,
+                            (uid,)
+                        ).fetchall()
+                    else:
+                        # Get all of the rows from the `item` table in
+                        # the database
+                        rows = cursor.execute(
+                            'SELECT uid, name, description, completed '
+                            'FROM item'
+                        ).fetchall()
+
+                except Exception:
+                    # If any error occurred, rollback the database
+                    # connection and re-raise the exception.
+                    connection.rollback()
+                    raise
+
+                finally:
+                    # Close the cursor
+                    cursor.close()
+
+            item_cache.set(key, rows, generation)
+
+        if uid:
+            if not rows:
+                # The item was not found, raise an exception
+                raise LookupError('Item not found')
+
+            # The item was found, so create an `Item` object
+            return cls.from_row(None, rows[0])
+
+        # For each row, create an `Item` object
+        return [cls.from_row(None, row) for row in rows]
+
+    @classmethod
+    def fetch_many(cls, uids):
+        """
+        Create a collection of items with data populated from the `item`
+        table in the database, by their unique identifiers.
+
+        The rows are read through the item cache, and the rows which are
+        not cached are read with one `IN` query per chunk of unique
+        identifiers, rather than one query per item.
+
+        Args:
+            uids (List[int]): Unique identifiers of the items
+
+        Returns:
+            tuple: Found items as `List[Item]`, in the order of their
+                unique identifiers, and the unique identifiers of the
+                items which were not found as `List[int]`. An item is
+                only returned once, even if its unique identifier is
+                repeated.
+        """
+        # Remove the repeated unique identifiers, keeping their order
+        uids = list(dict.fromkeys(uids))
+
+        # Get the cached rows of the items. An empty list is cached for
+        # an item which was not found.
+        generation = item_cache.generation
+        rows = {}  # The rows of the items, keyed by their unique identifiers
+        missing = []  # Unique identifiers of the items which are not cached
+        for uid in uids:
+            cached = item_cache.get(uid)
+            if cached is None:
+                missing.append(uid)
+            elif cached:
+                rows[uid] = cached[0]
+
+        if missing:
+            # Check out a connection from the pool. The connection is
+            # returned to the pool, rather than closed, when done.
+            with pool.connection() as connection:
+                cursor = connection.cursor()
+
+                try:
+                    # Get the rows of the items which are not cached, a
+                    # chunk of unique identifiers at a time
+                    for start in range(0, len(missing), in_chunk_size):
+                        chunk = missing[start:start + in_chunk_size]
+                        placeholders = ', '.join('?' * len(chunk))
+                        found = cursor.execute(
+                            f"""
+                            SELECT uid, name, description, completed
+                            FROM item WHERE uid IN ({placeholders})
+                            """,
+                            chunk
+                        ).fetchall()
+                        rows.update((row[0], row) for row in found)
+
+                except Exception:
+                    # If any error occurred, rollback the database
+                    # connection and re-raise the exception.
+                    connection.rollback()
+                    raise
+
+                finally:
+                    # Close the cursor
+                    cursor.close()
+
+            # Cache the rows which were read, as `fetch` does
+            for uid in missing:
+                row = rows.get(uid)
+                item_cache.set(uid, [row] if row else [], generation)
+
+        return (
+            [cls.from_row(None, rows[uid]) for uid in uids if uid in rows],
+            [uid for uid in uids if uid not in rows]
+        )
+
+    @classmethod
+    def fetch_page(cls, after=0, limit=page_size, completed=None,
+                   fields=item_fields):
+        """
+        Create a page of items with data populated from the `item` table
+        in the database, ordered by their unique identifiers.
+
+        The rows are read through the item cache, so the database is
+        only queried when they are not cached.
+
+        Args:
+            after (int): Optional. Unique identifier after which the page
+                starts. The default value is `0`.
+            limit (int): Optional. Maximum number of items in the page.
+                The default value is `page_size`.
+            completed (bool): Optional. Status of the items in the page,
+                or `None` for items of any status. The default value is
+                `None`.
+            fields (tuple): Optional. Names of the fields to populate, in
+                the order of `item_fields`. The unique identifier is
+                always populated. The default value is `item_fields`.
+
+        Returns:
+            tuple: Collection of the items in the page as `List[Item]`
+                and whether or not there are more items after the page
+        """
+        # Only select the columns of the requested fields, and the unique
+        # identifier which the cursor of the next page is made of
+        columns = fields if 'uid' in fields else ('uid',) + fields
+
+        # Get the cached rows of the page
+        key = ('page', after, limit, completed, fields)
+        generation = item_cache.generation
+        rows = item_cache.get(key)
+
+        if rows is None:
+            # Check out a connection from the pool. The connection is
+            # returned to the pool, rather than closed, when done.
+            with pool.connection() as connection:
+                cursor = connection.cursor()
+
+                # Only filter the rows by status if requested, in which
+                # case the index on the `completed` column is used to
+                # find them
+                condition, parameters = 'uid > ?', (after, limit + 1)
+                if completed is not None:
+                    condition = 'completed = ? AND uid > ?'
+                    parameters = (completed, after, limit + 1)
+
+                try:
+                    # Get the rows of the page from the `item` table in
+                    # the database, starting after the given unique
+                    # identifier. One more row than the limit is fetched
+                    # to find out whether there is a next page.
+                    rows = cursor.execute(
+                        f"""
+                        SELECT {', '.join(columns)} FROM item
+                        WHERE {condition} ORDER BY uid LIMIT ?
+                        """,
+                        parameters
+                    ).fetchall()
+
+                except Exception:
+                    # If any error occurred, rollback the database
+                    # connection and re-raise the exception.
+                    connection.rollback()
+                    raise
+
+                finally:
+                    # Close the cursor
+                    cursor.close()
+
+            item_cache.set(key, rows, generation)
+
+        # For each row in the page, create an `Item` object with the
+        # selected columns
+        factory = cls.row_factory(columns)
+        result = [factory(None, row) for row in rows[:limit]]
+        return result, len(rows) > limit
+
+    @classmethod
+    def search(cls, query, offset=0, limit=page_size):
+        """
+        Create a page of the items which match a full-text search query,
+        ranked by relevance, with data populated from the `item` table in
+        the database.
+
+        The items are found through the `item_search` full-text index.
+        The rows are read through the item cache, so the database is
+        only queried when they are not cached.
+
+        Args:
+            query (str): FTS5 query
+            offset (int): Optional. Number of results before the page.
+                The default value is `0`.
+            limit (int): Optional. Maximum number of items in the page.
+                The default value is `page_size`.
+
+        Returns:
+            tuple: Collection of the items in the page as `List[Item]`
+                and whether or not there are more items after the page
+        """
+        # Get the cached rows of the page
+        key = ('search', query, offset, limit)
+        generation = item_cache.generation
+        rows = item_cache.get(key)
+
+        if rows is None:
+            # Check out a connection from the pool. The connection is
+            # returned to the pool, rather than closed, when done.
+            with pool.connection() as connection:
+                cursor = connection.cursor()
+
+                try:
+                    # Get the rows of the page from the `item` table in
+                    # the database in order of the rank of the matches.
+                    # One more row than the limit is fetched to find out
+                    # whether there is a next page.
+                    rows = cursor.execute(
+                        """
+                        SELECT item.uid, item.name, item.description,
+                            item.completed
+                        FROM item_search
+                        JOIN item ON item.uid = item_search.rowid
+                        WHERE item_search MATCH ?
+                        ORDER BY item_search.rank LIMIT ? OFFSET ?
+                        """,
+                        (query, limit + 1, offset)
+                    ).fetchall()
+
+                except Exception:
+                    # If any error occurred, rollback the database
+                    # connection and re-raise the exception.
+                    connection.rollback()
+                    raise
+
+                finally:
+                    # Close the cursor
+                    cursor.close()
+
+            item_cache.set(key, rows, generation)
+
+        # For each row in the page, create an `Item` object
+        result = [cls.from_row(None, row) for row in rows[:limit]]
+        return result, len(rows) > limit
+
+    @classmethod
+    def iterate(cls, batch_size=stream_batch_size, completed=None):
+        """
+        Lazily create all the items with data populated from the `item`
+        table in the database, ordered by their unique identifiers.
+
+        Rows are read from the database in batches, so only one batch is
+        held in memory at a time. The connection is checked out from the
+        pool until all the items are generated or the generator is
+        closed.
+
+        Args:
+            batch_size (int): Optional. Number of rows to read at a time.
+                The default value is `stream_batch_size`.
+            completed (bool): Optional. Status of the items, or `None`
+                for items of any status. The default value is `None`.
+
+        Yields:
+            Item: Item created from a row of the `item` table
+        """
+        # Check out a connection directly, as the generator may not be
+        # resumed in the thread which started it
+        connection = pool.checkout()
+        cursor = connection.cursor()
+
+        # The cursor creates an `Item` object from each row
+        cursor.row_factory = cls.from_row
+
+        try:
+            if completed is None:
+                cursor.execute(
+                    'SELECT uid, name, description, completed FROM item '
+                    'ORDER BY uid'
+                )
+            else:
+                cursor.execute(
+                    'SELECT uid, name, description, completed FROM item '
+                    'WHERE completed = ? ORDER BY uid',
+                    (completed,)
+                )
+
+            # Fetch the items a batch at a time
+            items = cursor.fetchmany(batch_size)
+            while items:
+                yield from items
+                items = cursor.fetchmany(batch_size)
+
+        finally:
+            # Close the cursor and return the connection to the pool
+            cursor.close()
+            pool.checkin(connection)
+
+    def create(self):
+        """
+        Create the item in the database.
+
+        Returns:
+            Item: Allow for method chaining of self
+
+        Raises:
+            Exception: Any errors encountered when inserting a new row
+                to the database
+        """
+        # Queue the insert for the writer thread, which commits it with
+        # the other writes queued at the same time, and populate the
+        # `uid` attribute with the auto-generated unique identifier
+        self.uid = write_queue.run(self._insert)
+
+        # Invalidate the cached rows of the item and of all the
+        # collections of items
+        item_cache.invalidate(self.uid)
+
+        return self
+
+    def _insert(self, cursor):
+        """
+        Insert a new row to the `item` table with the values from the
+        current object.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor of the transaction of the
+                writer thread
+
+        Returns:
+            int: Auto-generated unique identifier of the item
+        """
+        cursor.execute(
+            """
+            INSERT INTO item (name, description, completed)
+            VALUES (?, ?, ?)
+            """,
+            (self.name, self.description, self.completed)
+        )
+        return cursor.lastrowid
+
+    @classmethod
+    def create_many(cls, items):
+        """
+        Create a collection of items in the database in a single
+        transaction.
+
+        Returns:
+            List[Item]: The same items, with their `uid` attributes
+                populated
+
+        Raises:
+            Exception: Any errors encountered when inserting the new
+                rows to the database. If any error occurred, none of the
+                items are created.
+        """
+        if not items:
+            return items
+
+        # Check out a connection from the pool. The connection is
+        # returned to the pool, rather than closed, when done.
+        with pool.connection() as connection:
+            cursor = connection.cursor()
+
+            try:
+                # Insert all the new rows to the database with a single
+                # statement. The unique identifiers are assigned in
+                # sequence within the transaction, so they are derived
+                # from the last auto-generated unique identifier.
+                cursor.executemany(
+                    """
+                    INSERT INTO item (name, description, completed)
+                    VALUES (?, ?, ?)
+                    """,
+                    [
+                        (item.name, item.description, item.completed)
+                        for item in items
+                    ]
+                )
+                last_uid = cursor.execute(
+                    'SELECT last_insert_rowid()'
+                ).fetchone()[0]
+                connection.commit()
+
+                first_uid = last_uid - len(items) + 1
+                for uid, item in enumerate(items, start=first_uid):
+                    item.uid = uid
+
+                # Invalidate the cached rows of the items and of all the
+                # collections of items
+                item_cache.invalidate(*[item.uid for item in items])
+
+            except Exception:
+                # If any error occurred, rollback the database connection
+                # and re-raise the exception.
+                connection.rollback()
+                raise
+
+            finally:
+                # Close the cursor
+                cursor.close()
+
+        return items
+
+    def update(self):
+        """
+        Update the item in the database.
+
+        Returns:
+            Item: Allow for method chaining of self
+
+        Raises:
+            LookupError: Item not found
+            Exception: Any errors encountered when inserting a new row
+                to the database
+        """
+        # Queue the update for the writer thread, which commits it with
+        # the other writes queued at the same time
+        write_queue.run(self._update)
+
+        # Invalidate the cached rows of the item and of all the
+        # collections of items
+        item_cache.invalidate(self.uid)
+
+        return self
+
+    def _update(self, cursor):
+        """
+        Update the matching row in the `item` table with the values from
+        the current object.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor of the transaction of the
+                writer thread
+
+        Raises:
+            LookupError: Item not found
+        """
+        # If no row was updated, then the item was not found, so raise an
+        # exception.
+        cursor.execute(
+            """
+            UPDATE item SET name = ?, description = ?, completed = ?
+            WHERE uid = ?
+            """,
+            (self.name, self.description, self.completed, self.uid)
+        )
+        if not cursor.rowcount:
+            raise LookupError('Item not found')
+
+    @classmethod
+    def update_by_uid(cls, uid, changes):
+        """
+        Update the attributes of an item in the database without fetching
+        the item first.
+
+        Only the columns of the changed attributes are updated, and the
+        updated row is returned by the same statement.
+
+        Args:
+            uid (int): Unique identifier of the item
+            changes (dict): Attributes to update, keyed by their names
+
+        Returns:
+            Item: Updated item
+
+        Raises:
+            LookupError: Item not found
+            Exception: Any errors encountered when updating the row of
+                the database
+        """
+        # Queue the update for the writer thread, which commits it with
+        # the other writes queued at the same time
+        item = write_queue.run(cls._update_by_uid, uid, changes)
+
+        # Invalidate the cached rows of the item and of all the
+        # collections of items
+        item_cache.invalidate(uid)
+
+        return item
+
+    @classmethod
+    def _update_by_uid(cls, cursor, uid, changes):
+        """
+        Update the changed columns of the matching row in the `item`
+        table and return the updated row.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor of the transaction of the
+                writer thread
+            uid (int): Unique identifier of the item
+            changes (dict): Attributes to update, keyed by their names
+
+        Returns:
+            Item: Updated item
+
+        Raises:
+            LookupError: Item not found
+        """
+        # If no attribute is changed, the status is assigned to itself, so
+        # the statement still finds the item and returns its row
+        assignments = ', '.join(f'{key} = ?' for key in changes)
+        assignments = assignments or 'completed = completed'
+
+        # If no row was returned, then the item was not found, so raise an
+        # exception.
+        cursor.row_factory = cls.from_row
+        item = cursor.execute(
+            f"""
+            UPDATE item SET {assignments} WHERE uid = ?
+            RETURNING uid, name, description, completed
+            """,
+            list(changes.values()) + [uid]
+        ).fetchone()
+        if item is None:
+            raise LookupError('Item not found')
+
+        return item
+
+    @classmethod
+    def update_many(cls, patches):
+        """
+        Partially update a collection of items in the database in a
+        single transaction.
+
+        Items which are updated with the same attributes are updated with
+        a single grouped statement.
+
+        Args:
+            patches (dict): Attributes to update of each item, keyed by
+                the unique identifiers of the items
+
+        Returns:
+            tuple: Unique identifiers of the updated items and of the
+                items which were not found, each as `List[int]`
+
+        Raises:
+            Exception: Any errors encountered when updating the rows of
+                the database. If any error occurred, none of the items
+                are updated.
+        """
+        uids = list(patches)
+        found = set()  # Unique identifiers of the items which exist
+
+        # Check out a connection from the pool. The connection is
+        # returned to the pool, rather than closed, when done.
+        with pool.connection() as connection:
+            cursor = connection.cursor()
+
+            try:
+                # Take the write lock before finding which items exist,
+                # so they cannot be deleted before they are updated
+                cursor.execute('BEGIN IMMEDIATE')
+                for start in range(0, len(uids), in_chunk_size):
+                    chunk = uids[start:start + in_chunk_size]
+                    placeholders = ', '.join('?' * len(chunk))
+                    rows = cursor.execute(
+                        f'SELECT uid FROM item WHERE uid IN ({placeholders})',
+                        chunk
+                    )
+                    found.update(row[0] for row in rows)
+
+                # Group the updates of the items by the attributes which
+                # are updated, and update each group with one statement
+                groups = {}
+                for uid in uids:
+                    if uid in found and patches[uid]:
+                        keys = tuple(sorted(patches[uid]))
+                        values = [patches[uid][key] for key in keys]
+                        groups.setdefault(keys, []).append(values + [uid])
+
+                for keys, parameters in groups.items():
+                    assignments = ', '.join(f'{key} = ?' for key in keys)
+                    cursor.executemany(
+                        f'UPDATE item SET {assignments} WHERE uid = ?',
+                        parameters
+                    )
+                connection.commit()
+
+            except Exception:
+                # If any error occurred, rollback the database connection
+                # and re-raise the exception.
+                connection.rollback()
+                raise
+
+            finally:
+                # Close the cursor
+                cursor.close()
+
+        # Invalidate the cached rows of the updated items and of all the
+        # collections of items
+        updated = [uid for uid in uids if uid in found]
+        item_cache.invalidate(*updated)
+
+        return updated, [uid for uid in uids if uid not in found]
+
+    def delete(self):
+        """
+        Delete the item from the database.
+
+        Returns:
+            Item: Allow for method chaining of self
+
+        Raises:
+            LookupError: Item not found
+            Exception: Any errors encountered when inserting a new row
+                to the database
+        """
+        # Queue the delete for the writer thread, which commits it with
+        # the other writes queued at the same time
+        write_queue.run(self._delete)
+
+        # Invalidate the cached rows of the item and of all the
+        # collections of items
+        item_cache.invalidate(self.uid)
+
+        # Clear the uid as it has been removed from the database
+        self.uid = 0
+
+        return self
+
+    def _delete(self, cursor):
+        """
+        Delete the matching row from the `item` table.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor of the transaction of the
+                writer thread
+
+        Raises:
+            LookupError: Item not found
+        """
+        # If no row was deleted, then the item was not found, so raise an
+        # exception.
+        cursor.execute('DELETE FROM item WHERE uid = ?', (self.uid,))
+        if not cursor.rowcount:
+            raise LookupError('Item not found')
+
+    @classmethod
+    def fetch_version(cls, uid=None):
+        """
+        Fetch the version of one item or of the collection of all items.
+
+        The version changes whenever the item, or any item for the
+        collection, is created, updated, or deleted. It is read from the
+        change tracking tables without reading the `item` table.
+
+        Args:
+            uid (int): Optional. Unique identifier of an item
+
+        Returns:
+            int: If the unique identifier of an item is provided, the
+                version of that item, or `None` if it is not known.
+                Otherwise, the version of the collection of all items.
+        """
+        # Check out a connection from the pool. The connection is
+        # returned to the pool, rather than closed, when done.
+        with pool.connection() as connection:
+            cursor = connection.cursor()
+
+            try:
+                if uid:
+                    row = cursor.execute(
+                        'SELECT version FROM item_version WHERE uid = ?',
+                        (uid,)
+                    ).fetchone()
+                else:
+                    row = cursor.execute(
+                        "SELECT value FROM change_counter WHERE name = 'item'"
+                    ).fetchone()
+
+            finally:
+                # Close the cursor
+                cursor.close()
+
+        if row:
+            return row[0]
+        return None if uid else 0
+
+    @classmethod
+    def fetch_with_version(cls, uid, version=None):
+        """
+        Create an item with data populated from the `item` table in the
+        database, along with the version its row was read at.
+
+        The cached row of the item is only used if it was cached at the
+        given version. Otherwise, the row and its version are read with
+        a single statement, so the item always matches its version.
+
+        Args:
+            uid (int): Unique identifier of the item
+            version (int): Optional. Current version of the item, as read
+                with `fetch_version`
+
+        Returns:
+            tuple: Item, and the version of the item or `None` if it is
+                not known
+
+        Raises:
+            LookupError: Item not found
+        """
+        # Get the cached row of the item, if it was cached at the current
+        # version of the item
+        generation = item_cache.generation
+        rows = None
+        if version is not None:
+            rows = item_cache.get(uid, version=version)
+
+        if rows is None:
+            # Check out a connection from the pool. The connection is
+            # returned to the pool, rather than closed, when done.
+            with pool.connection() as connection:
+                cursor = connection.cursor()
+
+                try:
+                    # Get the row from the `item` table in the database
+                    # which matches the unique identifier, with its
+                    # version from the same snapshot
+                    rows = cursor.execute(
+                        """
+                        SELECT item.uid, name, description, completed,
+                            item_version.version
+                        FROM item LEFT JOIN item_version
+                            ON item_version.uid = item.uid
+                        WHERE item.uid = ?
+                        """,
+                        (uid,)
+                    ).fetchall()
+
+                finally:
+                    # Close the cursor
+                    cursor.close()
+
+            version = rows[0][4] if rows else None
+            rows = [row[:4] for row in rows]
+            item_cache.set(uid, rows, generation, version=version)
+
+        if not rows:
+            # The item was not found, raise an exception
+            raise LookupError('Item not found')
+
+        # The item was found, so create an `Item` object
+        return cls.from_row(None, rows[0]), version
+
+    @classmethod
+    def delete_many(cls, uids=None, completed=None):
+        """
+        Delete a collection of items from the database, either by their
+        unique identifiers or by their status.
+
+        The items are deleted with set-based statements in chunks, each
+        in its own transaction, so the write lock of the database is
+        released between chunks. If an error occurs, the chunks which
+        were already deleted stay deleted.
+
+        Args:
+            uids (List[int]): Optional. Unique identifiers of the items
+            completed (bool): Optional. Status of the items, used if the
+                unique identifiers are not provided
+
+        Returns:
+            int: Number of deleted items
+
+        Raises:
+            Exception: Any errors encountered when deleting rows from
+                the database
+        """
+        deleted = 0  # Number of deleted items
+
+        # Check out a connection from the pool. The connection is
+        # returned to the pool, rather than closed, when done.
+        with pool.connection() as connection:
+            cursor = connection.cursor()
+
+            try:
+                if uids is not None:
+                    # Delete the matching rows from the database, a chunk
+                    # of unique identifiers at a time
+                    for start in range(0, len(uids), in_chunk_size):
+                        chunk = uids[start:start + in_chunk_size]
+                        placeholders = ', '.join('?' * len(chunk))
+                        cursor.execute(
+                            f'DELETE FROM item WHERE uid IN ({placeholders})',
+                            chunk
+                        )
+                        deleted += cursor.rowcount
+                        connection.commit()
+                        item_cache.invalidate(*chunk)
+                else:
+                    # Delete the rows with the matching status from the
+                    # database, a chunk of rows at a time, until a chunk
+                    # is not full
+                    rowcount = delete_chunk_size
+                    while rowcount == delete_chunk_size:
+                        cursor.execute(
+                            """
+                            DELETE FROM item WHERE uid IN (
+                                SELECT uid FROM item WHERE completed = ?
+                                LIMIT ?
+                            )
+                            """,
+                            (completed, delete_chunk_size)
+                        )
+                        rowcount = cursor.rowcount
+                        deleted += rowcount
+                        connection.commit()
+
+                        # The deleted items are not known, so clear the
+                        # cache once each chunk is committed, as it stays
+                        # deleted even if a later chunk fails
+                        item_cache.clear()
+
+            except Exception:
+                # If any error occurred, rollback the database connection
+                # and re-raise the exception.
+                connection.rollback()
+                raise
+
+            finally:
+                # Close the cursor
+                cursor.close()
+
+        return deleted
+
+    def from_dict(self, data):
+        """
+        Deserialize a dictionary to populate the attributes of the
+        current object.
+
+        Only attributes of the current object which are in the
+        dictionary are updated. The unique identifier is not updated.
+
+        Args:
+            data (dict): Dictionary containing all or partial attributes
+                to deserialize.
+
+        Returns:
+            Item: Allow for method chaining of self
+        """
+        try:
+            if 'name' in data:
+                self.name = data['name']
+            if 'description' in data:
+                self.description = data['description']
+            if 'completed' in data:
+                self.completed = data['completed']
+        except TypeError:
+            pass
+
+        return self
+
+
+# The upper bounds in seconds of the buckets of the latency histograms
+latency_buckets = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+    2.5, 5.0
+)
+
+
+class Histogram(object):
+    """
+    This class represents a histogram of observed durations, with
+    cumulative buckets as in the Prometheus text format.
+
+    Attributes:
+        buckets (tuple): Upper bounds in seconds of the buckets
+        counts (List[int]): Number of observations in each bucket, not
+            cumulative, with a last bucket for the observations above
+            all the bounds
+        sum (float): Sum of the observations
+        count (int): Number of observations
+    """
+
+    def __init__(self, buckets=latency_buckets):
+        """
+        Initialize a `Histogram` object.
+
+        Args:
+            buckets (tuple): Optional. Upper bounds in seconds of the
+                buckets. The default value is `latency_buckets`.
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        """
+        Add an observation to the histogram. The caller must hold the
+        lock of the metrics.
+
+        Args:
+            seconds (float): Observed duration
+        """
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def samples(self, name, labels):
+        """
+        Format the samples of the histogram in the Prometheus text
+        format.
+
+        Args:
+            name (str): Name of the metric
+            labels (dict): Labels of the histogram
+
+        Returns:
+            List[str]: Lines of the samples
+        """
+        lines = []
+        cumulative = 0
+        bounds = [repr(bound) for bound in self.buckets] + ['+Inf']
+        for bound, count in zip(bounds, self.counts):
+            cumulative += count
+            bucket_labels = dict(labels, le=bound)
+            lines.append(
+                f'{name}_bucket{format_labels(bucket_labels)} {cumulative}'
+            )
+        lines.append(f'{name}_sum{format_labels(labels)} {self.sum!r}')
+        lines.append(f'{name}_count{format_labels(labels)} {self.count}')
+        return lines
+
+
+class Metrics(object):
+    """
+    This class represents the metrics of the application, which are
+    exposed in the Prometheus text format.
+
+    Requests are recorded by route and method, with their latency in a
+    histogram and their count by status code. SQL statements are
+    recorded with their duration in a histogram.
 
     Attributes:
-        uid (int): Unique identifier for the item
-        name (str): Name of the item
-        description (str): Description of the item
-        completed (bool): Whether or not the item is completed. The
-            default value is `False`.
+        buckets (tuple): Upper bounds in seconds of the buckets of the
+            histograms
     """
 
-    def __init__(self, uid=None, name=None, description=None, completed=False):
+    def __init__(self, buckets=latency_buckets):
         """
-        Initialize an `Item` object.
+        Initialize a `Metrics` object.
 
         Args:
-            uid (int): Optional. Unique identifier for the item
-            name (str): Optional. Name of the item
-            description (str): Optional. Description of the item
-            completed (bool): Optional. Whether or not the item is
-                completed. The default value is `False`.
+            buckets (tuple): Optional. Upper bounds in seconds of the
+                buckets of the histograms. The default value is
+                `latency_buckets`.
         """
-        self.uid = uid
-        self.name = name
-        self.description = description
-        self.completed = completed
+        self.buckets = buckets
+        self._latencies = {}  # Request latencies by route and method
+        self._statuses = {}  # Request counts by route, method, and status
+        self._statements = Histogram(buckets)  # SQL statement durations
+        self._lock = threading.Lock()  # Guards the recorded metrics
 
-    @classmethod
-    def fetch(cls, uid=None):
+    def observe_request(self, route, method, status_code, seconds):
         """
-        Create one or a collection of items with data populated from the
-        `item` table in the database.
+        Record a handled request.
 
         Args:
-            uid (int): Optional. Unique identifier of an item
+            route (str): Rule of the route which handled the request
+            method (str): HTTP method of the request
+            status_code (int): Status code of the response
+            seconds (float): Latency of the request
+        """
+        with self._lock:
+            histogram = self._latencies.get((route, method))
+            if histogram is None:
+                histogram = Histogram(self.buckets)
+                self._latencies[(route, method)] = histogram
+            histogram.observe(seconds)
+
+            key = (route, method, status_code)
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+
+    def observe_statement(self, seconds):
+        """
+        Record an executed SQL statement.
+
+        Args:
+            seconds (float): Duration of the statement
+        """
+        with self._lock:
+            self._statements.observe(seconds)
+
+    def clear(self):
+        """
+        Discard all the recorded metrics.
+        """
+        with self._lock:
+            self._latencies.clear()
+            self._statuses.clear()
+            self._statements = Histogram(self.buckets)
+
+    def render(self):
+        """
+        Format the recorded metrics in the Prometheus text format.
 
         Returns:
-            Item or List[Item]: If the unique identifier of an item is
-                provided, fetch and return that item from the `item`
-                table in the database. Otherwise, fetch and return a
-                collection of all items from the `item` table in the
-                database.
+            List[str]: Lines of the metrics
+        """
+        with self._lock:
+            lines = format_metric_header(
+                'todo_http_request_duration_seconds',
+                'histogram',
+                'Latency of HTTP requests by route and method.'
+            )
+            for (route, method), histogram in sorted(self._latencies.items()):
+                labels = {'route': route, 'method': method}
+                lines += histogram.samples(
+                    'todo_http_request_duration_seconds',
+                    labels
+                )
+
+            lines += format_metric_header(
+                'todo_http_requests_total',
+                'counter',
+                'Number of HTTP requests by route, method, and status code.'
+            )
+            for (route, method, status), count in sorted(
+                self._statuses.items()
+            ):
+                labels = {'route': route, 'method': method, 'status': status}
+                lines.append(
+                    f'todo_http_requests_total{format_labels(labels)} {count}'
+                )
+
+            lines += format_metric_header(
+                'todo_sql_statement_duration_seconds',
+                'histogram',
+                'Duration of executed SQL statements.'
+            )
+            lines += self._statements.samples(
+                'todo_sql_statement_duration_seconds',
+                {}
+            )
+
+        return lines
+
+
+def format_labels(labels):
+    """
+    Format the labels of a sample in the Prometheus text format.
+
+    Args:
+        labels (dict): Names and values of the labels
+
+    Returns:
+        str: Formatted labels, or an empty string if there are none
+    """
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        pairs.append(f'{name}="{value}"'.replace('\n', '\\n'))
+    return '{' + ','.join(pairs) + '}'
+
+
+def format_metric_header(name, kind, description):
+    """
+    Format the header lines of a metric in the Prometheus text format.
+
+    Args:
+        name (str): Name of the metric
+        kind (str): Type of the metric, such as `counter`, `gauge`, or
+            `histogram`
+        description (str): Description of the metric
+
+    Returns:
+        List[str]: Header lines of the metric
+    """
+    return [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+
+
+def format_metric(name, kind, description, value):
+    """
+    Format a metric with a single unlabelled sample in the Prometheus
+    text format.
+
+    Args:
+        name (str): Name of the metric
+        kind (str): Type of the metric, such as `counter` or `gauge`
+        description (str): Description of the metric
+        value (float): Value of the sample
+
+    Returns:
+        List[str]: Lines of the metric
+    """
+    return format_metric_header(name, kind, description) + [f'{name} {value}']
+
+
+metrics = Metrics()  # The metrics of the application
+
+
+def record_request_metrics(name, status_code, timings):
+    """
+    Timing hook which records the latency and status code of a request
+    in the metrics, by the rule of its route and its method.
+
+    Args:
+        name (str): Name of the function which handled the request
+        status_code (int): Status code of the response
+        timings (dict): Number of seconds spent in each phase
+    """
+    rule = request.url_rule
+    route = rule.rule if rule is not None else request.path
+
+    # The database time is spent within the handler, so it is not added
+    seconds = sum(timings.values()) - timings.get('db', 0)
+    metrics.observe_request(route, request.method, status_code, seconds)
+
+
+def render_metrics():
+    """
+    Format the metrics of the application, of the pool of database
+    connections, of the item cache, and of the write queue in the
+    Prometheus text format.
+
+    Returns:
+        str: Metrics in the Prometheus text format
+    """
+    lines = metrics.render()
+
+    stats = pool.stats()
+    lines += format_metric(
+        'todo_db_connections_opened_total', 'counter',
+        'Number of database connections opened.', stats['opened']
+    )
+    lines += format_metric(
+        'todo_db_connection_checkouts_total', 'counter',
+        'Number of database connection checkouts.', stats['checkouts']
+    )
+    lines += format_metric(
+        'todo_db_connections_in_use', 'gauge',
+        'Number of database connections in use.', stats['in_use']
+    )
+    lines += format_metric(
+        'todo_db_connections_idle', 'gauge',
+        'Number of idle database connections.', stats['idle']
+    )
+
+    stats = item_cache.stats()
+    lines += format_metric(
+        'todo_cache_hits_total', 'counter',
+        'Number of item cache lookups which found an entry.', stats['hits']
+    )
+    lines += format_metric(
+        'todo_cache_misses_total', 'counter',
+        'Number of item cache lookups which found no entry.',
+        stats['misses']
+    )
+    lines += format_metric(
+        'todo_cache_evictions_total', 'counter',
+        'Number of item cache entries evicted.', stats['evictions']
+    )
+    lines += format_metric(
+        'todo_cache_entries', 'gauge',
+        'Number of item cache entries.', stats['entries']
+    )
+    lines += format_metric(
+        'todo_cache_bytes', 'gauge',
+        'Estimated memory used by the item cache entries.', stats['bytes']
+    )
+
+    stats = write_queue.stats()
+    lines += format_metric(
+        'todo_write_groups_total', 'counter',
+        'Number of groups of writes committed.', stats['groups']
+    )
+    lines += format_metric(
+        'todo_writes_total', 'counter',
+        'Number of writes committed in groups.', stats['writes']
+    )
+    lines += format_metric(
+        'todo_writes_queued', 'gauge',
+        'Number of writes waiting for the writer thread.', stats['queued']
+    )
+
+    return '\n'.join(lines) + '\n'
+
+
+# Callables which receive the timings of each request
+timing_hooks = [record_request_metrics]
+request_timings = threading.local()  # The timings of each thread's request
+
+
+def record_database_time(seconds):
+    """
+    Add time spent in the database to the timings of the request handled
+    by the current thread.
+
+    Args:
+        seconds (float): Number of seconds spent in the database
+    """
+    total = getattr(request_timings, 'database', 0)
+    request_timings.database = total + seconds
+
+
+def format_server_timing(timings):
+    """
+    Format the timings of a request as a `Server-Timing` header value.
+
+    Args:
+        timings (dict): Number of seconds spent in each phase
+
+    Returns:
+        str: Header value with the duration of each phase in milliseconds
+    """
+    return ', '.join(
+        f'{name};dur={seconds * 1000:.3f}' for name, seconds in timings.items()
+    )
+
+
+def save_profile(profiler, name):
+    """
+    Save the statistics of a profiled request to `profile_dir`, to be
+    loaded with the `pstats` module or a profile viewer.
+
+    Args:
+        profiler (cProfile.Profile): Profiler which profiled the request
+        name (str): Name of the function which handled the request
+
+    Returns:
+        str: The path to the file of the statistics
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, f'{name}-{time.time_ns()}.prof')
+    profiler.dump_stats(path)
+    return path
+
+
+def create_response(function):
+    """
+    Wrapper decorator which wraps a function and creates a response from
+    the results.
+
+    The wrapped function is called with all the passed arguments and
+    keyword arguments and returned data is saved. All exceptions are
+    caught and an error message is created from the exception.
+
+    A Flask response object is created where the payload is a JSON
+    serialized string of the results (or error message) created with
+    the `serialize` function. The status code
+    is 200 if no exceptions are raised, 404 if a lookup exception was
+    raise, and 400 for all other exceptions.
+
+    If the wrapped function returns a tuple, the first element is the
+    data to serialize and the second element is a dictionary of headers
+    to add to the response. If the wrapped function returns a response
+    object, it is returned as is.
+
+    Each request is timed by phase: the wrapped function (`handler`),
+    the database work within it (`db`), serializing the data
+    (`serialize`), and building the response (`response`). The timings
+    are passed to each of the `timing_hooks` and, if `server_timing` is
+    enabled, sent in the `Server-Timing` response header. A share of
+    `profile_rate` requests are profiled with cProfile and saved with
+    `save_profile`.
+
+    Args:
+        function (Callable function): Function to wrap
+
+    Returns:
+        Callable function: Wrapped function
+    """
+
+    @wraps(wrapped=function)
+    def wrapper(*args, **kwargs):
+        """
+        Wrap a function. See above for details.
+
+        Args:
+            *args: Arguments to pass through to the wrapped function
+            **kwargs: Keyword arguments to pass through to the wrapped
+                function
+
+        Returns:
+            Response: Flask response object
+        """
+        headers = {}  # Contains the headers of the response
+        timings = {}  # Contains the number of seconds of each phase
+
+        # Sample the request for profiling
+        profiler = None
+        if profile_rate and random.random() < profile_rate:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        request_timings.database = 0
+        start = time.perf_counter()
+
+        try:
+            # Execute the function and store any returned data. A tuple
+            # holds both the data and the headers of the response.
+            data = function(*args, **kwargs)
+            if isinstance(data, tuple):
+                data, headers = data
+            status_code = 200
+
+        except Exception as error:
+            # Create a message for the user on any raised exceptions and
+            # change the status code based on the exception type
+            data = {'message': str(error)}
+            status_code = 404 if isinstance(error, LookupError) else 400
+
+        end = time.perf_counter()
+        timings['handler'] = end - start
+        timings['db'] = request_timings.database
+
+        # A response object is returned as is, for example when its
+        # payload is streamed
+        if isinstance(data, Response):
+            response = data
+            status_code = response.status_code
+
+        else:
+            # Create the response object with serialized data. The
+            # payload is set to `None` if there was no result from the
+            # called function, this is to ensure an empty payload.
+            start = end
+            if data is not None:
+                data = serialize(data)
+            end = time.perf_counter()
+            timings['serialize'] = end - start
+
+            start = end
+            response = Response(
+                response=data,
+                status=status_code,
+                headers=headers,
+                mimetype='application/json'
+            )
+            timings['response'] = time.perf_counter() - start
+
+        if profiler is not None:
+            profiler.disable()
+            save_profile(profiler, function.__qualname__)
+
+        # Report the timings of the request
+        for hook in timing_hooks:
+            hook(function.__qualname__, status_code, timings)
+        if server_timing:
+            response.headers['Server-Timing'] = format_server_timing(timings)
+
+        return response
+
+    return wrapper
+
+
+def encode_cursor(uid):
+    """
+    Encode the unique identifier of the last item of a page into an
+    opaque cursor which is used to fetch the next page.
+
+    Args:
+        uid (int): Unique identifier of the last item of a page
+
+    Returns:
+        str: Opaque cursor
+    """
+    return urlsafe_b64encode(str(uid).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode an opaque cursor into the unique identifier of the last item
+    of the previous page.
+
+    Args:
+        cursor (str): Opaque cursor
+
+    Returns:
+        int: Unique identifier of the last item of the previous page
+
+    Raises:
+        ValueError: Invalid cursor
+    """
+    try:
+        # The padding is stripped when encoding, so add it back
+        padding = '=' * (-len(cursor) % 4)
+        return int(urlsafe_b64decode(cursor + padding).decode())
+    except ValueError:
+        raise ValueError('Invalid cursor')
+
+
+def get_page_arguments():
+    """
+    Get the pagination arguments from the query string of the HTTP
+    request.
+
+    Query Parameters:
+        limit (int): Optional. Maximum number of items in the page. The
+            value is capped to `max_page_size`.
+        cursor (str): Optional. Cursor returned with the previous page
+
+    Returns:
+        tuple: The unique identifier after which the page starts and the
+            maximum number of items in the page
+
+    Raises:
+        ValueError: Invalid limit or cursor
+    """
+    try:
+        limit = int(request.args.get('limit', page_size))
+    except ValueError:
+        raise ValueError('Invalid limit')
+    if limit < 1:
+        raise ValueError('Invalid limit')
+
+    cursor = request.args.get('cursor')
+    after = decode_cursor(cursor) if cursor else 0
+
+    return after, min(limit, max_page_size)
+
+
+def get_completed_filter():
+    """
+    Get the status by which to filter the items from the query string
+    of the HTTP request.
+
+    Query Parameters:
+        completed (str): Optional. `true` to only get completed items,
+            or `false` to only get items which are not completed
+
+    Returns:
+        bool: The status of the items to get, or `None` to get all the
+            items
+
+    Raises:
+        ValueError: Invalid status
+    """
+    completed = request.args.get('completed')
+    if completed is None:
+        return None
+    if completed not in statuses:
+        raise ValueError('Invalid completed')
+    return statuses[completed]
+
+
+def get_fields():
+    """
+    Get the fields of the items to respond with from the query string of
+    the HTTP request.
+
+    Query Parameters:
+        fields (str): Optional. Comma separated names of the fields. The
+            default value is all the fields.
+
+    Returns:
+        tuple: Names of the fields, in the order of `item_fields`
+
+    Raises:
+        ValueError: Invalid fields
+    """
+    fields = request.args.get('fields')
+    if fields is None:
+        return item_fields
+
+    names = {name.strip() for name in fields.split(',')}
+    if not names <= set(item_fields):
+        raise ValueError('Invalid fields')
+    return tuple(field for field in item_fields if field in names)
+
+
+def get_uids():
+    """
+    Get the unique identifiers of the items to fetch from the query
+    string of the HTTP request.
+
+    Query Parameters:
+        uids (str): Optional. Comma separated unique identifiers of the
+            items
+
+    Returns:
+        List[int]: Unique identifiers of the items, or `None` if they
+            are not provided
+
+    Raises:
+        ValueError: Invalid unique identifiers, or too many of them
+    """
+    uids = request.args.get('uids')
+    if uids is None:
+        return None
+
+    try:
+        uids = [int(uid) for uid in uids.split(',')]
+    except ValueError:
+        raise ValueError('Invalid unique identifiers')
+    if len(uids) > max_batch_size:
+        raise ValueError(f'No more than {max_batch_size} items are allowed')
+    return uids
+
+
+def get_lookup_uids():
+    """
+    Get the unique identifiers of the items to fetch from the payload of
+    the HTTP request.
+
+    JSON Payload:
+        {
+            "uids": [integer]  <-- Unique identifiers of the items
+        }
+
+    Returns:
+        List[int]: Unique identifiers of the items
+
+    Raises:
+        ValueError: Invalid unique identifiers, or too many of them
+    """
+    data = request.json
+    uids = data.get('uids') if isinstance(data, dict) else None
+    if not isinstance(uids, list) or not all(
+        isinstance(uid, int) and not isinstance(uid, bool) for uid in uids
+    ):
+        raise ValueError('Invalid unique identifiers')
+    if len(uids) > max_batch_size:
+        raise ValueError(f'No more than {max_batch_size} items are allowed')
+    return uids
+
+
+def build_search_query(words):
+    """
+    Build an FTS5 query from the words a user searches for.
+
+    Each word is quoted, so the FTS5 query syntax in the words is not
+    interpreted, and a word ending with `*` matches as a prefix. Items
+    match the query if they match all the words.
+
+    Args:
+        words (str): Words to search for
+
+    Returns:
+        str: FTS5 query
+
+    Raises:
+        ValueError: Invalid query
+    """
+    terms = []
+    for word in words.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*')
+
+        # Skip the words which hold no token, such as punctuation
+        if not any(character.isalnum() for character in word):
+            continue
+
+        term = '"' + word.replace('"', '""') + '"'
+        terms.append(term + '*' if prefix else term)
+
+    if not terms:
+        raise ValueError('Invalid query')
+    return ' '.join(terms)
 
-        Raises:
-            LookupError: Item not found
-        """
-        # Establish a connection to the database
-        connection = sqlite3.Connection = sqlite3.connect(db_path)
-        cursor = connection.cursor()
 
-        try:
-            if uid:
-                # Get the row from the `item` table in the database
-                # which matches the unique identifier. The `fetchone`
-                # method returns `None` if there is no match.
-                row = cursor.execute(
-                    """
-                    SELECT uid, name, description, completed
-                    FROM item WHERE uid = ?
-                    """,
-                    (uid,)
-                ).fetchone()
-
-                if row:
-                    # The item was found, so create an `Item` object
-                    result = cls(
-                        uid=row[0],
-                        name=row[1],
-                        description=row[2],
-                        completed=True if row[3] else False
-                    )
-                else:
-                    # The item was not found, raise an exception
-                    raise LookupError('Item not found')
+def get_search_arguments():
+    """
+    Get the search arguments from the query string of the HTTP request.
 
-            else:
-                # Get all of the rows from the `item` table in the
-                # database
-                rows = cursor.execute(
-                    'SELECT uid, name, description, completed FROM item'
-                )
+    Search results are ordered by rank rather than unique identifier, so
+    the cursor of a page of results holds the number of results before
+    the page.
 
-                # For each row, create an `Item` object
-                result = []
-                for row in rows.fetchall():
-                    item = cls(
-                        uid=row[0],
-                        name=row[1],
-                        description=row[2],
-                        completed=True if row[3] else False
-                    )
-                    result.append(item)
+    Query Parameters:
+        q (str): Words to search for. A word ending with `*` matches as
+            a prefix.
+        limit (int): Optional. Maximum number of items in the page. The
+            value is capped to `max_page_size`.
+        cursor (str): Optional. Cursor returned with the previous page
 
-        except Exception:
-            # If any error occurred, rollback the database connection
-            # and re-raise the exception.
-            connection.rollback()
-            raise
+    Returns:
+        tuple: The FTS5 query, the number of results before the page,
+            and the maximum number of items in the page
 
-        finally:
-            # Close the database connection
-            cursor.close()
-            connection.close()
+    Raises:
+        ValueError: Invalid query, limit or cursor
+    """
+    query = build_search_query(request.args.get('q', ''))
+    offset, limit = get_page_arguments()
+    return query, offset, limit
 
-        return result
 
-    def create(self):
-        """
-        Create the item in the database.
+def get_batch_data():
+    """
+    Get the collection of items supplied in the payload of the HTTP
+    request.
 
-        Returns:
-            Item: Allow for method chaining of self
+    Returns:
+        list: Collection of dictionaries of attributes of the items
 
-        Raises:
-            Exception: Any errors encountered when inserting a new row
-                to the database
-        """
-        # Establish a connection to the database
-        connection = sqlite3.Connection = sqlite3.connect(db_path)
-        cursor = connection.cursor()
+    Raises:
+        ValueError: The payload is not a list or has too many elements
+    """
+    data = request.json
+    if not isinstance(data, list):
+        raise ValueError('A list of items is required')
+    if len(data) > max_batch_size:
+        raise ValueError(f'No more than {max_batch_size} items are allowed')
+
+    return data
+
+
+def get_batch_patches():
+    """
+    Get the partial updates of items supplied in the payload of the HTTP
+    request. Updates of the same item are merged in the order of the
+    payload.
+
+    Returns:
+        dict: Attributes to update of each item, keyed by the unique
+            identifiers of the items in the order of the payload
 
+    Raises:
+        ValueError: The payload is not a list, has too many elements, or
+            an element has no valid unique identifier
+    """
+    patches = {}
+    for data in get_batch_data():
         try:
-            # Insert a new row to the database with the values from the
-            # the current object and get the auto-generated unique
-            # identifier to populate the `uid` attribute
-            cursor.execute(
-                """
-                INSERT INTO item (name, description, completed)
-                VALUES (?, ?, ?)
-                """,
-                (self.name, self.description, self.completed)
-            )
-            self.uid = cursor.lastrowid
-            connection.commit()
+            uid = data['uid']
+        except (KeyError, TypeError):
+            raise ValueError('A unique identifier is required for each item')
+        if not isinstance(uid, int) or isinstance(uid, bool):
+            raise ValueError('Invalid unique identifier')
 
-        except Exception:
-            # If any error occurred, rollback the database connection
-            # and re-raise the exception.
-            connection.rollback()
-            raise
+        # Only the `name`, `description`, and `completed` attributes are
+        # updated, as with `Item.from_dict`
+        patch = patches.setdefault(uid, {})
+        for key in ('name', 'description', 'completed'):
+            if key in data:
+                patch[key] = data[key]
 
-        finally:
-            # Close the database connection
-            cursor.close()
-            connection.close()
+    return patches
 
-        return self
 
-    def update(self):
-        """
-        Update the item in the database.
+def get_item_changes(data):
+    """
+    Get the attributes of an item to update from the payload of the HTTP
+    request.
 
-        Returns:
-            Item: Allow for method chaining of self
+    Only the `name`, `description`, and `completed` attributes are
+    updated, as with `Item.from_dict`.
 
-        Raises:
-            LookupError: Item not found
-            Exception: Any errors encountered when inserting a new row
-                to the database
-        """
-        # Establish a connection to the database
-        connection = sqlite3.Connection = sqlite3.connect(db_path)
-        cursor = connection.cursor()
+    Args:
+        data (dict): Deserialized JSON payload of the HTTP request
 
-        try:
-            # Update the matching row in the database with the values
-            # from the current object. If no row was updated, then the
-            # item was not found, so raise an exception.
-            cursor.execute(
-                """
-                UPDATE item SET name = ?, description = ?, completed = ?
-                WHERE uid = ?
-                """,
-                (self.name, self.description, self.completed, self.uid)
-            )
-            if not cursor.rowcount:
-                raise LookupError('Item not found')
-            connection.commit()
+    Returns:
+        dict: Attributes to update, keyed by their names
+    """
+    try:
+        return {
+            key: data[key]
+            for key in ('name', 'description', 'completed')
+            if key in data
+        }
+    except TypeError:
+        return {}
 
-        except Exception:
-            # If any error occurred, rollback the database connection
-            # and re-raise the exception.
-            connection.rollback()
-            raise
 
-        finally:
-            # Close the database connection
-            cursor.close()
-            connection.close()
+def get_delete_filter():
+    """
+    Get which items to delete from the payload of the HTTP request.
 
-        return self
+    JSON Payload:
+        {
+            "uids": [integer]  <-- Unique identifiers of the items
+        }
+        or
+        {
+            "completed": boolean  <-- Status of the items
+        }
 
-    def delete(self):
-        """
-        Delete the item from the database.
+    Returns:
+        tuple: Unique identifiers of the items to delete as `List[int]`,
+            or `None`, and the status of the items to delete, or `None`
 
-        Returns:
-            Item: Allow for method chaining of self
+    Raises:
+        ValueError: The payload has neither or both of `uids` and
+            `completed`, or either of them is invalid
+    """
+    data = request.json
+    if not isinstance(data, dict) or ('uids' in data) == ('completed' in data):
+        raise ValueError('Either `uids` or `completed` is required')
+
+    if 'uids' in data:
+        uids = data['uids']
+        if not isinstance(uids, list) or not all(
+            isinstance(uid, int) and not isinstance(uid, bool) for uid in uids
+        ):
+            raise ValueError('Invalid unique identifiers')
+        if len(uids) > max_batch_size:
+            raise ValueError(
+                f'No more than {max_batch_size} items are allowed'
+            )
+        return uids, None
 
-        Raises:
-            LookupError: Item not found
-            Exception: Any errors encountered when inserting a new row
-                to the database
-        """
-        # Establish a connection to the database
-        connection = sqlite3.Connection = sqlite3.connect(db_path)
-        cursor = connection.cursor()
+    if not isinstance(data['completed'], bool):
+        raise ValueError('Invalid status')
+    return None, data['completed']
 
-        try:
-            # Delete the matching row from the database. If no row was
-            # deleted, then the item was not found, so raise an
-            # exception.
-            cursor.execute('DELETE FROM item WHERE uid = ?', (self.uid,))
 
-            if not cursor.rowcount:
-                raise LookupError('Item not found')
-            connection.commit()
+def generate_json_array(items):
+    """
+    Generate a JSON array of items chunk by chunk.
 
-        except Exception:
-            # If any error occurred, rollback the database connection
-            # and re-raise the exception.
-            connection.rollback()
-            raise
+    Each chunk holds the serialized items of one batch, so only one
+    batch is held in memory at a time.
 
-        finally:
-            # Close the database connection
-            cursor.close()
-            connection.close()
+    Args:
+        items (Iterable[Item]): Items to serialize
 
-        # Clear the uid as it has been removed from the database
-        self.uid = 0
+    Yields:
+        str: Chunk of the JSON array
+    """
+    yield '['
+    separator = ''
+    for batch in iterate_batches(items):
+        yield separator + ','.join(serialize(item) for item in batch)
+        separator = ','
+    yield ']'
 
-        return self
 
-    def from_dict(self, data):
-        """
-        Deserialize a dictionary to populate the attributes of the
-        current object.
+def generate_ndjson(items):
+    """
+    Generate newline delimited JSON of items chunk by chunk, where each
+    line is one serialized item.
 
-        Only attributes of the current object which are in the
-        dictionary are updated. The unique identifier is not updated.
+    Args:
+        items (Iterable[Item]): Items to serialize
 
-        Args:
-            data (dict): Dictionary containing all or partial attributes
-                to deserialize.
+    Yields:
+        str: Chunk of lines of newline delimited JSON
+    """
+    for batch in iterate_batches(items):
+        yield ''.join(serialize(item) + '\n' for item in batch)
 
-        Returns:
-            Item: Allow for method chaining of self
-        """
-        try:
-            if 'name' in data:
-                self.name = data['name']
-            if 'description' in data:
-                self.description = data['description']
-            if 'completed' in data:
-                self.completed = data['completed']
-        except TypeError:
-            pass
 
-        return self
+def iterate_batches(items):
+    """
+    Group items into batches of `stream_batch_size` items.
 
+    Args:
+        items (Iterable[Item]): Items to group
 
-def create_response(function):
+    Yields:
+        List[Item]: Batch of items
     """
-    Wrapper decorator which wraps a function and creates a response from
-    the results.
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= stream_batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
-    The wrapped function is called with all the passed arguments and
-    keyword arguments and returned data is saved. All exceptions are
-    caught and an error message is created from the exception.
 
-    A Flask response object is created where the payload is a JSON
-    serialized string of the results (or error message) created with
-    the `encode` function of the `jsonpickle` package. The status code
-    is 200 if no exceptions are raised, 404 if a lookup exception was
-    raise, and 400 for all other exceptions.
+def stream_response(items):
+    """
+    Create an HTTP response which streams a collection of items in the
+    format requested by the `stream` query parameter.
+
+    The items are consumed lazily while the payload is sent, so the
+    response starts before all the items are read from the database.
+
+    Query Parameters:
+        stream (str): `json` to stream a JSON array, or `ndjson` to
+            stream newline delimited JSON
 
     Args:
-        function (Callable function): Function to wrap
+        items (Iterable[Item]): Items to stream
 
     Returns:
-        Callable function: Wrapped function
+        Response: HTTP response object with a streamed payload
+
+    Raises:
+        ValueError: Invalid streaming format
     """
+    stream = request.args.get('stream')
+    if stream == 'json':
+        chunks = generate_json_array(items)
+        mimetype = 'application/json'
+    elif stream == 'ndjson':
+        chunks = generate_ndjson(items)
+        mimetype = 'application/x-ndjson'
+    else:
+        raise ValueError('Invalid stream')
+
+    # Keep the request context for the duration of the stream, as the
+    # chunks are generated after the route returns
+    return Response(
+        response=stream_with_context(chunks),
+        status=200,
+        mimetype=mimetype
+    )
+
+
+def make_etag(name, version):
+    """
+    Make a strong entity tag for a resource from its version.
 
-    @wraps(wrapped=function)
-    def wrapper(*args, **kwargs):
-        """
-        Wrap a function. See above for details.
+    Args:
+        name (str): Name of the resource
+        version (int): Version of the resource
 
-        Args:
-            *args: Arguments to pass through to the wrapped function
-            **kwargs: Keyword arguments to pass through to the wrapped
-                function
+    Returns:
+        str: Entity tag, or `None` if the version is not known
+    """
+    if version is None:
+        return None
+    return f'{name}-{version}'
 
-        Returns:
-            Response: Flask response object
-        """
-        try:
-            # Execute the function and store any returned data
-            data = function(*args, **kwargs)
-            status_code = 200
 
-        except Exception as error:
-            # Create a message for the user on any raised exceptions and
-            # change the status code based on the exception type
-            data = {'message': str(error)}
-            status_code = 404 if isinstance(error, LookupError) else 400
+def not_modified(etag):
+    """
+    Create a 304 response if the client already holds the version of a
+    resource identified by an entity tag, according to the
+    `If-None-Match` request header.
 
-        # Create the response object with serialized data. The payload
-        # is set to `None` if there was no result from the called
-        # function, this is to ensure an empty payload.
-        if data is not None:
-            data = encode(value=data, unpicklable=False)
-        return Response(
-            response=data,
-            status=status_code,
-            mimetype='application/json'
-        )
+    Args:
+        etag (str): Entity tag of the resource
 
-    return wrapper
+    Returns:
+        Response: HTTP response object with a 304 status code, or `None`
+            if the client does not hold the version of the resource
+    """
+    # Entity tags are compared weakly, so weak entity tags match too
+    if etag is None or not request.if_none_match.contains_weak(etag):
+        return None
+    return Response(status=304, headers={'ETag': quote_etag(etag)})
 
 
 @app.route('/hello_world')
@@ -345,13 +3014,127 @@ def hello_world():
 @create_response
 def fetch_all_items():
     """
-    HTTP GET route to fetch all To-Do items from the database.
+    HTTP GET route to fetch a page of To-Do items from the database.
+
+    Items are ordered by their unique identifier. If there are more
+    items after the page, the `X-Next-Cursor` response header holds the
+    cursor to pass to fetch the next page.
+
+    The `ETag` response header holds the version of the collection. If
+    it matches the `If-None-Match` request header, a 304 response is
+    returned without fetching any item.
+
+    Query Parameters:
+        limit (int): Optional. Maximum number of items in the page
+        cursor (str): Optional. Cursor returned with the previous page
+        stream (str): Optional. `json` or `ndjson` to stream all the
+            items instead of returning a page
+        completed (str): Optional. `true` or `false` to only fetch the
+            items with that status
+        fields (str): Optional. Comma separated names of the fields of
+            the items to respond with
+        uids (str): Optional. Comma separated unique identifiers of the
+            items to fetch instead of a page
+
+    Returns:
+        tuple or Response: Collection of the items in the page retrieved
+            from the database and the headers of the response, a
+            response streaming all the items, or a 304 response
+    """
+    # The unique identifiers of items are provided, so fetch those items
+    # in the order they were requested, and report the items which were
+    # not found
+    uids = get_uids()
+    if uids is not None:
+        items, not_found = Item.fetch_many(uids)
+        return {'items': items, 'not_found': not_found}
+
+    # Get the status of the items to fetch if they are filtered by status
+    completed = get_completed_filter()
+
+    # Get the fields of the items to respond with
+    fields = get_fields()
+
+    # If the client already holds the current version of the collection,
+    # respond before fetching any item. The version is read before the
+    # items, so a concurrent change can only make the entity tag stale.
+    etag = make_etag('items', Item.fetch_version())
+    response = not_modified(etag)
+    if response is not None:
+        return response
+
+    # If streaming is requested, stream all the items instead of
+    # returning a page
+    if 'stream' in request.args:
+        response = stream_response(Item.iterate(completed=completed))
+        response.headers['ETag'] = quote_etag(etag)
+        return response
+
+    # Fetch a page of items from the database and, if there is a next
+    # page, add its cursor to the headers
+    after, limit = get_page_arguments()
+    items, more = Item.fetch_page(after, limit, completed, fields)
+    headers = {'ETag': quote_etag(etag)}
+    if more:
+        headers['X-Next-Cursor'] = encode_cursor(items[-1].uid)
+    return project(items, fields), headers
+
+
+@app.route('/items/search')
+@create_response
+def search_items():
+    """
+    HTTP GET route to search the To-Do items in the database by the words
+    of their name and description.
+
+    Items are ranked by relevance, with matches in the name ranking
+    above matches in the description. If there are more items after the
+    page, the `X-Next-Cursor` response header holds the cursor to pass to
+    fetch the next page.
+
+    Query Parameters:
+        q (str): Words to search for. Items match all the words, and a
+            word ending with `*` matches as a prefix.
+        limit (int): Optional. Maximum number of items in the page
+        cursor (str): Optional. Cursor returned with the previous page
+
+    Returns:
+        tuple: Collection of the items in the page retrieved from the
+            database and the headers of the response
+    """
+    # Get the search query and the page of results, and fetch the page
+    # of items from the database. If there is a next page, add its
+    # cursor to the headers.
+    query, offset, limit = get_search_arguments()
+    items, more = Item.search(query, offset, limit)
+    headers = {}
+    if more:
+        headers['X-Next-Cursor'] = encode_cursor(offset + limit)
+    return items, headers
+
+
+@app.route('/items/lookup', methods=['POST'])
+@create_response
+def lookup_items():
+    """
+    HTTP POST route to fetch a collection of To-Do items from the
+    database by their unique identifiers, for lists of unique
+    identifiers too long for the `uids` query parameter of a GET
+    request.
+
+    JSON Payload:
+        {
+            "uids": [integer]  <-- Unique identifiers of the items
+        }
 
     Returns:
-        List[Item]: Collection of all items retrieved from the database
+        dict: Found items, in the order of their unique identifiers, and
+            the unique identifiers of the items which were not found
     """
-    # Fetch all items from the database
-    return Item.fetch()
+    # Get the deserialized JSON data from the HTTP request, extract the
+    # unique identifiers, and fetch the items from the database.
+    items, not_found = Item.fetch_many(get_lookup_uids())
+    return {'items': items, 'not_found': not_found}
 
 
 @app.route('/items/<int:uid>')
@@ -361,14 +3144,30 @@ def fetch_one_item(uid):
     HTTP GET route to fetch a single To-Do item from the database by its
     unique identifier.
 
+    The `ETag` response header holds the version of the item. If it
+    matches the `If-None-Match` request header, a 304 response is
+    returned without fetching the item.
+
     Args:
         uid (int): Unique identifier of the item
 
     Returns:
-        Item: Item retrieved from the database
+        tuple or Response: Item retrieved from the database and the
+            headers of the response, or a 304 response
     """
-    # Fetch one item from the database
-    return Item.fetch(uid=uid)
+    # If the client already holds the current version of the item,
+    # respond before fetching the item
+    version = Item.fetch_version(uid=uid)
+    response = not_modified(make_etag(f'item-{uid}', version))
+    if response is not None:
+        return response
+
+    # Fetch one item from the database, with the version its row was
+    # read at, so the entity tag always matches the item
+    item, version = Item.fetch_with_version(uid, version)
+    etag = make_etag(f'item-{uid}', version)
+    headers = {'ETag': quote_etag(etag)} if etag else {}
+    return item, headers
 
 
 @app.route('/items', methods=['POST'])
@@ -394,6 +3193,34 @@ def create_item():
     return Item().from_dict(data=request.json).create()
 
 
+@app.route('/items/batch', methods=['POST'])
+@create_response
+def create_items():
+    """
+    HTTP POST route to create a collection of To-Do items in the database
+    in a single transaction based on data supplied from the user.
+
+    JSON Payload:
+        [
+            {
+                "name": string,         <-- Required name of the item
+                "description": string,  <-- Optional description
+                "completed": boolean    <-- Optional status of the item
+            },
+            ...
+        ]
+
+    Returns:
+        List[int]: Unique identifiers of the created items, in the order
+            of the payload
+    """
+    # Get the deserialized JSON data from the HTTP request, extract the
+    # attributes of each item, and create all the new items in the
+    # database.
+    items = [Item().from_dict(data=data) for data in get_batch_data()]
+    return [item.uid for item in Item.create_many(items)]
+
+
 @app.route('/items/<int:uid>', methods=['PUT'])
 @create_response
 def update_item(uid):
@@ -416,8 +3243,8 @@ def update_item(uid):
     """
     # Get the deserialized JSON data from the HTTP request, extract the
     # required and optional attributes, and update the item in the
-    # database.
-    return Item.fetch(uid=uid).from_dict(data=request.json).update()
+    # database with a single statement.
+    return Item.update_by_uid(uid, get_item_changes(request.json))
 
 
 @app.route('/items/<int:uid>', methods=['PATCH'])
@@ -435,8 +3262,38 @@ def partial_update_item(uid):
     """
     # Get the deserialized JSON data from the HTTP request, extract the
     # required and optional attributes, and update the item in the
+    # database with a single statement.
+    return Item.update_by_uid(uid, get_item_changes(request.json))
+
+
+@app.route('/items', methods=['PATCH'])
+@create_response
+def partial_update_items():
+    """
+    HTTP PATCH route to partially update a collection of items in a
+    single transaction with attributes supplied by the payload of the
+    HTTP request.
+
+    JSON Payload:
+        [
+            {
+                "uid": integer,         <-- Required unique identifier
+                "name": string,         <-- Optional name of the item
+                "description": string,  <-- Optional description
+                "completed": boolean    <-- Optional status of the item
+            },
+            ...
+        ]
+
+    Returns:
+        dict: Unique identifiers of the updated items and of the items
+            which were not found
+    """
+    # Get the deserialized JSON data from the HTTP request, extract the
+    # attributes to update of each item, and update the items in the
     # database.
-    return Item.fetch(uid=uid).from_dict(data=request.json).update()
+    updated, not_found = Item.update_many(get_batch_patches())
+    return {'updated': updated, 'not_found': not_found}
 
 
 @app.route('/items/<int:uid>', methods=['DELETE'])
@@ -448,16 +3305,171 @@ def delete_item(uid):
     Args:
         uid (int): Unique identifier of the item
     """
-    # Fetch and delete the item from the database
-    Item.fetch(uid=uid).delete()
+    # Delete the item from the database with a single statement
+    Item(uid=uid).delete()
+
+
+@app.route('/items', methods=['DELETE'])
+@create_response
+def delete_items():
+    """
+    HTTP DELETE route to delete a collection of items from the database,
+    either by their unique identifiers or by their status.
+
+    The items are deleted in chunks, each in its own transaction, so
+    other writers are not locked out until all the items are deleted.
+
+    JSON Payload:
+        {
+            "uids": [integer]  <-- Unique identifiers of the items
+        }
+        or
+        {
+            "completed": boolean  <-- Status of the items
+        }
+
+    Returns:
+        dict: Number of deleted items
+    """
+    # Get the deserialized JSON data from the HTTP request, extract which
+    # items to delete, and delete them from the database.
+    uids, completed = get_delete_filter()
+    return {'deleted': Item.delete_many(uids=uids, completed=completed)}
+
+
+@app.route('/metrics')
+def get_metrics():
+    """
+    HTTP GET route to expose the metrics of the application for
+    Prometheus to scrape.
+
+    Returns:
+        Response: HTTP response object with the metrics in the Prometheus
+            text format
+    """
+    return Response(
+        response=render_metrics(),
+        status=200,
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+# Statements which create the tables and triggers tracking changes to the
+# `item` table. The `change_counter` table holds a counter which is
+# incremented on every change to the table, and the `item_version` table
+# holds the value of the counter when each item was last changed. Items
+# which existed before their changes were tracked are given version `0`.
+change_tracking_statements = (
+    """
+    CREATE TABLE IF NOT EXISTS change_counter
+    (
+        name VARCHAR(100) NOT NULL,
+        value INTEGER NOT NULL,
+        PRIMARY KEY (name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS item_version
+    (
+        uid INTEGER NOT NULL,
+        version INTEGER NOT NULL,
+        PRIMARY KEY (uid)
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_insert_version AFTER INSERT ON item
+    BEGIN
+        INSERT INTO change_counter (name, value) VALUES ('item', 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+        INSERT OR REPLACE INTO item_version (uid, version)
+        SELECT NEW.uid, value FROM change_counter WHERE name = 'item';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_update_version AFTER UPDATE ON item
+    BEGIN
+        INSERT INTO change_counter (name, value) VALUES ('item', 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+        INSERT OR REPLACE INTO item_version (uid, version)
+        SELECT NEW.uid, value FROM change_counter WHERE name = 'item';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_delete_version AFTER DELETE ON item
+    BEGIN
+        INSERT INTO change_counter (name, value) VALUES ('item', 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+        DELETE FROM item_version WHERE uid = OLD.uid;
+    END
+    """,
+    """
+    INSERT OR IGNORE INTO item_version (uid, version)
+    SELECT uid, 0 FROM item
+    """
+)
+
+
+# Statements which create the full-text index of the items and the triggers
+# which keep it in sync with the `item` table. The index is an external
+# content FTS5 table, so it only holds the index and reads the names and
+# descriptions from the `item` table. Prefixes of two and three characters
+# are indexed to speed up prefix queries, and matches in the name weigh ten
+# times more than matches in the description when ranking the results.
+search_statements = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS item_search USING fts5
+    (
+        name,
+        description,
+        content='item',
+        content_rowid='uid',
+        prefix='2 3'
+    )
+    """,
+    """
+    INSERT INTO item_search (item_search, rank)
+    VALUES ('rank', 'bm25(10.0, 1.0)')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_insert_search AFTER INSERT ON item
+    BEGIN
+        INSERT INTO item_search (rowid, name, description)
+        VALUES (NEW.uid, NEW.name, NEW.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_update_search
+    AFTER UPDATE OF name, description ON item
+    BEGIN
+        INSERT INTO item_search (item_search, rowid, name, description)
+        VALUES ('delete', OLD.uid, OLD.name, OLD.description);
+        INSERT INTO item_search (rowid, name, description)
+        VALUES (NEW.uid, NEW.name, NEW.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_delete_search AFTER DELETE ON item
+    BEGIN
+        INSERT INTO item_search (item_search, rowid, name, description)
+        VALUES ('delete', OLD.uid, OLD.name, OLD.description);
+    END
+    """
+)
+# Statement which indexes all the existing items, when the full-text index
+# is created for a database which already holds items
+search_rebuild_statement = (
+    "INSERT INTO item_search (item_search) VALUES ('rebuild')"
+)
 
 
 def create_tables():
     """
     Create any table needed for the application.
     """
-    # Establish a connection to the database
+    # Establish a connection to the database and apply the storage
+    # profile, which switches the journal mode of the database file
     connection = sqlite3.connect(db_path)
+    apply_pragmas(connection, storage_profiles[storage_profile])
     cursor = connection.cursor()
 
     try:
@@ -489,6 +3501,32 @@ def create_tables():
             connection.close()
             raise
 
+    # Create the tables and triggers which track changes to the `item`
+    # table if they do not already exist
+    for statement in change_tracking_statements:
+        cursor.execute(statement)
+    connection.commit()
+
+    # Create the full-text index of the items and the triggers which keep
+    # it in sync with the `item` table if they do not already exist. If
+    # the index is created, the existing items are indexed as well.
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'item_search'"
+    ).fetchone()
+    for statement in search_statements:
+        cursor.execute(statement)
+    if exists is None:
+        cursor.execute(search_rebuild_statement)
+    connection.commit()
+
+    # Create the index on the status of the items, if it does not already
+    # exist, so the items are filtered by status without scanning the
+    # whole `item` table
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS ix_item_completed ON item (completed)'
+    )
+    connection.commit()
+
     # Close the database connection
     cursor.close()
     connection.close()
@@ -1,10 +1,42 @@
-from flask import Flask, request, Response
+import cProfile
+import json
+import os
+import random
+import threading
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from bisect import bisect_left
+from collections import OrderedDict
+from flask import Flask, request, Response, stream_with_context
 from flask_restful import Api, Resource
 from flask_sqlalchemy import SQLAlchemy
 from functools import wraps
+from itertools import chain
 from jsonpickle import encode
+from operator import attrgetter
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from werkzeug.http import quote_etag
 
 db_path = 'app.db'  # The path to the SQLite3 database file
+page_size = 100  # The default number of items in a page
+max_page_size = 1000  # The maximum number of items in a page
+# The values of the `completed` query parameter and the status of the items
+# they filter by
+statuses = {'true': True, 'false': False}
+# The fields of an item, in the order of the columns of the `item` table
+item_fields = ('uid', 'name', 'description', 'completed')
+stream_batch_size = 500  # The number of items read at a time to stream
+max_batch_size = 10000  # The maximum number of items in a batch
+in_chunk_size = 500  # The maximum number of values in an IN clause
+delete_chunk_size = 1000  # The number of items deleted at a time
+storage_profile = 'balanced'  # The name of the storage profile to apply
+server_timing = True  # Whether or not to send the Server-Timing header
+profile_rate = 0.0  # The share of requests profiled with cProfile
+profile_dir = 'profiles'  # The directory to save request profiles to
+commit_strategy = 'keep'  # The name of the commit strategy of items
 app = Flask(__name__)  # The Flask application object
 api = Api(app)  # The API object for Flask-RESTful
 
@@ -13,6 +45,340 @@ app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
 db = SQLAlchemy(app=app)  # The SQLAlchemy object for ORM
 
 
+# The names of the commit strategies of `Item.save`, which decide how the
+# attributes of an item are known once its changes are committed.
+#   - `expire`: The session expires the attributes on commit, so they are
+#     reloaded with another statement when they are next accessed, such
+#     as when the item is serialized
+#   - `keep`: The changes are flushed and the item is detached from the
+#     session before the commit, so the attributes keep the values which
+#     were written
+#   - `returning`: A new item is written with an `INSERT` statement
+#     which returns its row, and the attributes are refreshed from the
+#     returned row. An existing item is updated as with `keep`, as the
+#     requests update items with `Item.update_by_uid` instead.
+commit_strategies = ('expire', 'keep', 'returning')
+
+
+# The named storage profiles, each of which holds the names and values of
+# the pragmas applied to every connection to the SQLite3 database file.
+#   - `durable`: Rollback journal and a full sync on every commit, so no
+#     committed transaction is lost even on a power failure
+#   - `balanced`: Write-ahead log, so readers do not block behind a
+#     writer, synced at checkpoints. A power failure may lose the last
+#     committed transactions, but never corrupts the database.
+#   - `throughput`: Write-ahead log which is never synced, with a larger
+#     cache and memory map. An operating system crash or a power failure
+#     may corrupt the database.
+storage_profiles = {
+    'durable': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'mmap_size': 0,
+        'cache_size': -2000,  # 2 MiB
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000  # 5 seconds
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,  # 256 MiB
+        'cache_size': -65536,  # 64 MiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000  # 5 seconds
+    },
+    'throughput': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'mmap_size': 1073741824,  # 1 GiB
+        'cache_size': -262144,  # 256 MiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 10000  # 10 seconds
+    }
+}
+
+
+def apply_pragmas(connection, pragmas):
+    """
+    Apply pragmas to a SQLite3 database connection.
+
+    The pragmas are applied in order, so the journal mode is changed
+    before any other setting.
+
+    Args:
+        connection (sqlite3.Connection): Database connection
+        pragmas (dict): Names and values of the pragmas to apply
+    """
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}').fetchall()
+
+
+@event.listens_for(db.engine, 'connect')
+def apply_storage_profile(connection, connection_record):
+    """
+    Apply the pragmas of the storage profile to every new connection of
+    the database engine.
+
+    Args:
+        connection (sqlite3.Connection): Database connection
+        connection_record (_ConnectionRecord): Pool record of the
+            connection
+    """
+    apply_pragmas(connection, storage_profiles[storage_profile])
+
+
+serializers = {}  # The compiled serializers of the registered classes
+json_backend = json.dumps  # The function which encodes data to JSON
+
+
+def compile_serializer(fields):
+    """
+    Compile a serializer which converts an object into a dictionary of
+    some of its attributes.
+
+    Args:
+        fields (tuple): Names of the attributes to serialize
+
+    Returns:
+        Callable function: Serializer
+    """
+    getter = attrgetter(*fields)
+    if len(fields) == 1:
+        # The getter returns a single value instead of a tuple
+        return lambda obj: {fields[0]: getter(obj)}
+    return lambda obj: dict(zip(fields, getter(obj)))
+
+
+def serializable(*fields):
+    """
+    Class decorator which registers the fields of a class to serialize.
+
+    The fields are compiled once into a serializer which converts an
+    object of the class into a dictionary, so objects do not need to be
+    inspected each time they are serialized.
+
+    Args:
+        *fields (str): Names of the attributes to serialize
+
+    Returns:
+        Callable function: Class decorator
+    """
+    def decorator(cls):
+        """
+        Register the serializer of a class. See above for details.
+
+        Args:
+            cls (type): Class to register
+
+        Returns:
+            type: The same class
+        """
+        serializers[cls] = compile_serializer(fields)
+        return cls
+
+    return decorator
+
+
+def to_primitive(data):
+    """
+    Convert objects of registered classes, including those inside lists
+    and dictionaries, into dictionaries with their compiled serializers.
+
+    Args:
+        data: Data to convert
+
+    Returns:
+        Converted data. Objects of unregistered classes are returned
+            unchanged.
+    """
+    serializer = serializers.get(type(data))
+    if serializer is not None:
+        return serializer(data)
+    if isinstance(data, list):
+        return [to_primitive(value) for value in data]
+    if isinstance(data, dict):
+        return {key: to_primitive(value) for key, value in data.items()}
+    return data
+
+
+def serialize(data):
+    """
+    Serialize data into a JSON encoded string.
+
+    Objects of registered classes are converted with their compiled
+    serializers and the result is encoded with `json_backend`. If the
+    data contains objects of any other class, the `encode` function of
+    the `jsonpickle` package is used instead.
+
+    Args:
+        data: Data to serialize
+
+    Returns:
+        str: JSON encoded string
+    """
+    try:
+        return json_backend(to_primitive(data))
+    except TypeError:
+        return encode(value=data, unpicklable=False)
+
+
+def project(rows, fields):
+    """
+    Convert rows of the columns of items into dictionaries of their
+    fields, ready to be serialized.
+
+    Args:
+        rows (Iterable[tuple]): Rows which start with the columns of the
+            fields, in the same order
+        fields (tuple): Names of the fields
+
+    Returns:
+        List[dict]: Fields of each item
+    """
+    return [dict(zip(fields, row)) for row in rows]
+
+
+class ItemCache(object):
+    """
+    This class represents an in-process cache of the rows of items, shared
+    by the sessions of all the requests, which evicts the least recently
+    used entries.
+
+    The identity map of a session only holds the items loaded during one
+    request, so this cache holds the values of the columns of items,
+    detached from any session, across requests. An entry is keyed by the
+    unique identifier of an item. Entries expire after a time to live, and
+    the least recently used entries are evicted when there are too many of
+    them.
+
+    The generation of the cache is incremented on every invalidation.
+    Callers read it before reading a row from the database and pass it on
+    when caching it, so rows read before a concurrent write are not
+    cached.
+
+    Attributes:
+        max_entries (int): Maximum number of entries
+        ttl (float): Number of seconds before an entry expires
+        generation (int): Number of invalidations of the cache
+        hits (int): Number of lookups which found an entry
+        misses (int): Number of lookups which did not find an entry
+        evictions (int): Number of entries evicted to make room
+    """
+
+    def __init__(self, max_entries=10000, ttl=60.0):
+        """
+        Initialize an `ItemCache` object.
+
+        Args:
+            max_entries (int): Optional. Maximum number of entries. The
+                default value is `10000`.
+            ttl (float): Optional. Number of seconds before an entry
+                expires. The default value is `60.0`.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # Entries in least recent order
+        self._lock = threading.Lock()  # Guards the entries and counters
+
+    def get(self, uid):
+        """
+        Get the row cached for an item.
+
+        Args:
+            uid (int): Unique identifier of the item
+
+        Returns:
+            tuple: Cached row, or `None` if there is no entry
+        """
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry is not None and entry[0] < time.monotonic():
+                # The entry has expired, so discard it
+                del self._entries[uid]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(uid)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, uid, row, generation):
+        """
+        Cache the row of an item, evicting the least recently used
+        entries if needed.
+
+        The row is not cached if the cache was invalidated since it was
+        read.
+
+        Args:
+            uid (int): Unique identifier of the item
+            row (tuple): Values of the columns of the item
+            generation (int): Generation of the cache read before the row
+                was read from the database
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+
+            self._entries.pop(uid, None)
+            self._entries[uid] = (time.monotonic() + self.ttl, row)
+
+            # Evict the least recently used entries until the cache is
+            # within its limit
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *uids):
+        """
+        Invalidate the cached rows of items.
+
+        Args:
+            *uids (int): Unique identifiers of the changed items
+        """
+        with self._lock:
+            self.generation += 1
+            for uid in uids:
+                self._entries.pop(uid, None)
+
+    def clear(self):
+        """
+        Invalidate all the entries of the cache.
+        """
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Get the statistics of the cache.
+
+        Returns:
+            dict: Number of hits, misses, evictions, and entries, and the
+                share of the lookups which found an entry
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
+
+
+item_cache = ItemCache()  # The cache of the rows of items across requests
+
+
+@serializable('uid', 'name', 'description', 'completed')
 class Item(db.Model):
     """
     This class represents a To-Do item.
@@ -27,7 +393,7 @@ class Item(db.Model):
     uid = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(length=100), nullable=False)
     description = db.Column(db.Text)
-    completed = db.Column(db.Boolean, default=False)
+    completed = db.Column(db.Boolean, default=False, index=True)
 
     def __getstate__(self):
         """
@@ -43,6 +409,80 @@ class Item(db.Model):
             'completed': self.completed
         }
 
+    @classmethod
+    def fetch_version(cls, uid=None):
+        """
+        Fetch the version of one item or of the collection of all items.
+
+        The version changes whenever the item, or any item for the
+        collection, is created, updated, or deleted. It is read from the
+        change tracking tables without loading any item.
+
+        Args:
+            uid (int): Optional. Unique identifier of an item
+
+        Returns:
+            int: If `uid` is provided, the version of that item, or
+                `None` if it is not known. Otherwise, the version of the
+                collection of all items.
+        """
+        if uid:
+            return db.session.execute(
+                text('SELECT version FROM item_version WHERE uid = :uid'),
+                {'uid': uid}
+            ).scalar()
+
+        version = db.session.execute(
+            text("SELECT value FROM change_counter WHERE name = 'item'")
+        ).scalar()
+        return version or 0
+
+    @classmethod
+    def delete_many(cls, uids=None, completed=None):
+        """
+        Delete a collection of items from the database, either by their
+        unique identifiers or by their status.
+
+        The items are deleted with set-based statements in chunks, each
+        in its own transaction, so the write lock of the database is
+        released between chunks. If an error occurs, the chunks which
+        were already deleted stay deleted.
+
+        Args:
+            uids (List[int]): Optional. Unique identifiers of the items
+            completed (bool): Optional. Status of the items, used if the
+                unique identifiers are not provided
+
+        Returns:
+            int: Number of deleted items
+        """
+        deleted = 0  # Number of deleted items
+
+        if uids is not None:
+            # Delete the matching items, a chunk of unique identifiers at
+            # a time
+            for start in range(0, len(uids), in_chunk_size):
+                chunk = uids[start:start + in_chunk_size]
+                query = cls.query.filter(cls.uid.in_(chunk))
+                deleted += query.delete(synchronize_session=False)
+                mark_items_changed(*chunk)
+                db.session.commit()
+        else:
+            # Delete the items with the matching status, a chunk of items
+            # at a time, until a chunk is not full
+            rowcount = delete_chunk_size
+            while rowcount == delete_chunk_size:
+                chunk = db.session.query(cls.uid).filter(
+                    cls.completed == completed
+                ).limit(delete_chunk_size)
+                query = cls.query.filter(cls.uid.in_(chunk))
+                rowcount = query.delete(synchronize_session=False)
+                deleted += rowcount
+                mark_items_changed()
+                db.session.commit()
+
+        return deleted
+
     def from_dict(self, data):
         """
         Deserialize a dictionary to populate the attributes of the
@@ -75,6 +515,9 @@ class Item(db.Model):
         """
         Fetch one or a collection of items from the database.
 
+        One item is looked up in the identity map of the session, then in
+        the item cache, before it is fetched from the database.
+
         Args:
             uid (int): Optional. Unique identifier of an item
 
@@ -87,167 +530,1853 @@ class Item(db.Model):
         """
         # The unique identifier is provided, so fetch that one item
         if uid:
+            # Use the item if it was already loaded by the session, so it
+            # is neither looked up in the cache nor fetched from the
+            # database
+            item = db.session.identity_map.get(identity_key(cls, uid))
+            if item is not None:
+                return item
+
+            # Use the cached row of the item, which is added to the session
+            # as if it was loaded from the database
+            generation = item_cache.generation
+            row = item_cache.get(uid)
+            if row is not None:
+                item = cls(**dict(zip(item_fields, row)))
+                make_transient_to_detached(item)
+                db.session.add(item)
+                return item
+
             # The `first` method for queries returns `None` if there is
             # nothing in the returned query
             item = cls.query.filter_by(uid=uid).first()
             if item is None:
                 raise LookupError('Item not found')
+            item_cache.set(
+                uid,
+                (item.uid, item.name, item.description, item.completed),
+                generation
+            )
             return item
         else:
             return cls.query.all()
 
-    def save(self):
+    @classmethod
+    def fetch_many(cls, uids):
         """
-        Create or update the item in the database.
-
-        If the item has a unique identifier, then update the item by
-        committing the session. Otherwise, create the item by adding it
-        to the session before committing it.
+        Fetch a collection of items from the database by their unique
+        identifiers.
 
-        Returns:
-            Item: Allow for method chaining of self
-        """
-        if not self.uid:
-            db.session.add(self)
-        db.session.commit()
-        return self
+        The items are fetched with one `IN` query per chunk of unique
+        identifiers, rather than one query per item.
 
-    def delete(self):
-        """
-        Delete the item from the database.
+        Args:
+            uids (List[int]): Unique identifiers of the items
 
         Returns:
-            Item: Allow for method chaining of self
+            tuple: Found items as `List[Item]`, in the order of their
+                unique identifiers, and the unique identifiers of the
+                items which were not found as `List[int]`. An item is
+                only returned once, even if its unique identifier is
+                repeated.
         """
-        db.session.delete(self)
-        db.session.commit()
-        return self
+        # Remove the repeated unique identifiers, keeping their order
+        uids = list(dict.fromkeys(uids))
 
+        # Fetch the items, a chunk of unique identifiers at a time
+        items = {}  # The found items, keyed by their unique identifiers
+        for start in range(0, len(uids), in_chunk_size):
+            chunk = uids[start:start + in_chunk_size]
+            query = cls.query.filter(cls.uid.in_(chunk))
+            items.update((item.uid, item) for item in query)
 
-def create_response(function):
-    """
-    Wrapper decorator which wraps a function and creates a response from
-    the results.
+        return (
+            [items[uid] for uid in uids if uid in items],
+            [uid for uid in uids if uid not in items]
+        )
 
-    The wrapped function is called with all the passed arguments and
-    keyword arguments and returned data is saved. All exceptions are
-    caught and an error message is created from the exception.
+    @classmethod
+    def iterate(cls, batch_size=stream_batch_size, completed=None):
+        """
+        Lazily fetch all the items from the database, ordered by their
+        unique identifiers, as dictionaries of their fields.
 
-    A Flask response object is created where the payload is a JSON
-    serialized string of the results (or error message) created with
-    the `encode` function of the `jsonpickle` package. The status code
-    is 200 if no exceptions are raised, 404 if a lookup exception was
-    raise, and 400 for all other exceptions.
+        The items are read with a Core `SELECT` statement of their
+        columns, so no `Item` object is built and tracked by the session
+        for them. Rows are read from the database in batches, so only
+        one batch is held in memory at a time.
 
-    Args:
-        function (Callable function): Function to wrap
+        Args:
+            batch_size (int): Optional. Number of items to read at a
+                time. The default value is `stream_batch_size`.
+            completed (bool): Optional. Status of the items, or `None`
+                for items of any status. The default value is `None`.
 
-    Returns:
-        Callable function: Wrapped function
-    """
+        Yields:
+            dict: Fields of an item
+        """
+        table = cls.__table__
+        statement = select(*[table.c[field] for field in item_fields])
+        if completed is not None:
+            statement = statement.where(table.c.completed == completed)
+        rows = db.session.execute(
+            statement.order_by(table.c.uid),
+            execution_options={'yield_per': batch_size}
+        )
+        for row in rows:
+            yield dict(zip(item_fields, row))
 
-    @wraps(wrapped=function)
-    def wrapper(*args, **kwargs):
+    @classmethod
+    def fetch_page(cls, after=0, limit=page_size, completed=None,
+                   fields=item_fields):
         """
-        Wrap a function. See above for details.
+        Fetch a page of items from the database as rows of their
+        columns, ordered by their unique identifiers.
+
+        The rows are read with a Core `SELECT` statement of the columns
+        of the requested fields, so no `Item` object is built and tracked
+        by the session for them. This path is only for reading, as items
+        are written through the ORM.
 
         Args:
-            *args: Arguments to pass through to the wrapped function
-            **kwargs: Keyword arguments to pass through to the wrapped
-                function
+            after (int): Optional. Unique identifier after which the page
+                starts. The default value is `0`.
+            limit (int): Optional. Maximum number of items in the page.
+                The default value is `page_size`.
+            completed (bool): Optional. Status of the items in the page,
+                or `None` for items of any status. The default value is
+                `None`.
+            fields (tuple): Optional. Names of the fields to read, in
+                the order of `item_fields`. The default value is
+                `item_fields`.
 
         Returns:
-            Response: Flask response object
+            tuple: Rows of the items in the page as `List[Row]` and
+                whether or not there are more items after the page. Each
+                row holds the columns of the fields, followed by the
+                `uid` column if it is not one of the fields.
         """
-        try:
-            # Execute the function and store any returned data
-            data = function(*args, **kwargs)
-            status_code = 200
-
-        except Exception as error:
-            # Create a message for the user on any raised exceptions and
-            # change the status code based on the exception type
-            data = {'message': str(error)}
-            status_code = 404 if isinstance(error, LookupError) else 400
-
-        # Create the response object with serialized data. The payload
-        # is set to `None` if there was no result from the called
-        # function, this is to ensure an empty payload.
-        if data is not None:
-            data = encode(value=data, unpicklable=False)
-        return Response(
-            response=data,
-            status=status_code,
-            mimetype='application/json'
-        )
-
-    return wrapper
+        # Only read the columns of the requested fields. The unique
+        # identifier is always read, for the cursor of the next page.
+        table = cls.__table__
+        columns = [table.c[field] for field in fields]
+        if 'uid' not in fields:
+            columns.append(table.c.uid)
 
+        # Only filter the items by status if requested, in which case
+        # the index on the `completed` column is used to find them
+        statement = select(*columns).where(table.c.uid > after)
+        if completed is not None:
+            statement = statement.where(table.c.completed == completed)
 
-class ItemResource(Resource):
-    """
-    This resource class provides create, read, update, and delete (CRUD)
-    actions for the item resource using HTTP methods.
-    """
+        # One more item than the limit is fetched to find out whether
+        # there is a next page
+        statement = statement.order_by(table.c.uid).limit(limit + 1)
+        rows = db.session.execute(statement).all()
+        return rows[:limit], len(rows) > limit
 
-    @create_response
-    def get(self, uid=None):
+    @classmethod
+    def search(cls, query, offset=0, limit=page_size):
         """
-        HTTP GET method to fetch one To-Do item by its unique identifier
-        or a collection of all To-Do items from the database.
+        Fetch a page of the items which match a full-text search query
+        from the database, ranked by relevance.
+
+        The items are found through the `item_search` full-text index,
+        which is not mapped, so they are fetched with a textual
+        statement.
 
         Args:
-            uid (int): Optional. Unique identifier of the item
+            query (str): FTS5 query
+            offset (int): Optional. Number of results before the page.
+                The default value is `0`.
+            limit (int): Optional. Maximum number of items in the page.
+                The default value is `page_size`.
 
         Returns:
-            Item or List[Item]: One item or a collection of all items
-                retrieved from the database
+            tuple: Collection of the items in the page as `List[Item]`
+                and whether or not there are more items after the page
         """
-        return Item.fetch(uid=uid)
+        # One more item than the limit is fetched to find out whether
+        # there is a next page
+        statement = text(search_query_statement)
+        items = cls.query.from_statement(statement).params(
+            query=query,
+            limit=limit + 1,
+            offset=offset
+        ).all()
+        return items[:limit], len(items) > limit
 
-    @create_response
-    def post(self):
+    def save(self):
         """
-        HTTP POST method to create a To-Do item in the database based on
-        the data supplied from the user.
+        Create or update the item in the database.
 
-        JSON Payload:
-            {
-                "name": string,         <-- Required name of the item
-                "description": string,  <-- Optional description of the item
-                "completed": boolean    <-- Optional status of the item
-            }
+        If the item has a unique identifier, then update the item by
+        committing the session. Otherwise, create the item by adding it
+        to the session before committing it. How the attributes of the
+        item are known after the commit depends on `commit_strategy`.
 
         Returns:
-            Item: Created item
+            Item: Allow for method chaining of self
+
+        Raises:
+            ValueError: Unknown commit strategy
         """
-        # Get the deserialized JSON data from the HTTP request, extract
-        # the required and optional attributes, and create a new item in
-        # the database.
-        return Item().from_dict(data=request.json).save()
+        if commit_strategy not in commit_strategies:
+            raise ValueError(f'Unknown commit strategy: {commit_strategy}')
 
-    @create_response
-    def put(self, uid):
+        if commit_strategy == 'returning' and not self.uid:
+            # Create the item with a statement which returns its row,
+            # rather than adding it to the session. The columns of the
+            # statement are typed, so the values of the returned row are
+            # converted as for any query of items.
+            statement = text(insert_returning_statement).columns(
+                Item.uid,
+                Item.name,
+                Item.description,
+                Item.completed
+            )
+            row = db.session.execute(statement, {
+                'name': self.name,
+                'description': self.description,
+                'completed': bool(self.completed)
+            }).first()
+            mark_items_changed(row.uid)
+            db.session.commit()
+
+            # Refresh the attributes from the returned row without marking
+            # them as changed
+            for key, value in row._mapping.items():
+                set_committed_value(self, key, value)
+            return self
+
+        if not self.uid:
+            db.session.add(self)
+        if commit_strategy in ('keep', 'returning'):
+            # Write the changes before detaching the item from the session,
+            # so the commit does not expire its attributes
+            db.session.flush()
+            db.session.expunge(self)
+        db.session.commit()
+        return self
+
+    @classmethod
+    def create_many(cls, items):
         """
-        HTTP PUT method to update an item by replacing its attributes
-        with those supplied by the payload of the HTTP request.
+        Create a collection of items in the database in a single
+        transaction with a bulk insert.
 
         Args:
-            uid (int): Unique identifier of the item
+            items (List[Item]): Items to create
 
         Returns:
-            Item: Updated item
+            List[Item]: The same items, with their `uid` attributes
+                populated
         """
-        # Get the deserialized JSON data from the HTTP request, extract
-        # the required and optional attributes, and update the item in
+        if not items:
+            return items
+
+        # Insert all the items with a single bulk statement. The unique
+        # identifiers are assigned in sequence within the transaction,
+        # so they are derived from the last auto-generated unique
+        # identifier.
+        db.session.bulk_insert_mappings(cls, [
+            {
+                'name': item.name,
+                'description': item.description,
+                'completed': bool(item.completed)
+            }
+            for item in items
+        ])
+        last_uid = db.session.execute(text('SELECT last_insert_rowid()'))
+        last_uid = last_uid.scalar()
+        db.session.commit()
+
+        for uid, item in enumerate(items, start=last_uid - len(items) + 1):
+            item.uid = uid
+        return items
+
+    @classmethod
+    def update_by_uid(cls, uid, changes):
+        """
+        Update the attributes of an item in the database without fetching
+        the item first.
+
+        Only the columns of the changed attributes are updated, and the
+        updated row is returned by the same statement, which is textual
+        as the SQLite dialect does not compile `RETURNING` clauses.
+
+        Args:
+            uid (int): Unique identifier of the item
+            changes (dict): Attributes to update, keyed by their names
+
+        Returns:
+            Item: Updated item
+
+        Raises:
+            LookupError: Item not found
+        """
+        # If no attribute is changed, the status is assigned to itself, so
+        # the statement still finds the item and returns its row
+        assignments = ', '.join(f'{key} = :{key}' for key in changes)
+        assignments = assignments or 'completed = completed'
+
+        # The returned row replaces the attributes of the item if it is
+        # already in the session
+        statement = text(
+            update_returning_statement.format(assignments=assignments)
+        )
+        item = cls.query.from_statement(statement).params(
+            uid=uid,
+            **changes
+        ).populate_existing().first()
+        if item is None:
+            db.session.rollback()
+            raise LookupError('Item not found')
+
+        # The item is detached before the commit, so its attributes are
+        # not expired by the commit and reloaded with another statement
+        db.session.expunge(item)
+        mark_items_changed(uid)
+        db.session.commit()
+        return item
+
+    @classmethod
+    def update_many(cls, patches):
+        """
+        Partially update a collection of items in the database in a
+        single transaction with a bulk update.
+
+        Items which are updated with the same attributes are updated with
+        a single grouped statement.
+
+        Args:
+            patches (dict): Attributes to update of each item, keyed by
+                the unique identifiers of the items
+
+        Returns:
+            tuple: Unique identifiers of the updated items and of the
+                items which were not found, each as `List[int]`
+        """
+        uids = list(patches)
+
+        # Take the write lock before finding which items exist, so they
+        # cannot be deleted before they are updated
+        db.session.execute(text('BEGIN IMMEDIATE'))
+
+        # Find which items exist, querying the unique identifiers in
+        # chunks to stay within the limit of parameters of a statement
+        found = set()
+        for start in range(0, len(uids), in_chunk_size):
+            chunk = uids[start:start + in_chunk_size]
+            query = db.session.query(cls.uid).filter(cls.uid.in_(chunk))
+            found.update(uid for uid, in query)
+
+        # Sort the updates by the attributes which are updated, so each
+        # group of updates is sent with a single statement
+        mappings = [
+            dict(patches[uid], uid=uid)
+            for uid in uids
+            if uid in found and patches[uid]
+        ]
+        mappings.sort(key=lambda mapping: sorted(mapping))
+        db.session.bulk_update_mappings(cls, mappings)
+        mark_items_changed(*[mapping['uid'] for mapping in mappings])
+        db.session.commit()
+
+        return (
+            [uid for uid in uids if uid in found],
+            [uid for uid in uids if uid not in found]
+        )
+
+    @classmethod
+    def delete_by_uid(cls, uid):
+        """
+        Delete an item from the database without fetching the item first.
+
+        Args:
+            uid (int): Unique identifier of the item
+
+        Raises:
+            LookupError: Item not found
+        """
+        # If no row was deleted, then the item was not found, so raise an
+        # exception
+        query = cls.query.filter_by(uid=uid)
+        if not query.delete(synchronize_session=False):
+            db.session.rollback()
+            raise LookupError('Item not found')
+        mark_items_changed(uid)
+        db.session.commit()
+
+    def delete(self):
+        """
+        Delete the item from the database.
+
+        Returns:
+            Item: Allow for method chaining of self
+        """
+        db.session.delete(self)
+        db.session.commit()
+        return self
+
+
+# Statements which create the tables and triggers tracking changes to the
+# `item` table. The `change_counter` table holds a counter which is
+# incremented on every change to the table, and the `item_version` table
+# holds the value of the counter when each item was last changed. Items
+# which existed before their changes were tracked are given version `0`.
+change_tracking_statements = (
+    """
+    CREATE TABLE IF NOT EXISTS change_counter
+    (
+        name VARCHAR(100) NOT NULL,
+        value INTEGER NOT NULL,
+        PRIMARY KEY (name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS item_version
+    (
+        uid INTEGER NOT NULL,
+        version INTEGER NOT NULL,
+        PRIMARY KEY (uid)
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_insert_version AFTER INSERT ON item
+    BEGIN
+        INSERT INTO change_counter (name, value) VALUES ('item', 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+        INSERT OR REPLACE INTO item_version (uid, version)
+        SELECT NEW.uid, value FROM change_counter WHERE name = 'item';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_update_version AFTER UPDATE ON item
+    BEGIN
+        INSERT INTO change_counter (name, value) VALUES ('item', 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+        INSERT OR REPLACE INTO item_version (uid, version)
+        SELECT NEW.uid, value FROM change_counter WHERE name = 'item';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_delete_version AFTER DELETE ON item
+    BEGIN
+        INSERT INTO change_counter (name, value) VALUES ('item', 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+        DELETE FROM item_version WHERE uid = OLD.uid;
+    END
+    """,
+    """
+    INSERT OR IGNORE INTO item_version (uid, version)
+    SELECT uid, 0 FROM item
+    """
+)
+
+
+# Statements which create the full-text index of the items and the triggers
+# which keep it in sync with the `item` table. The index is an external
+# content FTS5 table, so it only holds the index and reads the names and
+# descriptions from the `item` table. Prefixes of two and three characters
+# are indexed to speed up prefix queries, and matches in the name weigh ten
+# times more than matches in the description when ranking the results.
+search_statements = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS item_search USING fts5
+    (
+        name,
+        description,
+        content='item',
+        content_rowid='uid',
+        prefix='2 3'
+    )
+    """,
+    """
+    INSERT INTO item_search (item_search, rank)
+    VALUES ('rank', 'bm25(10.0, 1.0)')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_insert_search AFTER INSERT ON item
+    BEGIN
+        INSERT INTO item_search (rowid, name, description)
+        VALUES (NEW.uid, NEW.name, NEW.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_update_search
+    AFTER UPDATE OF name, description ON item
+    BEGIN
+        INSERT INTO item_search (item_search, rowid, name, description)
+        VALUES ('delete', OLD.uid, OLD.name, OLD.description);
+        INSERT INTO item_search (rowid, name, description)
+        VALUES (NEW.uid, NEW.name, NEW.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_delete_search AFTER DELETE ON item
+    BEGIN
+        INSERT INTO item_search (item_search, rowid, name, description)
+        VALUES ('delete', OLD.uid, OLD.name, OLD.description);
+    END
+    """
+)
+# Statement which indexes all the existing items, when the full-text index
+# is created for a database which already holds items
+search_rebuild_statement = (
+    "INSERT INTO item_search (item_search) VALUES ('rebuild')"
+)
+# Statement which selects a page of the items which match a full-text
+# search query, in order of the rank of the matches
+search_query_statement = """
+    SELECT item.uid, item.name, item.description, item.completed
+    FROM item_search JOIN item ON item.uid = item_search.rowid
+    WHERE item_search MATCH :query
+    ORDER BY item_search.rank LIMIT :limit OFFSET :offset
+"""
+
+
+# The statement which updates the columns of the changed attributes of an
+# item and returns its row, so the item is not fetched before it is updated
+update_returning_statement = """
+    UPDATE item SET {assignments} WHERE uid = :uid
+    RETURNING uid, name, description, completed
+"""
+
+# The statement which creates an item and returns its row, so the item is
+# not fetched after it is created
+insert_returning_statement = """
+    INSERT INTO item (name, description, completed)
+    VALUES (:name, :description, :completed)
+    RETURNING uid, name, description, completed
+"""
+
+
+# The number of connections opened, checked out, and checked in by the
+# database engine, and of transactions begun by its sessions
+connection_counts = {
+    'opened': 0,
+    'checkouts': 0,
+    'checkins': 0,
+    'transactions': 0
+}
+connection_counts_lock = threading.Lock()  # Guards the connection counts
+
+
+def count_connection_event(name):
+    """
+    Increment the count of a connection event of the database engine.
+
+    Args:
+        name (str): Name of the count
+    """
+    with connection_counts_lock:
+        connection_counts[name] += 1
+
+
+@event.listens_for(db.engine, 'connect')
+def count_connect(connection, connection_record):
+    """
+    Count a connection opened by the database engine.
+
+    Args:
+        connection (sqlite3.Connection): Database connection
+        connection_record (_ConnectionRecord): Pool record of the
+            connection
+    """
+    count_connection_event('opened')
+
+
+@event.listens_for(db.engine, 'checkout')
+def count_checkout(connection, connection_record, connection_proxy):
+    """
+    Count a connection checked out from the pool of the database engine.
+
+    Args:
+        connection (sqlite3.Connection): Database connection
+        connection_record (_ConnectionRecord): Pool record of the
+            connection
+        connection_proxy (_ConnectionFairy): Proxy of the connection for
+            the duration of the checkout
+    """
+    count_connection_event('checkouts')
+
+
+@event.listens_for(db.engine, 'checkin')
+def count_checkin(connection, connection_record):
+    """
+    Count a connection checked in to the pool of the database engine.
+
+    Args:
+        connection (sqlite3.Connection): Database connection
+        connection_record (_ConnectionRecord): Pool record of the
+            connection
+    """
+    count_connection_event('checkins')
+
+
+@event.listens_for(db.session, 'after_begin')
+def count_transaction(session, transaction, connection):
+    """
+    Count a transaction begun by a database session.
+
+    Args:
+        session (Session): Database session
+        transaction (SessionTransaction): Transaction which was begun
+        connection (Connection): Connection of the transaction
+    """
+    count_connection_event('transactions')
+
+
+def mark_items_changed(*uids):
+    """
+    Record items changed in the current transaction of the session, so
+    their cached rows are invalidated once the transaction is committed.
+
+    Items written through the unit of work of the session are recorded
+    when it is flushed, so this is only needed for bulk and textual
+    statements, which bypass it.
+
+    Args:
+        *uids (int): Unique identifiers of the changed items. If none are
+            provided, all the cached rows are invalidated.
+    """
+    if uids:
+        db.session.info.setdefault('changed_items', set()).update(uids)
+    else:
+        db.session.info['all_items_changed'] = True
+
+
+@event.listens_for(db.session, 'after_flush')
+def record_flushed_items(session, flush_context):
+    """
+    Record the items updated or deleted by a flush of a session, so their
+    cached rows are invalidated once the transaction is committed.
+
+    Args:
+        session (Session): Session which was flushed
+        flush_context (UOWTransaction): Unit of work of the flush
+    """
+    changed = session.info.setdefault('changed_items', set())
+    for instance in chain(session.dirty, session.deleted):
+        if isinstance(instance, Item):
+            changed.add(instance.uid)
+
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_committed_items(session):
+    """
+    Invalidate the cached rows of the items changed by a committed
+    transaction of a session.
+
+    Args:
+        session (Session): Session which was committed
+    """
+    changed = session.info.pop('changed_items', set())
+    if session.info.pop('all_items_changed', False):
+        item_cache.clear()
+    elif changed:
+        item_cache.invalidate(*changed)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_changed_items(session):
+    """
+    Forget the items changed by a transaction of a session which was
+    rolled back, as their cached rows are still current.
+
+    Args:
+        session (Session): Session which was rolled back
+    """
+    session.info.pop('changed_items', None)
+    session.info.pop('all_items_changed', None)
+
+
+@event.listens_for(db.engine, 'before_cursor_execute')
+def start_statement_timer(connection, cursor, statement, parameters,
+                          context, executemany):
+    """
+    Note when a statement starts executing on the database engine.
+
+    Args:
+        connection (Connection): Connection which executes the statement
+        cursor (sqlite3.Cursor): Cursor which executes the statement
+        statement (str): SQL statement
+        parameters: Parameters of the statement
+        context (ExecutionContext): Execution context of the statement
+        executemany (bool): Whether or not the statement is executed
+            for many sets of parameters
+    """
+    connection.info['statement_start'] = time.perf_counter()
+
+
+@event.listens_for(db.engine, 'after_cursor_execute')
+def stop_statement_timer(connection, cursor, statement, parameters,
+                         context, executemany):
+    """
+    Count the time a statement took on the database engine as time spent
+    in the database by the current request.
+
+    Args:
+        connection (Connection): Connection which executed the statement
+        cursor (sqlite3.Cursor): Cursor which executed the statement
+        statement (str): SQL statement
+        parameters: Parameters of the statement
+        context (ExecutionContext): Execution context of the statement
+        executemany (bool): Whether or not the statement was executed
+            for many sets of parameters
+    """
+    start = connection.info.pop('statement_start', None)
+    if start is not None:
+        seconds = time.perf_counter() - start
+        record_database_time(seconds)
+        metrics.observe_statement(seconds)
+
+
+@event.listens_for(db.Model.metadata, 'after_create')
+def create_indexes(target, connection, **kwargs):
+    """
+    Create the indexes of the tables of the application, if they do not
+    already exist, whenever the tables of the application are created.
+
+    An index is otherwise only created along with its table, so it would
+    be missing from a database created before the index was added.
+
+    Args:
+        target (MetaData): Metadata of the tables which were created
+        connection (Connection): Connection used to create the tables
+        **kwargs: Additional keyword arguments of the event
+    """
+    for table in target.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+
+@event.listens_for(db.Model.metadata, 'after_create')
+def create_change_tracking(target, connection, **kwargs):
+    """
+    Create the tables and triggers which track changes to the `item`
+    table, if they do not already exist, whenever the tables of the
+    application are created.
+
+    Args:
+        target (MetaData): Metadata of the tables which were created
+        connection (Connection): Connection used to create the tables
+        **kwargs: Additional keyword arguments of the event
+    """
+    for statement in change_tracking_statements:
+        connection.execute(text(statement))
+
+
+@event.listens_for(db.Model.metadata, 'after_create')
+def create_search(target, connection, **kwargs):
+    """
+    Create the full-text index of the items and the triggers which keep
+    it in sync with the `item` table, if they do not already exist,
+    whenever the tables of the application are created. If the index is
+    created, the existing items are indexed as well.
+
+    Args:
+        target (MetaData): Metadata of the tables which were created
+        connection (Connection): Connection used to create the tables
+        **kwargs: Additional keyword arguments of the event
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = 'item_search'")
+    ).first()
+    for statement in search_statements:
+        connection.execute(text(statement))
+    if exists is None:
+        connection.execute(text(search_rebuild_statement))
+
+
+# The upper bounds in seconds of the buckets of the latency histograms
+latency_buckets = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+    2.5, 5.0
+)
+
+
+class Histogram(object):
+    """
+    This class represents a histogram of observed durations, with
+    cumulative buckets as in the Prometheus text format.
+
+    Attributes:
+        buckets (tuple): Upper bounds in seconds of the buckets
+        counts (List[int]): Number of observations in each bucket, not
+            cumulative, with a last bucket for the observations above
+            all the bounds
+        sum (float): Sum of the observations
+        count (int): Number of observations
+    """
+
+    def __init__(self, buckets=latency_buckets):
+        """
+        Initialize a `Histogram` object.
+
+        Args:
+            buckets (tuple): Optional. Upper bounds in seconds of the
+                buckets. The default value is `latency_buckets`.
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        """
+        Add an observation to the histogram. The caller must hold the
+        lock of the metrics.
+
+        Args:
+            seconds (float): Observed duration
+        """
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def samples(self, name, labels):
+        """
+        Format the samples of the histogram in the Prometheus text
+        format.
+
+        Args:
+            name (str): Name of the metric
+            labels (dict): Labels of the histogram
+
+        Returns:
+            List[str]: Lines of the samples
+        """
+        lines = []
+        cumulative = 0
+        bounds = [repr(bound) for bound in self.buckets] + ['+Inf']
+        for bound, count in zip(bounds, self.counts):
+            cumulative += count
+            bucket_labels = dict(labels, le=bound)
+            lines.append(
+                f'{name}_bucket{format_labels(bucket_labels)} {cumulative}'
+            )
+        lines.append(f'{name}_sum{format_labels(labels)} {self.sum!r}')
+        lines.append(f'{name}_count{format_labels(labels)} {self.count}')
+        return lines
+
+
+class Metrics(object):
+    """
+    This class represents the metrics of the application, which are
+    exposed in the Prometheus text format.
+
+    Requests are recorded by route and method, with their latency in a
+    histogram and their count by status code. SQL statements are
+    recorded with their duration in a histogram.
+
+    Attributes:
+        buckets (tuple): Upper bounds in seconds of the buckets of the
+            histograms
+    """
+
+    def __init__(self, buckets=latency_buckets):
+        """
+        Initialize a `Metrics` object.
+
+        Args:
+            buckets (tuple): Optional. Upper bounds in seconds of the
+                buckets of the histograms. The default value is
+                `latency_buckets`.
+        """
+        self.buckets = buckets
+        self._latencies = {}  # Request latencies by route and method
+        self._statuses = {}  # Request counts by route, method, and status
+        self._statements = Histogram(buckets)  # SQL statement durations
+        self._lock = threading.Lock()  # Guards the recorded metrics
+
+    def observe_request(self, route, method, status_code, seconds):
+        """
+        Record a handled request.
+
+        Args:
+            route (str): Rule of the route which handled the request
+            method (str): HTTP method of the request
+            status_code (int): Status code of the response
+            seconds (float): Latency of the request
+        """
+        with self._lock:
+            histogram = self._latencies.get((route, method))
+            if histogram is None:
+                histogram = Histogram(self.buckets)
+                self._latencies[(route, method)] = histogram
+            histogram.observe(seconds)
+
+            key = (route, method, status_code)
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+
+    def observe_statement(self, seconds):
+        """
+        Record an executed SQL statement.
+
+        Args:
+            seconds (float): Duration of the statement
+        """
+        with self._lock:
+            self._statements.observe(seconds)
+
+    def clear(self):
+        """
+        Discard all the recorded metrics.
+        """
+        with self._lock:
+            self._latencies.clear()
+            self._statuses.clear()
+            self._statements = Histogram(self.buckets)
+
+    def render(self):
+        """
+        Format the recorded metrics in the Prometheus text format.
+
+        Returns:
+            List[str]: Lines of the metrics
+        """
+        with self._lock:
+            lines = format_metric_header(
+                'todo_http_request_duration_seconds',
+                'histogram',
+                'Latency of HTTP requests by route and method.'
+            )
+            for (route, method), histogram in sorted(self._latencies.items()):
+                labels = {'route': route, 'method': method}
+                lines += histogram.samples(
+                    'todo_http_request_duration_seconds',
+                    labels
+                )
+
+            lines += format_metric_header(
+                'todo_http_requests_total',
+                'counter',
+                'Number of HTTP requests by route, method, and status code.'
+            )
+            for (route, method, status), count in sorted(
+                self._statuses.items()
+            ):
+                labels = {'route': route, 'method': method, 'status': status}
+                lines.append(
+                    f'todo_http_requests_total{format_labels(labels)} {count}'
+                )
+
+            lines += format_metric_header(
+                'todo_sql_statement_duration_seconds',
+                'histogram',
+                'Duration of executed SQL statements.'
+            )
+            lines += self._statements.samples(
+                'todo_sql_statement_duration_seconds',
+                {}
+            )
+
+        return lines
+
+
+def format_labels(labels):
+    """
+    Format the labels of a sample in the Prometheus text format.
+
+    Args:
+        labels (dict): Names and values of the labels
+
+    Returns:
+        str: Formatted labels, or an empty string if there are none
+    """
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        pairs.append(f'{name}="{value}"'.replace('\n', '\\n'))
+    return '{' + ','.join(pairs) + '}'
+
+
+def format_metric_header(name, kind, description):
+    """
+    Format the header lines of a metric in the Prometheus text format.
+
+    Args:
+        name (str): Name of the metric
+        kind (str): Type of the metric, such as `counter`, `gauge`, or
+            `histogram`
+        description (str): Description of the metric
+
+    Returns:
+        List[str]: Header lines of the metric
+    """
+    return [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+
+
+def format_metric(name, kind, description, value):
+    """
+    Format a metric with a single unlabelled sample in the Prometheus
+    text format.
+
+    Args:
+        name (str): Name of the metric
+        kind (str): Type of the metric, such as `counter` or `gauge`
+        description (str): Description of the metric
+        value (float): Value of the sample
+
+    Returns:
+        List[str]: Lines of the metric
+    """
+    return format_metric_header(name, kind, description) + [f'{name} {value}']
+
+
+metrics = Metrics()  # The metrics of the application
+
+
+def record_request_metrics(name, status_code, timings):
+    """
+    Timing hook which records the latency and status code of a request
+    in the metrics, by the rule of its route and its method.
+
+    Args:
+        name (str): Name of the function which handled the request
+        status_code (int): Status code of the response
+        timings (dict): Number of seconds spent in each phase
+    """
+    rule = request.url_rule
+    route = rule.rule if rule is not None else request.path
+
+    # The database time is spent within the handler, so it is not added
+    seconds = sum(timings.values()) - timings.get('db', 0)
+    metrics.observe_request(route, request.method, status_code, seconds)
+
+
+def render_metrics():
+    """
+    Format the metrics of the application, of the connections and
+    sessions of the database engine, and of the item cache in the
+    Prometheus text format.
+
+    Returns:
+        str: Metrics in the Prometheus text format
+    """
+    lines = metrics.render()
+
+    with connection_counts_lock:
+        counts = dict(connection_counts)
+    lines += format_metric(
+        'todo_db_connections_opened_total', 'counter',
+        'Number of database connections opened.', counts['opened']
+    )
+    lines += format_metric(
+        'todo_db_connection_checkouts_total', 'counter',
+        'Number of database connection checkouts.', counts['checkouts']
+    )
+    lines += format_metric(
+        'todo_db_connections_in_use', 'gauge',
+        'Number of database connections in use.',
+        counts['checkouts'] - counts['checkins']
+    )
+    lines += format_metric(
+        'todo_db_transactions_total', 'counter',
+        'Number of transactions begun by database sessions.',
+        counts['transactions']
+    )
+
+    stats = item_cache.stats()
+    lines += format_metric(
+        'todo_cache_hits_total', 'counter',
+        'Number of item cache lookups which found an entry.', stats['hits']
+    )
+    lines += format_metric(
+        'todo_cache_misses_total', 'counter',
+        'Number of item cache lookups which found no entry.',
+        stats['misses']
+    )
+    lines += format_metric(
+        'todo_cache_evictions_total', 'counter',
+        'Number of item cache entries evicted.', stats['evictions']
+    )
+    lines += format_metric(
+        'todo_cache_entries', 'gauge',
+        'Number of item cache entries.', stats['entries']
+    )
+    lines += format_metric(
+        'todo_cache_hit_ratio', 'gauge',
+        'Share of item cache lookups which found an entry.',
+        stats['hit_ratio']
+    )
+
+    return '\n'.join(lines) + '\n'
+
+
+# Callables which receive the timings of each request
+timing_hooks = [record_request_metrics]
+request_timings = threading.local()  # The timings of each thread's request
+
+
+def record_database_time(seconds):
+    """
+    Add time spent in the database to the timings of the request handled
+    by the current thread.
+
+    Args:
+        seconds (float): Number of seconds spent in the database
+    """
+    total = getattr(request_timings, 'database', 0)
+    request_timings.database = total + seconds
+
+
+def format_server_timing(timings):
+    """
+    Format the timings of a request as a `Server-Timing` header value.
+
+    Args:
+        timings (dict): Number of seconds spent in each phase
+
+    Returns:
+        str: Header value with the duration of each phase in milliseconds
+    """
+    return ', '.join(
+        f'{name};dur={seconds * 1000:.3f}' for name, seconds in timings.items()
+    )
+
+
+def save_profile(profiler, name):
+    """
+    Save the statistics of a profiled request to `profile_dir`, to be
+    loaded with the `pstats` module or a profile viewer.
+
+    Args:
+        profiler (cProfile.Profile): Profiler which profiled the request
+        name (str): Name of the function which handled the request
+
+    Returns:
+        str: The path to the file of the statistics
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, f'{name}-{time.time_ns()}.prof')
+    profiler.dump_stats(path)
+    return path
+
+
+def create_response(function):
+    """
+    Wrapper decorator which wraps a function and creates a response from
+    the results.
+
+    The wrapped function is called with all the passed arguments and
+    keyword arguments and returned data is saved. All exceptions are
+    caught and an error message is created from the exception.
+
+    A Flask response object is created where the payload is a JSON
+    serialized string of the results (or error message) created with
+    the `serialize` function. The status code
+    is 200 if no exceptions are raised, 404 if a lookup exception was
+    raise, and 400 for all other exceptions.
+
+    If the wrapped function returns a tuple, the first element is the
+    data to serialize and the second element is a dictionary of headers
+    to add to the response. If the wrapped function returns a response
+    object, it is returned as is.
+
+    Each request is timed by phase: the wrapped function (`handler`),
+    the database work within it (`db`), serializing the data
+    (`serialize`), and building the response (`response`). The timings
+    are passed to each of the `timing_hooks` and, if `server_timing` is
+    enabled, sent in the `Server-Timing` response header. A share of
+    `profile_rate` requests are profiled with cProfile and saved with
+    `save_profile`.
+
+    Args:
+        function (Callable function): Function to wrap
+
+    Returns:
+        Callable function: Wrapped function
+    """
+
+    @wraps(wrapped=function)
+    def wrapper(*args, **kwargs):
+        """
+        Wrap a function. See above for details.
+
+        Args:
+            *args: Arguments to pass through to the wrapped function
+            **kwargs: Keyword arguments to pass through to the wrapped
+                function
+
+        Returns:
+            Response: Flask response object
+        """
+        headers = {}  # Contains the headers of the response
+        timings = {}  # Contains the number of seconds of each phase
+
+        # Sample the request for profiling
+        profiler = None
+        if profile_rate and random.random() < profile_rate:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        request_timings.database = 0
+        start = time.perf_counter()
+
+        try:
+            # Execute the function and store any returned data. A tuple
+            # holds both the data and the headers of the response.
+            data = function(*args, **kwargs)
+            if isinstance(data, tuple):
+                data, headers = data
+            status_code = 200
+
+        except Exception as error:
+            # Create a message for the user on any raised exceptions and
+            # change the status code based on the exception type
+            data = {'message': str(error)}
+            status_code = 404 if isinstance(error, LookupError) else 400
+
+        end = time.perf_counter()
+        timings['handler'] = end - start
+        timings['db'] = request_timings.database
+
+        # A response object is returned as is, for example when its
+        # payload is streamed
+        if isinstance(data, Response):
+            response = data
+            status_code = response.status_code
+
+        else:
+            # Create the response object with serialized data. The
+            # payload is set to `None` if there was no result from the
+            # called function, this is to ensure an empty payload.
+            start = end
+            if data is not None:
+                data = serialize(data)
+            end = time.perf_counter()
+            timings['serialize'] = end - start
+
+            start = end
+            response = Response(
+                response=data,
+                status=status_code,
+                headers=headers,
+                mimetype='application/json'
+            )
+            timings['response'] = time.perf_counter() - start
+
+        if profiler is not None:
+            profiler.disable()
+            save_profile(profiler, function.__qualname__)
+
+        # Report the timings of the request
+        for hook in timing_hooks:
+            hook(function.__qualname__, status_code, timings)
+        if server_timing:
+            response.headers['Server-Timing'] = format_server_timing(timings)
+
+        return response
+
+    return wrapper
+
+
+def encode_cursor(uid):
+    """
+    Encode the unique identifier of the last item of a page into an
+    opaque cursor which is used to fetch the next page.
+
+    Args:
+        uid (int): Unique identifier of the last item of a page
+
+    Returns:
+        str: Opaque cursor
+    """
+    return urlsafe_b64encode(str(uid).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode an opaque cursor into the unique identifier of the last item
+    of the previous page.
+
+    Args:
+        cursor (str): Opaque cursor
+
+    Returns:
+        int: Unique identifier of the last item of the previous page
+
+    Raises:
+        ValueError: Invalid cursor
+    """
+    try:
+        # The padding is stripped when encoding, so add it back
+        padding = '=' * (-len(cursor) % 4)
+        return int(urlsafe_b64decode(cursor + padding).decode())
+    except ValueError:
+        raise ValueError('Invalid cursor')
+
+
+def get_page_arguments():
+    """
+    Get the pagination arguments from the query string of the HTTP
+    request.
+
+    Query Parameters:
+        limit (int): Optional. Maximum number of items in the page. The
+            value is capped to `max_page_size`.
+        cursor (str): Optional. Cursor returned with the previous page
+
+    Returns:
+        tuple: The unique identifier after which the page starts and the
+            maximum number of items in the page
+
+    Raises:
+        ValueError: Invalid limit or cursor
+    """
+    try:
+        limit = int(request.args.get('limit', page_size))
+    except ValueError:
+        raise ValueError('Invalid limit')
+    if limit < 1:
+        raise ValueError('Invalid limit')
+
+    cursor = request.args.get('cursor')
+    after = decode_cursor(cursor) if cursor else 0
+
+    return after, min(limit, max_page_size)
+
+
+def get_completed_filter():
+    """
+    Get the status by which to filter the items from the query string
+    of the HTTP request.
+
+    Query Parameters:
+        completed (str): Optional. `true` to only get completed items,
+            or `false` to only get items which are not completed
+
+    Returns:
+        bool: The status of the items to get, or `None` to get all the
+            items
+
+    Raises:
+        ValueError: Invalid status
+    """
+    completed = request.args.get('completed')
+    if completed is None:
+        return None
+    if completed not in statuses:
+        raise ValueError('Invalid completed')
+    return statuses[completed]
+
+
+def get_fields():
+    """
+    Get the fields of the items to respond with from the query string of
+    the HTTP request.
+
+    Query Parameters:
+        fields (str): Optional. Comma separated names of the fields. The
+            default value is all the fields.
+
+    Returns:
+        tuple: Names of the fields, in the order of `item_fields`
+
+    Raises:
+        ValueError: Invalid fields
+    """
+    fields = request.args.get('fields')
+    if fields is None:
+        return item_fields
+
+    names = {name.strip() for name in fields.split(',')}
+    if not names <= set(item_fields):
+        raise ValueError('Invalid fields')
+    return tuple(field for field in item_fields if field in names)
+
+
+def get_uids():
+    """
+    Get the unique identifiers of the items to fetch from the query
+    string of the HTTP request.
+
+    Query Parameters:
+        uids (str): Optional. Comma separated unique identifiers of the
+            items
+
+    Returns:
+        List[int]: Unique identifiers of the items, or `None` if they
+            are not provided
+
+    Raises:
+        ValueError: Invalid unique identifiers, or too many of them
+    """
+    uids = request.args.get('uids')
+    if uids is None:
+        return None
+
+    try:
+        uids = [int(uid) for uid in uids.split(',')]
+    except ValueError:
+        raise ValueError('Invalid unique identifiers')
+    if len(uids) > max_batch_size:
+        raise ValueError(f'No more than {max_batch_size} items are allowed')
+    return uids
+
+
+def get_lookup_uids():
+    """
+    Get the unique identifiers of the items to fetch from the payload of
+    the HTTP request.
+
+    JSON Payload:
+        {
+            "uids": [integer]  <-- Unique identifiers of the items
+        }
+
+    Returns:
+        List[int]: Unique identifiers of the items
+
+    Raises:
+        ValueError: Invalid unique identifiers, or too many of them
+    """
+    data = request.json
+    uids = data.get('uids') if isinstance(data, dict) else None
+    if not isinstance(uids, list) or not all(
+        isinstance(uid, int) and not isinstance(uid, bool) for uid in uids
+    ):
+        raise ValueError('Invalid unique identifiers')
+    if len(uids) > max_batch_size:
+        raise ValueError(f'No more than {max_batch_size} items are allowed')
+    return uids
+
+
+def build_search_query(words):
+    """
+    Build an FTS5 query from the words a user searches for.
+
+    Each word is quoted, so the FTS5 query syntax in the words is not
+    interpreted, and a word ending with `*` matches as a prefix. Items
+    match the query if they match all the words.
+
+    Args:
+        words (str): Words to search for
+
+    Returns:
+        str: FTS5 query
+
+    Raises:
+        ValueError: Invalid query
+    """
+    terms = []
+    for word in words.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*')
+
+        # Skip the words which hold no token, such as punctuation
+        if not any(character.isalnum() for character in word):
+            continue
+
+        term = '"' + word.replace('"', '""') + '"'
+        terms.append(term + '*' if prefix else term)
+
+    if not terms:
+        raise ValueError('Invalid query')
+    return ' '.join(terms)
+
+
+def get_search_arguments():
+    """
+    Get the search arguments from the query string of the HTTP request.
+
+    Search results are ordered by rank rather than unique identifier, so
+    the cursor of a page of results holds the number of results before
+    the page.
+
+    Query Parameters:
+        q (str): Words to search for. A word ending with `*` matches as
+            a prefix.
+        limit (int): Optional. Maximum number of items in the page. The
+            value is capped to `max_page_size`.
+        cursor (str): Optional. Cursor returned with the previous page
+
+    Returns:
+        tuple: The FTS5 query, the number of results before the page,
+            and the maximum number of items in the page
+
+    Raises:
+        ValueError: Invalid query, limit or cursor
+    """
+    query = build_search_query(request.args.get('q', ''))
+    offset, limit = get_page_arguments()
+    return query, offset, limit
+
+
+def get_batch_data():
+    """
+    Get the collection of items supplied in the payload of the HTTP
+    request.
+
+    Returns:
+        list: Collection of dictionaries of attributes of the items
+
+    Raises:
+        ValueError: The payload is not a list or has too many elements
+    """
+    data = request.json
+    if not isinstance(data, list):
+        raise ValueError('A list of items is required')
+    if len(data) > max_batch_size:
+        raise ValueError(f'No more than {max_batch_size} items are allowed')
+
+    return data
+
+
+def get_batch_patches():
+    """
+    Get the partial updates of items supplied in the payload of the HTTP
+    request. Updates of the same item are merged in the order of the
+    payload.
+
+    Returns:
+        dict: Attributes to update of each item, keyed by the unique
+            identifiers of the items in the order of the payload
+
+    Raises:
+        ValueError: The payload is not a list, has too many elements, or
+            an element has no valid unique identifier
+    """
+    patches = {}
+    for data in get_batch_data():
+        try:
+            uid = data['uid']
+        except (KeyError, TypeError):
+            raise ValueError('A unique identifier is required for each item')
+        if not isinstance(uid, int) or isinstance(uid, bool):
+            raise ValueError('Invalid unique identifier')
+
+        # Only the `name`, `description`, and `completed` attributes are
+        # updated, as with `Item.from_dict`
+        patch = patches.setdefault(uid, {})
+        for key in ('name', 'description', 'completed'):
+            if key in data:
+                patch[key] = data[key]
+
+    return patches
+
+
+def get_item_changes(data):
+    """
+    Get the attributes of an item to update from the payload of the HTTP
+    request.
+
+    Only the `name`, `description`, and `completed` attributes are
+    updated, as with `Item.from_dict`.
+
+    Args:
+        data (dict): Deserialized JSON payload of the HTTP request
+
+    Returns:
+        dict: Attributes to update, keyed by their names
+    """
+    try:
+        return {
+            key: data[key]
+            for key in ('name', 'description', 'completed')
+            if key in data
+        }
+    except TypeError:
+        return {}
+
+
+def get_delete_filter():
+    """
+    Get which items to delete from the payload of the HTTP request.
+
+    JSON Payload:
+        {
+            "uids": [integer]  <-- Unique identifiers of the items
+        }
+        or
+        {
+            "completed": boolean  <-- Status of the items
+        }
+
+    Returns:
+        tuple: Unique identifiers of the items to delete as `List[int]`,
+            or `None`, and the status of the items to delete, or `None`
+
+    Raises:
+        ValueError: The payload has neither or both of `uids` and
+            `completed`, or either of them is invalid
+    """
+    data = request.json
+    if not isinstance(data, dict) or ('uids' in data) == ('completed' in data):
+        raise ValueError('Either `uids` or `completed` is required')
+
+    if 'uids' in data:
+        uids = data['uids']
+        if not isinstance(uids, list) or not all(
+            isinstance(uid, int) and not isinstance(uid, bool) for uid in uids
+        ):
+            raise ValueError('Invalid unique identifiers')
+        if len(uids) > max_batch_size:
+            raise ValueError(
+                f'No more than {max_batch_size} items are allowed'
+            )
+        return uids, None
+
+    if not isinstance(data['completed'], bool):
+        raise ValueError('Invalid status')
+    return None, data['completed']
+
+
+def generate_json_array(items):
+    """
+    Generate a JSON array of items chunk by chunk.
+
+    Each chunk holds the serialized items of one batch, so only one
+    batch is held in memory at a time.
+
+    Args:
+        items (Iterable[Item]): Items to serialize
+
+    Yields:
+        str: Chunk of the JSON array
+    """
+    yield '['
+    separator = ''
+    for batch in iterate_batches(items):
+        yield separator + ','.join(serialize(item) for item in batch)
+        separator = ','
+    yield ']'
+
+
+def generate_ndjson(items):
+    """
+    Generate newline delimited JSON of items chunk by chunk, where each
+    line is one serialized item.
+
+    Args:
+        items (Iterable[Item]): Items to serialize
+
+    Yields:
+        str: Chunk of lines of newline delimited JSON
+    """
+    for batch in iterate_batches(items):
+        yield ''.join(serialize(item) + '\n' for item in batch)
+
+
+def iterate_batches(items):
+    """
+    Group items into batches of `stream_batch_size` items.
+
+    Args:
+        items (Iterable[Item]): Items to group
+
+    Yields:
+        List[Item]: Batch of items
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= stream_batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_response(items):
+    """
+    Create an HTTP response which streams a collection of items in the
+    format requested by the `stream` query parameter.
+
+    The items are consumed lazily while the payload is sent, so the
+    response starts before all the items are read from the database.
+
+    Query Parameters:
+        stream (str): `json` to stream a JSON array, or `ndjson` to
+            stream newline delimited JSON
+
+    Args:
+        items (Iterable[Item]): Items to stream
+
+    Returns:
+        Response: HTTP response object with a streamed payload
+
+    Raises:
+        ValueError: Invalid streaming format
+    """
+    stream = request.args.get('stream')
+    if stream == 'json':
+        chunks = generate_json_array(items)
+        mimetype = 'application/json'
+    elif stream == 'ndjson':
+        chunks = generate_ndjson(items)
+        mimetype = 'application/x-ndjson'
+    else:
+        raise ValueError('Invalid stream')
+
+    # Keep the request context for the duration of the stream, as the
+    # chunks are generated after the route returns
+    return Response(
+        response=stream_with_context(chunks),
+        status=200,
+        mimetype=mimetype
+    )
+
+
+def make_etag(name, version):
+    """
+    Make a strong entity tag for a resource from its version.
+
+    Args:
+        name (str): Name of the resource
+        version (int): Version of the resource
+
+    Returns:
+        str: Entity tag, or `None` if the version is not known
+    """
+    if version is None:
+        return None
+    return f'{name}-{version}'
+
+
+def not_modified(etag):
+    """
+    Create a 304 response if the client already holds the version of a
+    resource identified by an entity tag, according to the
+    `If-None-Match` request header.
+
+    Args:
+        etag (str): Entity tag of the resource
+
+    Returns:
+        Response: HTTP response object with a 304 status code, or `None`
+            if the client does not hold the version of the resource
+    """
+    # Entity tags are compared weakly, so weak entity tags match too
+    if etag is None or not request.if_none_match.contains_weak(etag):
+        return None
+    return Response(status=304, headers={'ETag': quote_etag(etag)})
+
+
+class ItemResource(Resource):
+    """
+    This resource class provides create, read, update, and delete (CRUD)
+    actions for the item resource using HTTP methods.
+    """
+
+    @create_response
+    def get(self, uid=None):
+        """
+        HTTP GET method to fetch one To-Do item by its unique identifier
+        or a page of To-Do items from the database.
+
+        Pages are ordered by the unique identifier of the items. If
+        there are more items after the page, the `X-Next-Cursor`
+        response header holds the cursor to pass to fetch the next page.
+
+        The `ETag` response header holds the version of the item or of
+        the collection. If it matches the `If-None-Match` request
+        header, a 304 response is returned without fetching any item.
+
+        Args:
+            uid (int): Optional. Unique identifier of the item
+
+        Query Parameters:
+            limit (int): Optional. Maximum number of items in the page
+            cursor (str): Optional. Cursor returned with the previous
+                page
+            stream (str): Optional. `json` or `ndjson` to stream all the
+                items instead of returning a page
+            completed (str): Optional. `true` or `false` to only fetch
+                the items with that status
+            fields (str): Optional. Comma separated names of the fields
+                of the items to respond with
+            uids (str): Optional. Comma separated unique identifiers of
+                the items to fetch instead of a page
+
+        Returns:
+            tuple or Response: One item or a page of items retrieved
+                from the database and the headers of the response, a
+                response streaming all the items, or a 304 response
+        """
+        # The unique identifier is provided, so fetch that one item
+        if uid:
+            # If the client already holds the current version of the
+            # item, respond before fetching the item
+            etag = make_etag(f'item-{uid}', Item.fetch_version(uid=uid))
+            response = not_modified(etag)
+            if response is not None:
+                return response
+
+            headers = {'ETag': quote_etag(etag)} if etag else {}
+            return Item.fetch(uid=uid), headers
+
+        # The unique identifiers of items are provided, so fetch those
+        # items in the order they were requested, and report the items
+        # which were not found
+        uids = get_uids()
+        if uids is not None:
+            items, not_found = Item.fetch_many(uids)
+            return {'items': items, 'not_found': not_found}
+
+        # Get the status of the items to fetch if they are filtered by
+        # status
+        completed = get_completed_filter()
+
+        # Get the fields of the items to respond with
+        fields = get_fields()
+
+        # If the client already holds the current version of the
+        # collection, respond before fetching any item. The version is
+        # read before the items, so a concurrent change can only make
+        # the entity tag stale.
+        etag = make_etag('items', Item.fetch_version())
+        response = not_modified(etag)
+        if response is not None:
+            return response
+
+        # If streaming is requested, stream all the items instead of
+        # returning a page
+        if 'stream' in request.args:
+            response = stream_response(Item.iterate(completed=completed))
+            response.headers['ETag'] = quote_etag(etag)
+            return response
+
+        # Otherwise, fetch a page of items and, if there is a next page,
+        # add its cursor to the headers
+        after, limit = get_page_arguments()
+        rows, more = Item.fetch_page(after, limit, completed, fields)
+        headers = {'ETag': quote_etag(etag)}
+        if more:
+            headers['X-Next-Cursor'] = encode_cursor(rows[-1].uid)
+        return project(rows, fields), headers
+
+    @create_response
+    def post(self):
+        """
+        HTTP POST method to create a To-Do item in the database based on
+        the data supplied from the user.
+
+        JSON Payload:
+            {
+                "name": string,         <-- Required name of the item
+                "description": string,  <-- Optional description of the item
+                "completed": boolean    <-- Optional status of the item
+            }
+
+        Returns:
+            Item: Created item
+        """
+        # Get the deserialized JSON data from the HTTP request, extract
+        # the required and optional attributes, and create a new item in
         # the database.
-        return Item.fetch(uid=uid).from_dict(data=request.json).save()
+        return Item().from_dict(data=request.json).save()
 
     @create_response
-    def patch(self, uid):
+    def put(self, uid):
         """
-        HTTP PATCH method to partially update an item with attributes
-        supplied by the payload of the HTTP request.
+        HTTP PUT method to update an item by replacing its attributes
+        with those supplied by the payload of the HTTP request.
 
         Args:
             uid (int): Unique identifier of the item
@@ -257,22 +2386,214 @@ class ItemResource(Resource):
         """
         # Get the deserialized JSON data from the HTTP request, extract
         # the required and optional attributes, and update the item in
-        # the database.
-        return Item.fetch(uid=uid).from_dict(data=request.json).save()
+        # the database with a single statement.
+        return Item.update_by_uid(uid, get_item_changes(request.json))
 
     @create_response
-    def delete(self, uid):
+    def patch(self, uid=None):
         """
-        HTTP DELETE method to delete an item from the database.
+        HTTP PATCH method to partially update an item, or a collection of
+        items in a single transaction, with attributes supplied by the
+        payload of the HTTP request.
 
         Args:
-            uid (int): Unique identifier of the item
+            uid (int): Optional. Unique identifier of the item. If it is
+                not provided, the payload is a list of partial updates.
+
+        JSON Payload (if `uid` is not provided):
+            [
+                {
+                    "uid": integer,         <-- Required unique identifier
+                    "name": string,         <-- Optional name of the item
+                    "description": string,  <-- Optional description
+                    "completed": boolean    <-- Optional status of the item
+                },
+                ...
+            ]
+
+        Returns:
+            Item or dict: Updated item, or the unique identifiers of the
+                updated items and of the items which were not found
+        """
+        # The unique identifier is not provided, so update all the items
+        # in the payload
+        if uid is None:
+            updated, not_found = Item.update_many(get_batch_patches())
+            return {'updated': updated, 'not_found': not_found}
+
+        # Get the deserialized JSON data from the HTTP request, extract
+        # the required and optional attributes, and update the item in
+        # the database with a single statement.
+        return Item.update_by_uid(uid, get_item_changes(request.json))
+
+    @create_response
+    def delete(self, uid=None):
+        """
+        HTTP DELETE method to delete an item, or a collection of items
+        either by their unique identifiers or by their status, from the
+        database.
+
+        A collection of items is deleted in chunks, each in its own
+        transaction, so other writers are not locked out until all the
+        items are deleted.
+
+        Args:
+            uid (int): Optional. Unique identifier of the item. If it is
+                not provided, the payload selects the items to delete.
+
+        JSON Payload (if `uid` is not provided):
+            {
+                "uids": [integer]  <-- Unique identifiers of the items
+            }
+            or
+            {
+                "completed": boolean  <-- Status of the items
+            }
+
+        Returns:
+            dict: Number of deleted items, if `uid` is not provided
+        """
+        # The unique identifier is not provided, so delete the items
+        # selected by the payload
+        if uid is None:
+            uids, completed = get_delete_filter()
+            deleted = Item.delete_many(uids=uids, completed=completed)
+            return {'deleted': deleted}
+
+        # Delete the item from the database with a single statement
+        Item.delete_by_uid(uid)
+
+
+class ItemBatchResource(Resource):
+    """
+    This resource class provides actions for collections of items in a
+    single transaction using HTTP methods.
+    """
+
+    @create_response
+    def post(self):
+        """
+        HTTP POST method to create a collection of To-Do items in the
+        database in a single transaction based on the data supplied from
+        the user.
+
+        JSON Payload:
+            [
+                {
+                    "name": string,         <-- Required name of the item
+                    "description": string,  <-- Optional description
+                    "completed": boolean    <-- Optional status of the item
+                },
+                ...
+            ]
+
+        Returns:
+            List[int]: Unique identifiers of the created items, in the
+                order of the payload
+        """
+        # Get the deserialized JSON data from the HTTP request, extract
+        # the attributes of each item, and create all the new items in
+        # the database.
+        items = [Item().from_dict(data=data) for data in get_batch_data()]
+        return [item.uid for item in Item.create_many(items)]
+
+
+class ItemSearchResource(Resource):
+    """
+    This resource class provides full-text search over the items
+    using HTTP methods.
+    """
+
+    @create_response
+    def get(self):
         """
-        # Fetch and delete the item from the database.
-        Item.fetch(uid=uid).delete()
+        HTTP GET method to search the To-Do items in the database by the
+        words of their name and description.
+
+        Items are ranked by relevance, with matches in the name ranking
+        above matches in the description. If there are more items after
+        the page, the `X-Next-Cursor` response header holds the cursor
+        to pass to fetch the next page.
+
+        Query Parameters:
+            q (str): Words to search for. Items match all the words, and
+                a word ending with `*` matches as a prefix.
+            limit (int): Optional. Maximum number of items in the page
+            cursor (str): Optional. Cursor returned with the previous
+                page
+
+        Returns:
+            tuple: Collection of the items in the page retrieved from the
+                database and the headers of the response
+        """
+        # Get the search query and the page of results, and fetch the
+        # page of items from the database. If there is a next page, add
+        # its cursor to the headers.
+        query, offset, limit = get_search_arguments()
+        items, more = Item.search(query, offset, limit)
+        headers = {}
+        if more:
+            headers['X-Next-Cursor'] = encode_cursor(offset + limit)
+        return items, headers
+
+
+class ItemLookupResource(Resource):
+    """
+    This resource class provides fetching a collection of items by their
+    unique identifiers using HTTP methods.
+    """
+
+    @create_response
+    def post(self):
+        """
+        HTTP POST method to fetch a collection of To-Do items from the
+        database by their unique identifiers, for lists of unique
+        identifiers too long for the `uids` query parameter of a GET
+        request.
+
+        JSON Payload:
+            {
+                "uids": [integer]  <-- Unique identifiers of the items
+            }
+
+        Returns:
+            dict: Found items, in the order of their unique identifiers,
+                and the unique identifiers of the items which were not
+                found
+        """
+        # Get the deserialized JSON data from the HTTP request, extract
+        # the unique identifiers, and fetch the items from the database.
+        items, not_found = Item.fetch_many(get_lookup_uids())
+        return {'items': items, 'not_found': not_found}
+
+
+class MetricsResource(Resource):
+    """
+    This resource class exposes the metrics of the application using
+    HTTP methods.
+    """
+
+    def get(self):
+        """
+        HTTP GET method to expose the metrics of the application for
+        Prometheus to scrape.
+
+        Returns:
+            Response: HTTP response object with the metrics in the Prometheus
+                text format
+        """
+        return Response(
+            response=render_metrics(),
+            status=200,
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
 
 
 api.add_resource(ItemResource, '/items', '/items/<int:uid>')
+api.add_resource(ItemBatchResource, '/items/batch')
+api.add_resource(ItemSearchResource, '/items/search')
+api.add_resource(ItemLookupResource, '/items/lookup')
+api.add_resource(MetricsResource, '/metrics')
 
 if __name__ == '__main__':
     # Make sure all the tables are created in the database before